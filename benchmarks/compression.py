@@ -0,0 +1,130 @@
+"""
+Benchmark of the compression of stored results on text, columnar and incompressible payloads
+
+For every payload and serializer the value is serialized, transferred to the storage and back, and loaded. The
+transfer is simulated at the given bandwidth, or done through a Lithops storage with --lithops. The stored bytes
+and the end-to-end time of the round trip are reported for the plain serializer, for every available codec and
+for the adaptive choice of the CompressedSerializer.
+
+Usage: python -m benchmarks.compression [--size 64M] [--bandwidth 100M] [--lithops]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import time
+
+from dagium import CloudpickleSerializer, CompressedSerializer, ResultStore, available_codecs, set_result_cache
+from dagium.serializers import FramesReader
+
+UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+WORDS = ['lorem', 'ipsum', 'dolor', 'sit', 'amet', 'consectetur', 'adipiscing', 'elit', 'sed', 'do', 'eiusmod',
+         'tempor', 'incididunt', 'ut', 'labore', 'et', 'dolore', 'magna', 'aliqua']
+
+
+def parse_size(text: str) -> int:
+    unit = UNITS.get(text[-1].upper())
+    return int(float(text[:-1]) * unit) if unit else int(text)
+
+
+def make_value(name: str, size: int, rnd: random.Random):
+    if name == 'text':
+        words = []
+        length = 0
+        while length < size:
+            word = rnd.choice(WORDS)
+            words.append(word)
+            length += len(word) + 1
+        return ' '.join(words)
+    if name == 'columnar':
+        # Rows of a table with a low-cardinality string column, a sorted integer column and a float column
+        rows = size // 24
+        return {
+            'country': [rnd.choice(['ES', 'FR', 'DE', 'IT', 'PT']) for _ in range(rows)],
+            'timestamp': list(range(1_700_000_000, 1_700_000_000 + rows)),
+            'price': [round(rnd.uniform(0, 100), 2) for _ in range(rows)],
+        }
+    return os.urandom(size)
+
+
+def make_serializers():
+    serializers = {'plain': CloudpickleSerializer()}
+    for codec in available_codecs():
+        # With a negligible bandwidth the codec is used whenever it makes the payload smaller
+        serializers[codec.name] = CompressedSerializer(codecs=[codec], bandwidth=1e-9)
+    serializers['adaptive'] = None
+    return serializers
+
+
+def simulated_round_trip(serializer, value, bandwidth: float) -> tuple[int, float, float]:
+    """
+    Return the stored bytes, the seconds spent serializing and loading, and the simulated transfer seconds
+    """
+    start = time.perf_counter()
+    data = FramesReader(serializer.dumps(value)).read()
+    dumped = time.perf_counter() - start
+    start = time.perf_counter()
+    serializer.loads(data)
+    loaded = time.perf_counter() - start
+    return len(data), dumped + loaded, 2 * len(data) / bandwidth
+
+
+def lithops_round_trip(serializer, value, storage) -> tuple[int, float, float]:
+    """
+    Return the stored bytes, the seconds spent serializing and loading, and the measured transfer seconds
+    """
+    store = ResultStore.from_storage(storage, prefix='dagium/benchmarks', serializer=serializer)
+    start = time.perf_counter()
+    ref = store.put(value, 'compression')
+    put = time.perf_counter() - start
+    start = time.perf_counter()
+    _, size = ref._fetch()
+    get = time.perf_counter() - start
+    storage.delete_object(ref.bucket, ref.key)
+
+    # The compute part is measured apart to split the time of the round trip
+    start = time.perf_counter()
+    serializer.loads(FramesReader(serializer.dumps(value)).read())
+    compute = time.perf_counter() - start
+    return size, compute, max(0.0, put + get - compute)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--size', default='64M', help='Approximate size of the payloads, like 16M or 1G')
+    parser.add_argument('--bandwidth', default='100M', help='Simulated bandwidth to the storage in bytes per second')
+    parser.add_argument('--payloads', nargs='+', default=['text', 'columnar', 'random'])
+    parser.add_argument('--lithops', action='store_true', help='Transfer the payloads through a Lithops storage')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    size = parse_size(args.size)
+    bandwidth = parse_size(args.bandwidth)
+    storage = None
+    if args.lithops:
+        from lithops import Storage
+        storage = Storage()
+        # Every fetch must go to the storage
+        set_result_cache(None)
+
+    mb = 1 << 20
+    print(f'{"payload":>9} {"serializer":>10} {"stored MB":>10} {"ratio":>6} '
+          f'{"compute s":>10} {"transfer s":>11} {"total s":>8}')
+    for payload in args.payloads:
+        value = make_value(payload, size, random.Random(args.seed))
+        plain = None
+        for name, serializer in make_serializers().items():
+            if serializer is None:
+                serializer = CompressedSerializer(bandwidth=bandwidth)
+            if storage is None:
+                stored, compute, transfer = simulated_round_trip(serializer, value, bandwidth)
+            else:
+                stored, compute, transfer = lithops_round_trip(serializer, value, storage)
+            plain = plain or stored
+            print(f'{payload:>9} {name:>10} {stored / mb:>10.1f} {plain / stored:>5.1f}x '
+                  f'{compute:>10.2f} {transfer:>11.2f} {compute + transfer:>8.2f}')
+
+
+if __name__ == '__main__':
+    main()
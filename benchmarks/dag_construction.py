@@ -0,0 +1,104 @@
+"""
+Microbenchmark of building, inspecting and compiling large DAGs
+
+For every size a layered DAG is built where every task depends on two tasks of the previous layer.
+The time to create the relations, add the tasks, access the root and leaf tasks, compile the DAG and
+release every task in topological order with the in-degree counters of the compiled DAG is reported, as well
+as the mean time to add a task as the child of an existing one and read the root tasks right after.
+
+The cyclic garbage collector is disabled while a DAG is built and compiled, otherwise its full collections,
+whose cost grows with the number of live objects, make the times superlinear in the size. Pass --gc to keep
+it enabled and see that effect. Applications that build DAGs of millions of tasks should do the same: disable
+the collector with gc.disable() while building, or move the built tasks out of its reach with gc.freeze().
+
+Usage: python -m benchmarks.dag_construction [--sizes 10000 100000 1000000] [--width 1000] [--gc]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import time
+from collections import deque
+
+from dagium.dag import DAG
+from dagium.operators import CallAsync
+
+
+class Timer:
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+
+
+def build_tasks(size: int, width: int, rnd: random.Random) -> list:
+    tasks = [CallAsync(f'task-{i}', executor=None, func=None) for i in range(size)]
+    for i in range(width, size):
+        layer_start = (i // width - 1) * width
+        tasks[i].add_parent([tasks[layer_start + rnd.randrange(width)] for _ in range(2)])
+    return tasks
+
+
+def sweep(compiled) -> int:
+    """Release every node in topological order using the in-degree counters, return the number of nodes."""
+    pending = compiled.in_degree[:]
+    offsets, child_ids = compiled.child_offsets, compiled.child_ids
+    ready = deque(compiled.root_ids)
+    released = 0
+    while ready:
+        node = ready.popleft()
+        released += 1
+        for child in child_ids[offsets[node]:offsets[node + 1]]:
+            pending[child] -= 1
+            if pending[child] == 0:
+                ready.append(child)
+    return released
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--width', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--gc', action='store_true', help='Keep the garbage collector enabled while building')
+    args = parser.parse_args()
+
+    print(f'{"nodes":>9} {"relations":>10} {"add":>8} {"roots":>8} {"compile":>8} {"sweep":>8} {"interleaved":>12}')
+    for size in args.sizes:
+        # Every size starts without the garbage of the previous one
+        gc.collect()
+        if not args.gc:
+            gc.disable()
+        rnd = random.Random(args.seed)
+        with Timer() as relations:
+            tasks = build_tasks(size, args.width, rnd)
+
+        dag = DAG(f'layered-{size}')
+        with Timer() as add:
+            dag.add_tasks(tasks)
+        with Timer() as roots:
+            num_roots, num_leaves = len(dag.root_tasks), len(dag.leaf_tasks)
+        with Timer() as compile_time:
+            compiled = dag.compile()
+        with Timer() as sweep_time:
+            released = sweep(compiled)
+        extra = min(size, 10_000)
+        with Timer() as interleaved:
+            for i in range(extra):
+                task = CallAsync(f'extra-{i}', executor=None, func=None)
+                dag.add_task(task)
+                tasks[rnd.randrange(size)] >> task
+                dag.root_tasks
+        gc.enable()
+
+        assert num_roots == args.width and num_leaves >= 1 and released == size
+        print(f'{size:>9} {relations.elapsed:>9.2f}s {add.elapsed:>7.2f}s {roots.elapsed:>7.2f}s '
+              f'{compile_time.elapsed:>7.2f}s {sweep_time.elapsed:>7.2f}s {interleaved.elapsed / extra * 1e6:>10.1f}us')
+        del tasks, dag, compiled
+
+
+if __name__ == '__main__':
+    main()
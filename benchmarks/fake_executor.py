@@ -0,0 +1,298 @@
+"""
+Local stand-in for the Lithops FunctionExecutor used to benchmark dagium without a Lithops backend
+
+Calls are not shipped anywhere: every call is given an invocation latency and a duration drawn from configurable
+distributions, and a single timer thread runs the function in the driver once both have elapsed, so thousands of
+calls can be in flight without a thread each. Calls can also be made to fail at random.
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import math
+import random
+import threading
+import time
+import uuid
+from typing import Any, Callable, List, Optional, Tuple, Union
+
+from lithops.future import ResponseFuture
+from lithops.utils import FuturesList
+from lithops.wait import ALWAYS, ANY_COMPLETED, ALL_COMPLETED
+
+Distribution = Callable[[random.Random], float]
+
+
+def parse_distribution(text: str) -> Distribution:
+    """
+    Parse a distribution of durations in seconds
+
+    Supported formats are ``const:S``, ``uniform:LOW:HIGH``, ``exp:MEAN``, ``lognormal:MU:SIGMA`` and
+    ``pareto:ALPHA:SCALE``. A plain number is a constant.
+
+    :param text: Distribution
+    :return: Function that draws a duration from a random generator
+    :raises ValueError: If the distribution is not supported
+    """
+    name, *params = text.split(':')
+    try:
+        if not params:
+            value = float(name)
+            return lambda rnd: value
+        values = [float(p) for p in params]
+    except ValueError:
+        raise ValueError(f'Invalid distribution {text}')
+
+    if name == 'const' and len(values) == 1:
+        return lambda rnd: values[0]
+    elif name == 'uniform' and len(values) == 2:
+        return lambda rnd: rnd.uniform(values[0], values[1])
+    elif name == 'exp' and len(values) == 1:
+        return lambda rnd: rnd.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    elif name == 'lognormal' and len(values) == 2:
+        return lambda rnd: rnd.lognormvariate(values[0], values[1])
+    elif name == 'pareto' and len(values) == 2:
+        return lambda rnd: values[1] * rnd.paretovariate(values[0])
+    raise ValueError(f'Invalid distribution {text}')
+
+
+class FakeFunctionError(Exception):
+    """Error raised by the calls that the FakeFunctionExecutor makes fail."""
+
+
+class FakeResponseFuture(ResponseFuture):
+    """
+    Future of a call of the FakeFunctionExecutor
+
+    :param call_id: Call ID
+    :param job_id: Job ID
+    :param executor_id: Executor ID
+    :param latency: Seconds between the submission and the start of the call
+    :param duration: Seconds the call runs
+    """
+
+    def __init__(self, call_id: str, job_id: str, executor_id: str, latency: float, duration: float):
+        # The state of a real future is never initialized, every attribute used by dagium is redefined here
+        self.call_id = call_id
+        self.job_id = job_id
+        self.executor_id = executor_id
+        self.latency = latency
+        self.duration = duration
+        self.stats = {}
+        self._event = threading.Event()
+        self._value = None
+        self._exception: Optional[BaseException] = None
+
+    @property
+    def running(self) -> bool:
+        return not self._event.is_set()
+
+    @property
+    def ready(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def done(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def error(self) -> bool:
+        return self._event.is_set() and self._exception is not None
+
+    @property
+    def success(self) -> bool:
+        return self._event.is_set() and self._exception is None
+
+    def result(self, throw_except: bool = True, **kwargs) -> Any:
+        self._event.wait()
+        if self._exception is not None:
+            if throw_except:
+                raise self._exception
+            return None
+        return self._value
+
+    def _resolve(self, value: Any, exception: Optional[BaseException], submitted: float, started: float):
+        self._value = value
+        self._exception = exception
+        end = time.time()
+        self.stats = {
+            'host_submit_tstamp': submitted,
+            'worker_start_tstamp': started,
+            'worker_end_tstamp': end,
+            'worker_exec_time': end - started,
+        }
+        self._event.set()
+
+
+class _FakeFuturesList(FuturesList):
+    """Futures of a map job, whose results are read without a Lithops executor."""
+
+    def get_result(self, **kwargs) -> List[Any]:
+        return [future.result() for future in self]
+
+
+class FakeFunctionExecutor:
+    """
+    Stand-in for the Lithops FunctionExecutor that runs the calls in the driver after a simulated delay
+
+    Implements call_async, map, wait and get_result. A call finishes after its invocation latency plus its
+    duration, drawn from the given distributions with a seeded random generator, and then its function is
+    run by the timer thread, so the functions should be cheap.
+
+    :param latency: Distribution of the invocation latency of the calls in seconds
+    :param duration: Distribution of the duration of the calls in seconds
+    :param failure_rate: Probability that a call fails with FakeFunctionError instead of running its function
+    :param seed: Seed of the random generator
+    """
+
+    def __init__(
+            self,
+            latency: Union[Distribution, str] = 'const:0',
+            duration: Union[Distribution, str] = 'const:0',
+            failure_rate: float = 0.0,
+            seed: int = 0
+    ):
+        self._latency = parse_distribution(latency) if isinstance(latency, str) else latency
+        self._duration = parse_distribution(duration) if isinstance(duration, str) else duration
+        self._failure_rate = failure_rate
+        self._rnd = random.Random(seed)
+        self.executor_id = uuid.uuid4().hex[:6]
+        self._jobs = itertools.count()
+        self._seq = itertools.count()
+
+        self._cond = threading.Condition()
+        self._due: List[Tuple[float, int, FakeResponseFuture, tuple]] = []
+        self._closed = False
+        self._calls = 0
+        self._thread = threading.Thread(target=self._run, name='fake-lithops-timer', daemon=True)
+        self._thread.start()
+
+    @property
+    def calls(self) -> int:
+        """Return the number of calls submitted."""
+        return self._calls
+
+    def call_async(self, func: Callable, data: Any, *args, **kwargs) -> FakeResponseFuture:
+        job_id = f'A{next(self._jobs):03d}'
+        return self._submit(func, data, (), job_id, '00000')
+
+    def map(
+            self,
+            map_function: Callable,
+            map_iterdata: List[Any],
+            chunksize: Optional[int] = None,
+            extra_args: Optional[Union[List[Any], Tuple[Any, ...]]] = None,
+            *args,
+            **kwargs
+    ) -> FuturesList:
+        job_id = f'M{next(self._jobs):03d}'
+        extra = extra_args if isinstance(extra_args, dict) else tuple(extra_args or ())
+        return _FakeFuturesList(
+            self._submit(map_function, data, extra, job_id, f'{i:05d}') for i, data in enumerate(map_iterdata)
+        )
+
+    def wait(
+            self,
+            fs: Union[ResponseFuture, List[ResponseFuture]],
+            throw_except: bool = True,
+            return_when: int = ALL_COMPLETED,
+            timeout: Optional[float] = None,
+            **kwargs
+    ) -> Tuple[FuturesList, FuturesList]:
+        futures = [fs] if isinstance(fs, ResponseFuture) else list(fs)
+        if return_when == ALWAYS:
+            needed = 0
+        elif return_when == ANY_COMPLETED:
+            needed = min(1, len(futures))
+        else:
+            needed = math.ceil(len(futures) * return_when / 100)
+
+        deadline = None if timeout is None else time.monotonic() + timeout
+        if needed == len(futures):
+            # Waiting on every future is cheaper than counting the finished ones after every call
+            for future in futures:
+                if not future._event.wait(None if deadline is None else max(0.0, deadline - time.monotonic())):
+                    break
+        with self._cond:
+            while sum(f.done for f in futures) < needed:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+
+        done = FuturesList(f for f in futures if f.done)
+        not_done = FuturesList(f for f in futures if not f.done)
+        if throw_except:
+            for future in done:
+                if future.error:
+                    future.result()
+        return done, not_done
+
+    def get_result(self, fs: Union[ResponseFuture, List[ResponseFuture]], **kwargs) -> Any:
+        if isinstance(fs, ResponseFuture):
+            return fs.result()
+        self.wait(fs)
+        return [f.result() for f in fs]
+
+    def shutdown(self):
+        """
+        Stop the timer thread, the calls that have not finished never finish
+        """
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    def _submit(
+            self,
+            func: Callable,
+            data: Any,
+            extra: Union[tuple, dict],
+            job_id: str,
+            call_id: str
+    ) -> FakeResponseFuture:
+        with self._cond:
+            latency = self._latency(self._rnd)
+            duration = self._duration(self._rnd)
+            fails = self._failure_rate > 0 and self._rnd.random() < self._failure_rate
+            future = FakeResponseFuture(call_id, job_id, self.executor_id, latency, duration)
+            submitted = time.time()
+            call = (func, data, extra, fails, submitted)
+            heapq.heappush(self._due, (time.monotonic() + latency + duration, next(self._seq), future, call))
+            self._calls += 1
+            self._cond.notify_all()
+        return future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._closed and (not self._due or self._due[0][0] > time.monotonic()):
+                    self._cond.wait(self._due[0][0] - time.monotonic() if self._due else None)
+                if self._closed:
+                    return
+                _, _, future, (func, data, extra, fails, submitted) = heapq.heappop(self._due)
+
+            started = submitted + future.latency
+            value, exception = None, None
+            if fails:
+                exception = FakeFunctionError(f'Injected failure of call {future.job_id}/{future.call_id}')
+            else:
+                try:
+                    if isinstance(data, dict):
+                        value = func(**data, **(extra if isinstance(extra, dict) else {}))
+                    elif isinstance(data, (list, tuple)):
+                        value = func(*data, *extra)
+                    else:
+                        value = func(data, *extra)
+                except Exception as e:
+                    exception = e
+            future._resolve(value, exception, submitted, started)
+
+            with self._cond:
+                self._cond.notify_all()
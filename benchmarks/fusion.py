@@ -0,0 +1,66 @@
+"""
+Benchmark that compares the execution of deep linear chains of CallAsync tasks with and without fusion
+
+Without fusion every task of a chain is a separate invocation and its result travels through the driver
+before the next task is submitted, with fusion the whole chain runs in a single invocation. The end-to-end
+time of the DAG is reported for a growing chain depth.
+
+Usage: python -m benchmarks.fusion [--depths 4 16 64] [--chains 4]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from lithops import LocalhostExecutor
+
+from dagium import InputData
+from dagium.dag import DAG, DagExecutor
+from dagium.operators import CallAsync
+
+
+def step(input_data, *args, **kwargs):
+    (value,) = input_data.values()
+    return value.result() + 1
+
+
+def run(executor, depth: int, num_chains: int, fuse: bool) -> float:
+    dag = DAG(f'fusion-{depth}')
+    for c in range(num_chains):
+        previous = CallAsync(f'chain-{c}-0', executor, step, input_data={'seed': InputData(0)})
+        dag.add_task(previous)
+        for i in range(1, depth):
+            task = CallAsync(f'chain-{c}-{i}', executor, step)
+            dag.add_task(task)
+            previous >> task
+            previous = task
+
+    dag_executor = DagExecutor(dag, fuse=fuse)
+    start = time.perf_counter()
+    futures = dag_executor.execute()
+    results = [futures[f'chain-{c}-{depth - 1}'].result() for c in range(num_chains)]
+    elapsed = time.perf_counter() - start
+    dag_executor.shutdown()
+    assert results == [depth] * num_chains
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--depths', type=int, nargs='+', default=[4, 16, 64])
+    parser.add_argument('--chains', type=int, default=4, help='Number of independent chains')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    executor = LocalhostExecutor()
+
+    print(f'{"depth":>6} {"unfused":>9} {"fused":>9} {"speedup":>8}')
+    for depth in args.depths:
+        unfused = run(executor, depth, args.chains, False)
+        fused = run(executor, depth, args.chains, True)
+        print(f'{depth:>6} {unfused:>8.2f}s {fused:>8.2f}s {unfused / fused:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark that compares the single-reducer path of MapReduce against a tree reduction
+
+Every map task produces a partial result and the reducer spends a fixed time per partial result it
+receives, emulating the download and merge cost of wide fan-ins. The end-to-end time of the DAG is
+reported for a growing number of map tasks.
+
+Usage: python -m benchmarks.mapreduce [--maps 16 64 256] [--fan-in 8] [--merge-cost 0.01]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import time
+
+from lithops import LocalhostExecutor
+
+from dagium import InputData
+from dagium.dag import DAG, DagExecutor
+from dagium.operators import MapReduce
+
+
+def map_func(input_data, parent_id, *args, **kwargs):
+    return input_data.result()
+
+
+def make_reduce(merge_cost: float):
+    def reduce_func(values):
+        time.sleep(merge_cost * len(values))
+        return sum(values)
+    return reduce_func
+
+
+def run(executor, num_maps: int, fan_in: int | None, merge_cost: float) -> float:
+    dag = DAG(f'mapreduce-{num_maps}')
+    dag.add_task(MapReduce(
+        'mapreduce',
+        executor=executor,
+        map_func=map_func,
+        reduce_func=make_reduce(merge_cost),
+        input_data={f'part-{i}': InputData(i) for i in range(num_maps)},
+        fan_in=fan_in,
+    ))
+    dag_executor = DagExecutor(dag)
+    start = time.perf_counter()
+    futures = dag_executor.execute()
+    result = futures['mapreduce'].result()
+    elapsed = time.perf_counter() - start
+    dag_executor.shutdown()
+    assert result == sum(range(num_maps))
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--maps', type=int, nargs='+', default=[16, 64, 256])
+    parser.add_argument('--fan-in', type=int, default=8)
+    parser.add_argument('--merge-cost', type=float, default=0.01, help='Seconds spent per partial result')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+    executor = LocalhostExecutor()
+
+    print(f'{"maps":>6} {"single":>9} {f"tree({args.fan_in})":>10}')
+    for num_maps in args.maps:
+        single = run(executor, num_maps, None, args.merge_cost)
+        tree = run(executor, num_maps, args.fan_in, args.merge_cost)
+        print(f'{num_maps:>6} {single:>8.2f}s {tree:>9.2f}s')
+
+
+if __name__ == '__main__':
+    main()
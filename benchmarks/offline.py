@@ -0,0 +1,276 @@
+"""
+Offline benchmark of the driver overhead of the DagExecutor on standard DAG shapes
+
+The tasks run on a FakeFunctionExecutor instead of a Lithops backend, so the whole path from the DagExecutor
+through the processor and the executor down to call_async and wait is measured without any cloud service. With
+the default zero latency and duration the makespan is pure driver overhead, with non zero distributions it is
+compared against the ideal makespan, which is the maximum of the critical path and the total work divided by the
+concurrency. Every case runs in a fresh process so the reported peak RSS is the peak of that case alone.
+
+The results are written as JSON with a fixed layout and sorted keys, and can be compared against the results of
+a previous run to detect regressions.
+
+Usage: python -m benchmarks.offline [--shapes chain fan diamond layered] [--sizes 1000 10000]
+           [--latency const:0] [--duration const:0] [--failure-rate 0] [--output results.json]
+           [--baseline previous.json]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import math
+import multiprocessing
+import platform
+import random
+import resource
+import sys
+import time
+from typing import Any, Callable, Dict, List
+
+from benchmarks.fake_executor import FakeFunctionExecutor
+from dagium.dag import DAG, DagExecutor
+from dagium.operators import CallAsync
+
+FORMAT_VERSION = 1
+# Metrics compared against the baseline and whether a higher value is better
+COMPARED_METRICS = {'tasks_per_s': True, 'overhead_per_task_us': False, 'peak_rss_mb': False}
+
+
+def noop(input_data, *args, **kwargs):
+    return None
+
+
+def chain(executor, size: int, rnd: random.Random) -> DAG:
+    """Linear chain of tasks."""
+    dag = DAG(f'chain-{size}')
+    tasks = [CallAsync(f'task-{i}', executor, noop) for i in range(size)]
+    for parent, child in zip(tasks, tasks[1:]):
+        child.add_parent(parent)
+    dag.add_tasks(tasks)
+    return dag
+
+
+def fan(executor, size: int, rnd: random.Random) -> DAG:
+    """A root task, a wide layer of tasks that depend on it and a task that joins them."""
+    dag = DAG(f'fan-{size}')
+    root = CallAsync('root', executor, noop)
+    join = CallAsync('join', executor, noop)
+    middle = [CallAsync(f'task-{i}', executor, noop) for i in range(max(1, size - 2))]
+    for task in middle:
+        task.add_parent(root)
+    join.add_parent(middle)
+    dag.add_tasks([root, *middle, join])
+    return dag
+
+
+def diamond(executor, size: int, rnd: random.Random) -> DAG:
+    """Consecutive diamonds, where a task forks into two tasks that are joined by the next one."""
+    dag = DAG(f'diamond-{size}')
+    join = CallAsync('join-0', executor, noop)
+    tasks = [join]
+    for i in range(1, max(1, (size - 1) // 3) + 1):
+        left = CallAsync(f'left-{i}', executor, noop)
+        right = CallAsync(f'right-{i}', executor, noop)
+        left.add_parent(join)
+        right.add_parent(join)
+        join = CallAsync(f'join-{i}', executor, noop)
+        join.add_parent([left, right])
+        tasks += [left, right, join]
+    dag.add_tasks(tasks)
+    return dag
+
+
+def layered(executor, size: int, rnd: random.Random) -> DAG:
+    """Random layered DAG of about square root of the size layers, every task depends on up to three tasks."""
+    dag = DAG(f'layered-{size}')
+    width = max(1, math.isqrt(size))
+    tasks = [CallAsync(f'task-{i}', executor, noop) for i in range(size)]
+    for i in range(width, size):
+        layer_start = (i // width - 1) * width
+        previous = tasks[layer_start:layer_start + width]
+        tasks[i].add_parent(rnd.sample(previous, min(len(previous), rnd.randint(1, 3))))
+    dag.add_tasks(tasks)
+    return dag
+
+
+SHAPES: Dict[str, Callable[[Any, int, random.Random], DAG]] = {
+    'chain': chain,
+    'fan': fan,
+    'diamond': diamond,
+    'layered': layered,
+}
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of the current process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def ideal_makespan(dag: DAG, durations: Dict[str, float], concurrency: int) -> float:
+    """
+    Return the makespan of a scheduler without overhead
+
+    :param dag: DAG
+    :param durations: Time from the submission to the end of each task with the task ID as key
+    :param concurrency: Maximum number of tasks running at the same time
+    :return: Maximum of the critical path and the total work divided by the concurrency
+    """
+    compiled = dag.compile()
+    offsets, parent_ids = compiled.parent_offsets, compiled.parent_ids
+    finish = [0.0] * len(compiled.tasks)
+    for i, task in enumerate(compiled.tasks):
+        start = max((finish[p] for p in parent_ids[offsets[i]:offsets[i + 1]]), default=0.0)
+        finish[i] = start + durations.get(task.task_id, 0.0)
+    return max(max(finish, default=0.0), sum(durations.values()) / concurrency)
+
+
+def run_case(shape: str, size: int, options: Dict[str, Any], results):
+    logging.basicConfig(level=logging.WARNING)
+    rnd = random.Random(options['seed'])
+    executor = FakeFunctionExecutor(
+        options['latency'], options['duration'], options['failure_rate'], options['seed']
+    )
+
+    start = time.perf_counter()
+    dag = SHAPES[shape](executor, size, rnd)
+    build = time.perf_counter() - start
+
+    dag_executor = DagExecutor(
+        dag,
+        max_concurrency=options['concurrency'],
+        event_driven=options['event_driven']
+    )
+    status, error = 'ok', None
+    start = time.perf_counter()
+    try:
+        futures = dag_executor.execute()
+    except Exception as e:
+        futures, status, error = {}, 'failed', f'{type(e).__name__}: {e}'
+    makespan = time.perf_counter() - start
+    dag_executor.shutdown()
+    executor.shutdown()
+
+    durations = {
+        task_id: sum(f.latency + f.duration for f in future.response_futures())
+        for task_id, future in futures.items()
+    }
+    ideal = ideal_makespan(dag, durations, options['concurrency']) if status == 'ok' else None
+    num_tasks = len(dag.tasks)
+    results.put({
+        'shape': shape,
+        'size': size,
+        'tasks': num_tasks,
+        'calls': executor.calls,
+        'status': status,
+        'error': error,
+        'build_s': round(build, 6),
+        'makespan_s': round(makespan, 6),
+        'ideal_s': round(ideal, 6) if ideal is not None else None,
+        'makespan_ratio': round(makespan / ideal, 4) if ideal else None,
+        'tasks_per_s': round(num_tasks / makespan, 2),
+        'overhead_per_task_us': round((makespan - (ideal or 0.0)) / num_tasks * 1e6, 3),
+        'peak_rss_mb': round(peak_rss() / (1 << 20), 1),
+    })
+
+
+def run_in_process(target, *args):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=args + (results,))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline: Dict[str, Any], threshold: float) -> int:
+    """
+    Print the change of every metric against a previous run
+
+    :param results: Results of this run
+    :param baseline: Report of the previous run
+    :param threshold: Relative change considered a regression
+    :return: Number of regressions
+    """
+    previous = {(r['shape'], r['size']): r for r in baseline['results']}
+    regressions = 0
+    for result in results:
+        before = previous.get((result['shape'], result['size']))
+        if before is None or result['status'] != 'ok' or before['status'] != 'ok':
+            continue
+        for metric, higher_is_better in COMPARED_METRICS.items():
+            old, new = before[metric], result[metric]
+            if not old:
+                continue
+            change = (new - old) / abs(old)
+            regressed = -change > threshold if higher_is_better else change > threshold
+            regressions += regressed
+            print(f'{result["shape"]:>8} {result["size"]:>8} {metric:>21} {old:>12} -> {new:>12} '
+                  f'{change:>+8.1%}{"  REGRESSION" if regressed else ""}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--shapes', nargs='+', choices=list(SHAPES), default=list(SHAPES))
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000], help='Number of tasks per DAG')
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--waves', action='store_true', help='Use the wave scheduler instead of the event-driven one')
+    parser.add_argument('--latency', default='const:0', help='Distribution of the invocation latency, like exp:0.01')
+    parser.add_argument('--duration', default='const:0', help='Distribution of the call duration, like uniform:0:1')
+    parser.add_argument('--failure-rate', type=float, default=0.0, help='Probability that a call fails')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', help='File to write the JSON results to')
+    parser.add_argument('--baseline', help='JSON results of a previous run to compare against')
+    parser.add_argument('--threshold', type=float, default=0.1, help='Relative change considered a regression')
+    args = parser.parse_args()
+
+    options = {
+        'concurrency': args.concurrency,
+        'event_driven': not args.waves,
+        'latency': args.latency,
+        'duration': args.duration,
+        'failure_rate': args.failure_rate,
+        'seed': args.seed,
+    }
+
+    results = []
+    print(f'{"shape":>8} {"tasks":>8} {"status":>7} {"tasks/s":>10} {"overhead":>10} '
+          f'{"makespan":>9} {"ideal":>9} {"peak RSS":>9}')
+    for shape in args.shapes:
+        for size in args.sizes:
+            result = run_in_process(run_case, shape, size, options)
+            results.append(result)
+            ideal = f'{result["ideal_s"]:>8.3f}s' if result['ideal_s'] is not None else f'{"-":>9}'
+            print(f'{shape:>8} {result["tasks"]:>8} {result["status"]:>7} {result["tasks_per_s"]:>10.0f} '
+                  f'{result["overhead_per_task_us"]:>8.0f}us {result["makespan_s"]:>8.3f}s {ideal} '
+                  f'{result["peak_rss_mb"]:>7.0f}MB')
+
+    report = {
+        'version': FORMAT_VERSION,
+        'options': options,
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+        },
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write('\n')
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get('options') != options:
+            print('The options of the baseline differ from the options of this run')
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
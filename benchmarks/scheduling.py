@@ -0,0 +1,122 @@
+"""
+Benchmark that compares the wave scheduler against the event-driven scheduler of the DagExecutor
+
+Tasks are not executed on Lithops, every task sleeps for a duration drawn from a skewed
+distribution, so the measured makespan only depends on the scheduling policy. The makespan of
+each scheduler is reported together with the critical path time of the DAG, which is the lower
+bound of any scheduler with unlimited concurrency.
+
+Usage: python -m benchmarks.scheduling [--layers 6] [--width 16] [--seed 0]
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import time
+from typing import Dict, Optional
+
+from dagium import Future, InputData
+from dagium.dag import DAG, DagExecutor
+from dagium.execution import Executor
+from dagium.operators import CallAsync, Operator
+
+
+class SleepExecutor(Executor):
+    """
+    Executor that sleeps for the duration of the task instead of invoking it
+
+    :param durations: Duration in seconds of each task with the task ID as key
+    """
+
+    def __init__(self, durations: Dict[str, float]):
+        super().__init__()
+        self._durations = durations
+
+    def execute(
+            self,
+            task: Operator,
+            input_data: Optional[Dict[str, Future]] = None,
+            *args,
+            **kwargs
+    ) -> Future:
+        time.sleep(self._durations[task.task_id])
+        return InputData(task.task_id)
+
+
+def skewed_dag(layers: int, width: int, seed: int = 0) -> tuple[DAG, Dict[str, float]]:
+    """
+    Build a layered DAG where most tasks are fast and a few of them are stragglers
+
+    Every task of a layer depends on two random tasks of the previous layer.
+
+    :param layers: Number of layers
+    :param width: Number of tasks per layer
+    :param seed: Random seed
+    :return: The DAG and the duration of each task
+    """
+    rnd = random.Random(seed)
+    dag = DAG(f'skewed-{layers}x{width}')
+    durations = {}
+    previous = []
+    for layer in range(layers):
+        current = []
+        for i in range(width):
+            task = CallAsync(f'task-{layer}-{i}', executor=None, func=None)
+            # 10% of the tasks are stragglers that take 10x longer
+            durations[task.task_id] = 0.2 if rnd.random() < 0.1 else 0.02
+            if previous:
+                task.add_parent(rnd.sample(previous, min(2, len(previous))))
+            current.append(task)
+        dag.add_tasks(current)
+        previous = current
+    return dag, durations
+
+
+def critical_path_time(dag: DAG, durations: Dict[str, float]) -> float:
+    """
+    Compute the length of the longest path of the DAG
+
+    :param dag: DAG
+    :param durations: Duration of each task with the task ID as key
+    :return: Critical path time in seconds
+    """
+    finish = {}
+
+    def finish_time(task: Operator) -> float:
+        if task.task_id not in finish:
+            start = max((finish_time(parent) for parent in task.parents), default=0.0)
+            finish[task.task_id] = start + durations[task.task_id]
+        return finish[task.task_id]
+
+    return max(finish_time(task) for task in dag.leaf_tasks)
+
+
+def run(dag: DAG, durations: Dict[str, float], event_driven: bool) -> float:
+    executor = DagExecutor(dag, executor=SleepExecutor(durations), event_driven=event_driven)
+    start = time.perf_counter()
+    executor.execute()
+    elapsed = time.perf_counter() - start
+    executor.shutdown()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--layers', type=int, default=6)
+    parser.add_argument('--width', type=int, default=16)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.WARNING)
+
+    dag, durations = skewed_dag(args.layers, args.width, args.seed)
+    cp = critical_path_time(dag, durations)
+    print(f'DAG {dag.dag_id}: {len(dag.tasks)} tasks, critical path {cp:.3f}s')
+    for name, event_driven in (('wave', False), ('event-driven', True)):
+        makespan = run(dag, durations, event_driven)
+        print(f'{name:>14}: makespan {makespan:.3f}s ({makespan / cp:.2f}x critical path)')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+"""
+Benchmark of the result serializers on large NumPy arrays and Arrow tables
+
+For every size and serializer an array of float64 values is serialized to a file, then loaded back
+either by reading the file into memory or by memory-mapping it, and finally every value is read to
+include the cost of faulting in lazily mapped pages. Every phase runs in a fresh process so the
+reported peak RSS is the peak of that phase alone.
+
+Requires numpy, and pyarrow for the Arrow serializer.
+
+Usage: python -m benchmarks.serialization [--sizes 100M 1G 10G] [--dir /tmp]
+"""
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+from dagium.serializers import CloudpickleSerializer, Pickle5Serializer, ArrowSerializer, FramesReader
+
+UNITS = {'K': 1 << 10, 'M': 1 << 20, 'G': 1 << 30}
+
+
+def parse_size(text: str) -> int:
+    unit = UNITS.get(text[-1].upper())
+    return int(float(text[:-1]) * unit) if unit else int(text)
+
+
+def make_serializer(name: str):
+    return {'cloudpickle': CloudpickleSerializer, 'pickle5': Pickle5Serializer, 'arrow': ArrowSerializer}[name]()
+
+
+def make_value(name: str, size: int):
+    array = np.random.default_rng(0).random(size // 8)
+    if name == 'arrow':
+        import pyarrow as pa
+        return pa.table({'values': array})
+    return array
+
+
+def checksum(value) -> float:
+    if isinstance(value, np.ndarray):
+        return float(value.sum())
+    return float(value.column('values').to_numpy().sum())
+
+
+def peak_rss() -> int:
+    """Return the peak resident set size of the current process in bytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def dump(name: str, size: int, path: str, results):
+    value = make_value(name, size)
+    baseline = peak_rss()
+    start = time.perf_counter()
+    with open(path, 'wb') as f:
+        reader = FramesReader(make_serializer(name).dumps(value))
+        while True:
+            chunk = reader.read(16 * 1024 * 1024)
+            if not chunk:
+                break
+            f.write(chunk)
+    results.put((time.perf_counter() - start, peak_rss() - baseline))
+
+
+def load(name: str, path: str, mmap: bool, results):
+    baseline = peak_rss()
+    serializer = make_serializer(name)
+    start = time.perf_counter()
+    if mmap:
+        value = serializer.load_file(path)
+    else:
+        with open(path, 'rb') as f:
+            value = serializer.loads(f.read())
+    loaded = time.perf_counter() - start
+    checksum(value)
+    results.put((loaded, time.perf_counter() - start, peak_rss() - baseline))
+
+
+def run_in_process(target, *args):
+    ctx = multiprocessing.get_context('spawn')
+    results = ctx.Queue()
+    process = ctx.Process(target=target, args=args + (results,))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['100M', '1G'], help='Sizes of the arrays, like 100M or 10G')
+    parser.add_argument('--dir', default=tempfile.gettempdir(), help='Directory of the serialized files')
+    args = parser.parse_args()
+
+    serializers = ['cloudpickle', 'pickle5']
+    try:
+        ArrowSerializer()
+        serializers.append('arrow')
+    except ImportError:
+        print('pyarrow is not installed, skipping the Arrow serializer')
+
+    mb = 1 << 20
+    print(f'{"size":>6} {"serializer":>11} {"dump MB/s":>10} {"dump RSS":>9} '
+          f'{"read":>5} {"load MB/s":>10} {"load+scan MB/s":>15} {"load RSS":>9}')
+    for text in args.sizes:
+        size = parse_size(text)
+        for name in serializers:
+            path = os.path.join(args.dir, f'dagium-bench-{name}-{text}')
+            try:
+                dump_time, dump_rss = run_in_process(dump, name, size, path)
+                for mmap in (False, True):
+                    load_time, scan_time, load_rss = run_in_process(load, name, path, mmap)
+                    print(f'{text:>6} {name:>11} {size / mb / dump_time:>10.0f} {dump_rss // mb:>7}MB '
+                          f'{"mmap" if mmap else "read":>5} {size / mb / load_time:>10.0f} '
+                          f'{size / mb / scan_time:>15.0f} {load_rss // mb:>7}MB')
+            finally:
+                if os.path.exists(path):
+                    os.remove(path)
+
+
+if __name__ == '__main__':
+    main()
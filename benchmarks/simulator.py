@@ -0,0 +1,135 @@
+"""
+Discrete-event simulator that reports the makespan of the different selectors on synthetic DAGs
+
+Tasks are not executed, the simulator advances a virtual clock and asks the selector which ready
+tasks to start every time a task finishes, like the event-driven DagExecutor does. Every DAG is
+simulated with a limited number of workers, which is when the selection order decides the makespan.
+
+Usage: python -m benchmarks.simulator [--workers 8] [--seed 0]
+"""
+from __future__ import annotations
+
+import argparse
+import heapq
+import random
+from typing import Callable, Dict, List, Tuple
+
+from dagium.dag import DAG
+from dagium.execution import Selector, MaxConcurrencySelector, CriticalPathSelector
+from dagium.operators import CallAsync, Operator
+
+
+def simulate(dag: DAG, durations: Dict[str, float], selector: Selector) -> float:
+    """
+    Simulate the execution of a DAG
+
+    Ready tasks are passed to the selector in the order in which they became ready.
+
+    :param dag: DAG to simulate
+    :param durations: Actual duration of each task with the task ID as key
+    :param selector: Selector that decides which ready tasks start
+    :return: Makespan of the simulated execution
+    """
+    now = 0.0
+    pending_parents = {task.task_id: len(task.parents) for task in dag.tasks}
+    waiting: Dict[Operator, None] = dict.fromkeys(sorted(dag.root_tasks, key=lambda t: t.task_id))
+    running: List[Tuple[float, int, Operator]] = []
+    seq = 0
+
+    while waiting or running:
+        for task in selector.select([task for _, _, task in running], list(waiting)):
+            del waiting[task]
+            heapq.heappush(running, (now + durations[task.task_id], seq, task))
+            seq += 1
+
+        now, _, task = heapq.heappop(running)
+        for child in sorted(task.children, key=lambda t: t.task_id):
+            pending_parents[child.task_id] -= 1
+            if pending_parents[child.task_id] == 0:
+                waiting[child] = None
+
+    return now
+
+
+def _task(dag: DAG, task_id: str, cost: float) -> Operator:
+    task = CallAsync(task_id, executor=None, func=None, metadata={'cost': cost})
+    dag.add_task(task)
+    return task
+
+
+def layered_dag(rnd: random.Random, layers: int = 8, width: int = 24) -> DAG:
+    """Random layered DAG where every task depends on up to three tasks of the previous layer."""
+    dag = DAG('layered')
+    previous = []
+    for layer in range(layers):
+        current = [_task(dag, f'l{layer}-{i}', rnd.paretovariate(1.5)) for i in range(width)]
+        if previous:
+            for task in current:
+                task.add_parent(rnd.sample(previous, rnd.randint(1, 3)))
+        previous = current
+    return dag
+
+
+def long_chain_dag(rnd: random.Random, chain: int = 20, independent: int = 200) -> DAG:
+    """A long chain of tasks next to many short independent tasks that are ready first."""
+    dag = DAG('long-chain')
+    for i in range(independent):
+        _task(dag, f'a-short-{i}', rnd.uniform(0.5, 1.5))
+    previous = None
+    for i in range(chain):
+        task = _task(dag, f'z-chain-{i}', rnd.uniform(1.0, 2.0))
+        if previous:
+            task.add_parent(previous)
+        previous = task
+    return dag
+
+
+def fork_join_dag(rnd: random.Random, stages: int = 6, fan_out: int = 32) -> DAG:
+    """Consecutive fork-join stages with skewed branch costs."""
+    dag = DAG('fork-join')
+    join = _task(dag, 'start', 1.0)
+    for stage in range(stages):
+        branches = [_task(dag, f's{stage}-{i}', rnd.lognormvariate(0, 1)) for i in range(fan_out)]
+        join >> branches
+        join = _task(dag, f'join-{stage}', 1.0)
+        branches >> join
+    return dag
+
+
+def lower_bound(dag: DAG, durations: Dict[str, float], workers: int) -> float:
+    """Return the maximum of the critical path and the total work divided by the workers."""
+    selector = CriticalPathSelector(durations=durations)
+    critical_path = max(selector.rank(task) for task in dag.root_tasks)
+    return max(critical_path, sum(durations.values()) / workers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--noise', type=float, default=0.3, help='Relative error of the static cost hints')
+    args = parser.parse_args()
+
+    generators: List[Callable[[random.Random], DAG]] = [layered_dag, long_chain_dag, fork_join_dag]
+
+    print(f'{"dag":>12} {"tasks":>6} {"bound":>9} {"fifo":>9} {"cp-hints":>9} {"cp-measured":>12}')
+    for generator in generators:
+        rnd = random.Random(args.seed)
+        dag = generator(rnd)
+        # Actual durations deviate from the static cost hints
+        durations = {
+            task.task_id: task.metadata['cost'] * rnd.uniform(1 - args.noise, 1 + args.noise)
+            for task in sorted(dag.tasks, key=lambda t: t.task_id)
+        }
+        results = [
+            simulate(dag, durations, MaxConcurrencySelector(args.workers)),
+            simulate(dag, durations, CriticalPathSelector(args.workers)),
+            simulate(dag, durations, CriticalPathSelector(args.workers, durations=durations)),
+        ]
+        bound = lower_bound(dag, durations, args.workers)
+        print(f'{dag.dag_id:>12} {len(dag.tasks):>6} {bound:>9.2f} '
+              f'{results[0]:>9.2f} {results[1]:>9.2f} {results[2]:>12.2f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark of the driver memory used per task by CallAsync operators and by the tasks of a TaskTable
+
+For every size a layered DAG is built where every task depends on two tasks of the previous layer, once with
+CallAsync operators and once with a TaskTable. The memory allocated to build the tasks and their relations, and
+then to add them to a DAG, is measured with tracemalloc and reported per task.
+
+Usage: python -m benchmarks.task_memory [--sizes 10000 100000 1000000] [--width 1000]
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import random
+import tracemalloc
+
+from dagium.dag import DAG, TaskTable
+from dagium.operators import CallAsync
+
+
+def noop(input_data, *args, **kwargs):
+    return None
+
+
+def build_operators(size: int, width: int, rnd: random.Random) -> list:
+    tasks = [CallAsync(f'task-{i}', None, noop) for i in range(size)]
+    for i in range(width, size):
+        layer_start = (i // width - 1) * width
+        tasks[i].add_parent([tasks[layer_start + rnd.randrange(width)] for _ in range(2)])
+    return tasks
+
+
+def build_table(size: int, width: int, rnd: random.Random) -> list:
+    table = TaskTable(None)
+    tasks = [table.add(f'task-{i}', noop) for i in range(size)]
+    for i in range(width, size):
+        layer_start = (i // width - 1) * width
+        tasks[i].add_parent([tasks[layer_start + rnd.randrange(width)] for _ in range(2)])
+    # Build the adjacency arrays, like the first access of the DagExecutor does
+    table.children(0)
+    return tasks
+
+
+def measure(build, size: int, width: int, seed: int) -> tuple[float, float]:
+    """
+    Return the bytes allocated per task to build the tasks and to add them to a DAG
+    """
+    gc.collect()
+    tracemalloc.start()
+    tasks = build(size, width, random.Random(seed))
+    built = tracemalloc.get_traced_memory()[0]
+    dag = DAG('memory')
+    dag.add_tasks(tasks)
+    dag.root_tasks
+    total = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built / size, total / size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--width', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f'{"tasks":>9} {"CallAsync":>10} {"TaskTable":>10} {"ratio":>6} '
+          f'{"CallAsync+DAG":>14} {"TaskTable+DAG":>14} {"ratio":>6}')
+    for size in args.sizes:
+        operators, operators_dag = measure(build_operators, size, args.width, args.seed)
+        table, table_dag = measure(build_table, size, args.width, args.seed)
+        print(f'{size:>9} {operators:>8.0f}B {table:>8.0f}B {operators / table:>5.1f}x '
+              f'{operators_dag:>12.0f}B {table_dag:>12.0f}B {operators_dag / table_dag:>5.1f}x')
+
+
+if __name__ == '__main__':
+    main()
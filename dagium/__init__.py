@@ -1,2 +1,9 @@
-from dagium.future import Future, LithopsFuture, InputData
-from dagium.config import MAX_CONCURRENCY
+from dagium.serializers import Serializer, CloudpickleSerializer, Pickle5Serializer, ArrowSerializer, \
+    CompressedSerializer, Codec, ZlibCodec, ZstdCodec, Lz4Codec, available_codecs
+from dagium.future import Future, LithopsFuture, InputData, ObjectRef, ObjectRefList, ElementFuture, \
+    ChunkedFuturesList, StreamingFuturesList
+from dagium.config import MAX_CONCURRENCY, ASYNC_MAX_CONCURRENCY, POLL_INTERVAL, MAP_WINDOW, RESULT_CACHE_BYTES, \
+    COMPRESSION_THRESHOLD, COMPRESSION_BANDWIDTH, BATCH_LINGER
+from dagium.resultcache import ResultCache, get_result_cache, set_result_cache
+from dagium.dataplane import ResultStore
+from dagium.tracing import Tracer
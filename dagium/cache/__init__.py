@@ -0,0 +1,2 @@
+from dagium.cache.backends import CacheBackend, MemoryCache, DiskCache, StorageCache
+from dagium.cache.keys import task_key, function_digest
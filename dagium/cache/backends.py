@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from lithops import Storage
+from lithops.storage.utils import StorageNoSuchKeyError
+
+
+class CacheBackend(ABC):
+    """
+    Abstract base class for result cache backends
+
+    Backends store the serialized results of tasks by key and count the hits and misses of the lookups.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+
+    @property
+    def hits(self) -> int:
+        """Return the number of lookups that found a result."""
+        return self._hits
+
+    @property
+    def misses(self) -> int:
+        """Return the number of lookups that did not find a result."""
+        return self._misses
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return the hit and miss counters."""
+        return {'hits': self._hits, 'misses': self._misses}
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a result
+
+        :param key: Key of the result
+        :return: Serialized result, or None if the key is not in the cache
+        """
+        data = self._get(key)
+        with self._lock:
+            if data is None:
+                self._misses += 1
+            else:
+                self._hits += 1
+        return data
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[bytes]:
+        pass
+
+    @abstractmethod
+    def put(self, key: str, data: bytes):
+        """
+        Store a result
+
+        :param key: Key of the result
+        :param data: Serialized result
+        """
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-memory cache that evicts the least recently used results when it exceeds its size
+
+    :param max_bytes: Maximum total size of the stored results in bytes
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 ** 2):
+        super().__init__()
+        self._max_bytes = max_bytes
+        self._size = 0
+        self._data: OrderedDict[str, bytes] = OrderedDict()
+
+    @property
+    def size(self) -> int:
+        """Return the total size of the stored results in bytes."""
+        return self._size
+
+    def _get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._data.get(key)
+            if data is not None:
+                self._data.move_to_end(key)
+            return data
+
+    def put(self, key: str, data: bytes):
+        if len(data) > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._data:
+                self._size -= len(self._data.pop(key))
+            self._data[key] = data
+            self._size += len(data)
+            while self._size > self._max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+
+
+class DiskCache(CacheBackend):
+    """
+    Cache that stores every result in a file of a local directory
+
+    :param path: Directory where the results are stored
+    """
+
+    def __init__(self, path: str):
+        super().__init__()
+        self._path = path
+        os.makedirs(path, exist_ok=True)
+
+    def _get(self, key: str) -> Optional[bytes]:
+        try:
+            with open(os.path.join(self._path, key), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        # Write to a temporary file first so concurrent readers never see a partial result
+        path = os.path.join(self._path, key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+
+class StorageCache(CacheBackend):
+    """
+    Cache that stores every result as an object of a Lithops Storage
+
+    :param storage: Lithops storage
+    :param bucket: Bucket where the results are stored, defaults to the storage bucket
+    :param prefix: Prefix of the keys of the stored results
+    """
+
+    def __init__(self, storage: Storage, bucket: Optional[str] = None, prefix: str = 'dagium/cache'):
+        super().__init__()
+        self._storage = storage
+        self._bucket = bucket or storage.bucket
+        self._prefix = prefix
+
+    def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return self._storage.get_object(self._bucket, f'{self._prefix}/{key}')
+        except StorageNoSuchKeyError:
+            return None
+
+    def put(self, key: str, data: bytes):
+        self._storage.put_object(self._bucket, f'{self._prefix}/{key}', data)
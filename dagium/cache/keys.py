@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import hashlib
+import os
+import sys
+import sysconfig
+import types
+from typing import Any, Callable, Dict, Optional, Set
+
+import cloudpickle
+
+from dagium.future import Future, InputData
+from dagium.operators.operator import Operator
+
+# Directories of the standard library and of the installed packages, their code is identified only by its name
+_LIBRARY_PATHS = tuple({
+    os.path.realpath(path) + os.sep
+    for name, path in sysconfig.get_paths().items() if name in ('stdlib', 'platstdlib', 'purelib', 'platlib')
+})
+_CONSTANT_TYPES = (int, float, complex, str, bytes, bool, type(None))
+
+
+def function_digest(func: Callable) -> str:
+    """
+    Compute a digest of a function that changes whenever its code changes
+
+    The digest covers the bytecode, constants and names of the function and of every nested code object,
+    plus its default arguments and the values captured in its closure. The functions, classes and constants of
+    user code that the function references as globals, directly or as attributes of a module, are covered
+    recursively, so editing a helper called by the function changes the digest too. Code of the standard library
+    and of installed packages is only identified by its name.
+
+    :param func: Function
+    :return: Hexadecimal digest
+    """
+    return _digest(func, set())
+
+
+def _digest(func: Callable, seen: Set[int]) -> str:
+    h = hashlib.sha256()
+    code = getattr(func, '__code__', None)
+    if code is None:
+        # Callable objects and builtins are hashed by their pickled representation
+        h.update(cloudpickle.dumps(func))
+        return h.hexdigest()
+
+    seen.add(id(func))
+    _update_code(h, code)
+    h.update(cloudpickle.dumps(func.__defaults__))
+    h.update(cloudpickle.dumps(func.__kwdefaults__))
+    if func.__closure__:
+        for cell in func.__closure__:
+            value = cell.cell_contents
+            if isinstance(value, types.FunctionType):
+                _update_reference(h, value, seen)
+            else:
+                h.update(cloudpickle.dumps(value))
+    _update_globals(h, func, code, seen)
+    return h.hexdigest()
+
+
+def _update_code(h, code: types.CodeType):
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            _update_code(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+def _names(code: types.CodeType) -> Set[str]:
+    """Return the global and attribute names used by a code object and its nested code objects."""
+    names = set(code.co_names)
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType):
+            names |= _names(const)
+    return names
+
+
+def _update_globals(h, func: types.FunctionType, code: types.CodeType, seen: Set[int]):
+    """Hash the globals referenced by a function, and the members of the referenced modules it uses."""
+    names = _names(code)
+    namespace = getattr(func, '__globals__', {})
+    for name in sorted(names):
+        if name not in namespace:
+            continue
+        value = namespace[name]
+        h.update(name.encode())
+        if isinstance(value, types.ModuleType):
+            # Helpers called as module attributes, like helpers.parse(...)
+            for attr in sorted(names):
+                member = vars(value).get(attr)
+                if isinstance(member, (types.FunctionType, type)):
+                    h.update(attr.encode())
+                    _update_reference(h, member, seen)
+        else:
+            _update_reference(h, value, seen)
+
+
+def _update_reference(h, value: Any, seen: Set[int]):
+    """Hash a function, class or constant referenced by a function."""
+    if isinstance(value, (types.FunctionType, type)):
+        if id(value) in seen or _is_library(value):
+            h.update(f'{value.__module__}.{value.__qualname__}'.encode())
+        elif isinstance(value, types.FunctionType):
+            h.update(_digest(value, seen).encode())
+        else:
+            seen.add(id(value))
+            for attr, member in sorted(vars(value).items()):
+                if isinstance(member, (staticmethod, classmethod)):
+                    member = member.__func__
+                if isinstance(member, types.FunctionType):
+                    h.update(attr.encode())
+                    _update_reference(h, member, seen)
+    elif isinstance(value, _CONSTANT_TYPES) or (
+            isinstance(value, tuple) and all(isinstance(v, _CONSTANT_TYPES) for v in value)
+    ):
+        h.update(repr(value).encode())
+
+
+def _is_library(obj: Any) -> bool:
+    """Return whether a function or class belongs to the standard library or to an installed package."""
+    module_name = getattr(obj, '__module__', None)
+    if module_name == '__main__':
+        return False
+    path = getattr(sys.modules.get(module_name), '__file__', None)
+    if path is None:
+        # Builtin and frozen modules
+        return True
+    return os.path.realpath(path).startswith(_LIBRARY_PATHS)
+
+
+def task_key(task: Operator, parent_keys: Optional[Dict[str, str]] = None) -> Optional[str]:
+    """
+    Compute the content address of the result of a task
+
+    The key covers the operator type, the digests of its functions, its args and kwargs, the ``cache_version``
+    entry of its metadata, the keys of the results of its parents and its own input data, which must be InputData
+    values. Only root tasks and tasks that run with their own input data, like the chunk tasks of Expand, have
+    input data besides the results of their parents. Changing ``cache_version`` invalidates the results of a task when something
+    the digests do not cover changes, like an installed package or data read by the functions.
+
+    :param task: Task
+    :param parent_keys: Keys of the results of the parents of the task with the parent task ID as key
+    :return: Hexadecimal key, or None if the result of the task can not be addressed by its content
+    """
+    h = hashlib.sha256()
+    h.update(type(task).__name__.encode())
+    for func in task.functions:
+        h.update(function_digest(func).encode())
+    try:
+        h.update(cloudpickle.dumps(task.args))
+        h.update(cloudpickle.dumps(sorted(task.kwargs.items())))
+    except Exception:
+        return None
+    if 'cache_version' in task.metadata:
+        h.update(repr(task.metadata['cache_version']).encode())
+
+    if task.parents:
+        parent_keys = parent_keys or {}
+        for parent in sorted(task.parents, key=lambda p: p.task_id):
+            key = parent_keys.get(parent.task_id)
+            if key is None:
+                return None
+            h.update(parent.task_id.encode())
+            h.update(key.encode())
+
+    for name, data in sorted(task.input_data.items()):
+        value = _input_value(data)
+        if value is None:
+            return None
+        h.update(name.encode())
+        h.update(value)
+
+    return h.hexdigest()
+
+
+def _input_value(data: Any) -> Optional[bytes]:
+    """Return the pickled value of the input data of a task, or None if it is not known in advance."""
+    if isinstance(data, InputData):
+        data = data.result()
+    elif isinstance(data, Future):
+        return None
+    try:
+        return cloudpickle.dumps(data)
+    except Exception:
+        return None
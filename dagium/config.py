@@ -1 +1,8 @@
 MAX_CONCURRENCY = 64
+ASYNC_MAX_CONCURRENCY = 4096
+POLL_INTERVAL = 0.5
+MAP_WINDOW = 32
+RESULT_CACHE_BYTES = 1 << 30
+COMPRESSION_THRESHOLD = 1 << 16
+COMPRESSION_BANDWIDTH = 100 * (1 << 20)
+BATCH_LINGER = 0.01
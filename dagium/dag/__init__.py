@@ -1,2 +1,7 @@
-from dagium.dag.dag import DAG
+from dagium.dag.dag import DAG, CompiledDAG
+from dagium.dag.checkpoint import CheckpointLog, FileCheckpointLog, SQLiteCheckpointLog
 from dagium.dag.dagexecutor import DagExecutor
+from dagium.dag.asyncdagexecutor import AsyncDagExecutor
+from dagium.dag.service import DagService, DagHandle
+from dagium.dag.optimizations import find_chains, fuse_chains, find_pipelines, pipeline_maps
+from dagium.dag.table import TaskTable, TaskHandle
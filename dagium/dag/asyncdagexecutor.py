@@ -0,0 +1,122 @@
+import asyncio
+import logging
+from typing import Dict, Optional
+
+from dagium import Future, ASYNC_MAX_CONCURRENCY, ResultStore
+from dagium.dag.checkpoint import CheckpointLog
+from dagium.dag.dag import DAG
+from dagium.dag.dagexecutor import DagExecutor
+from dagium.execution.executors import AsyncExecutor, AsyncCallableExecutor
+from dagium.execution.processors import AsyncProcessor
+from dagium.execution.selectors import Selector, MaxConcurrencySelector
+from dagium.operators import Operator
+from dagium.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncDagExecutor(DagExecutor):
+    """
+    Executor class that executes the DAG on an asyncio event loop
+
+    Tasks are submitted as soon as all their parents have finished and their Lithops futures are polled
+    without blocking any thread, so a single event loop can keep thousands of invocations in flight.
+
+    :param dag: DAG to execute
+    :param max_concurrency: Maximum number of tasks to execute in parallel, defaults to ASYNC_MAX_CONCURRENCY
+    :param processor: Processor to use for executing tasks, defaults to AsyncProcessor
+    :param executor: Executor to use for executing tasks, defaults to AsyncCallableExecutor
+    :param selector: Selector to use for selecting the tasks to execute, defaults to MaxConcurrencySelector
+    :param result_store: Store where the tasks keep their results, if given the tasks receive references
+        to the results of their parents and fetch them inside the worker instead of through the driver
+    :param checkpoint: Log where the terminal state and result pointer of every task are recorded, requires
+        a result store so the log records references to the stored results instead of the results themselves
+    :param tracer: Tracer that records the execution timeline of the tasks
+    :param fuse: Whether to execute the linear chains of CallAsync tasks as a single invocation
+    :param incremental: Whether to reuse the results of the previous execution for the tasks whose fingerprint
+        has not changed
+    :raises ValueError: If a checkpoint log is given without a result store
+    """
+
+    def __init__(
+            self,
+            dag: DAG,
+            max_concurrency=ASYNC_MAX_CONCURRENCY,
+            processor: AsyncProcessor = None,
+            executor: AsyncExecutor = None,
+            selector: Selector = None,
+            result_store: Optional[ResultStore] = None,
+            checkpoint: Optional[CheckpointLog] = None,
+            tracer: Optional[Tracer] = None,
+            fuse: bool = False,
+            incremental: bool = False,
+    ):
+        super().__init__(
+            dag,
+            max_concurrency=max_concurrency,
+            processor=processor or AsyncProcessor(max_concurrency),
+            executor=executor or AsyncCallableExecutor(),
+            selector=selector or MaxConcurrencySelector(max_concurrency),
+            event_driven=True,
+            result_store=result_store,
+            checkpoint=checkpoint,
+            tracer=tracer,
+            fuse=fuse,
+            incremental=incremental,
+        )
+
+    async def execute(self, resume: bool = False) -> Dict[str, Future]:
+        """
+        Execute the DAG
+
+        :param resume: Whether to skip the tasks that already succeeded according to the checkpoint log
+        :return: A dictionary with the output data of the DAG tasks with the task ID as key
+        """
+        self._start(resume)
+
+        done_queue = asyncio.Queue()
+
+        def on_future_done(task: Operator, future: Future):
+            done_queue.put_nowait((task, future, None))
+
+        def on_error(task: Operator, ex_future: asyncio.Task):
+            if not ex_future.cancelled() and ex_future.exception() is not None:
+                done_queue.put_nowait((task, None, ex_future.exception()))
+
+        pending = set()
+        try:
+            while self._dependence_free_tasks or self._running_tasks:
+                batch = self._selector.select(list(self._running_tasks), list(self._dependence_free_tasks))
+                for task in batch:
+                    op = self._fused.get(task, task)
+                    input_data = self._schedule(op)
+                    self._running_tasks.add(task)
+                    self._dependence_free_tasks.discard(task)
+                    ex_future = self._processor.submit(op, self._executor, input_data, on_future_done)
+                    ex_future.add_done_callback(lambda f, t=op: on_error(t, f))
+                    pending.add(ex_future)
+                    ex_future.add_done_callback(pending.discard)
+
+                if not self._running_tasks:
+                    await asyncio.sleep(self._selection_delay())
+                    continue
+
+                # Wait for a finished task, or until the selector may select held back tasks
+                delay = self._selector.delay() if self._dependence_free_tasks else None
+                try:
+                    completed = [await asyncio.wait_for(done_queue.get(), delay)]
+                except asyncio.TimeoutError:
+                    continue
+                while not done_queue.empty():
+                    completed.append(done_queue.get_nowait())
+
+                for task, future, exception in completed:
+                    if exception is not None:
+                        raise exception
+                    self._complete(task, future)
+        finally:
+            for ex_future in pending:
+                ex_future.cancel()
+
+        await asyncio.get_running_loop().run_in_executor(None, self._finish)
+        return self._futures
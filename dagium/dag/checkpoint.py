@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import base64
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from contextlib import closing
+from typing import Dict, List, Optional, Tuple
+
+import cloudpickle
+
+from dagium.future import Future, InputData, ObjectRef, ObjectRefList
+from dagium.operators import Operator, TaskState
+
+logger = logging.getLogger(__name__)
+
+# Entry of the log: task ID, terminal state and pickled pointer to the result
+Entry = Tuple[str, str, Optional[bytes]]
+
+
+class CheckpointLog(ABC):
+    """
+    Abstract base class for checkpoint logs
+
+    A checkpoint log records the terminal state of every task and a pointer to its result as the tasks complete,
+    so an interrupted execution can be resumed. Records are queued and written in batches by a background
+    thread, so recording a task never blocks the scheduler.
+
+    The pointer is the reference to the result the task kept in the ResultStore of the execution, so recording a
+    task never downloads its result to the driver. Only results a task did not store, like the empty result of a
+    map without calls, are recorded inline.
+
+    :param batch_size: Maximum number of records written at once
+    :param flush_interval: Maximum number of seconds a record waits in the queue before it is written
+    """
+
+    def __init__(self, batch_size: int = 256, flush_interval: float = 1.0):
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    def record(self, task: Operator, future: Optional[Future]):
+        """
+        Queue the terminal state of a task to be written to the log
+
+        :param task: Finished task
+        :param future: Future of the task
+        """
+        with self._lock:
+            if self._writer is None or not self._writer.is_alive():
+                self._writer = threading.Thread(target=self._write_loop, name='dagium-checkpoint', daemon=True)
+                self._writer.start()
+        self._queue.put((task.task_id, task.state, future))
+
+    def flush(self):
+        """
+        Block until every queued record has been written
+        """
+        if self._writer is None or not self._writer.is_alive():
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def close(self):
+        """
+        Write the queued records and stop the background writer
+        """
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join()
+
+    def load(self) -> Dict[str, Tuple[TaskState, Optional[Future]]]:
+        """
+        Load the last recorded state of every task
+
+        :return: Dictionary with the task ID as key and the state and restored future of the task as value
+        """
+        restored = {}
+        for task_id, state, payload in self._read():
+            future = cloudpickle.loads(payload) if payload is not None else None
+            restored[task_id] = (TaskState[state], future)
+        return restored
+
+    def _write_loop(self):
+        stop = False
+        while not stop:
+            batch: List[Entry] = []
+            waiters: List[threading.Event] = []
+            try:
+                try:
+                    item = self._queue.get(timeout=self._flush_interval)
+                    while True:
+                        if item is None:
+                            stop = True
+                        elif isinstance(item, threading.Event):
+                            waiters.append(item)
+                        else:
+                            try:
+                                batch.append(self._entry(*item))
+                            except Exception as e:
+                                # The task is executed again on resume
+                                logger.error(f'Failed to build the checkpoint record of task {item[0]}: {e}')
+                        if stop or len(batch) >= self._batch_size:
+                            break
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    pass
+
+                if batch:
+                    try:
+                        self._write(batch)
+                    except Exception as e:
+                        logger.error(f'Failed to write {len(batch)} checkpoint records: {e}')
+            finally:
+                # Never leave a flush waiting, even if the writer stops
+                for waiter in waiters:
+                    waiter.set()
+
+    @staticmethod
+    def _entry(task_id: str, state: TaskState, future: Optional[Future]) -> Entry:
+        """Build the log entry of a task, resolving the pointer to its result."""
+        if state != TaskState.SUCCESS or future is None:
+            return task_id, state.name, None
+        ref = future.reference()
+        if not isinstance(ref, (ObjectRef, ObjectRefList, InputData)):
+            # The task did not store its result, which is then small enough to be recorded inline
+            ref = InputData(future.result())
+        return task_id, state.name, cloudpickle.dumps(ref)
+
+    @abstractmethod
+    def _write(self, entries: List[Entry]):
+        """Persist a batch of entries."""
+        pass
+
+    @abstractmethod
+    def _read(self) -> List[Entry]:
+        """Read every persisted entry in the order in which it was written."""
+        pass
+
+
+class FileCheckpointLog(CheckpointLog):
+    """
+    Checkpoint log stored as an append-only file with one JSON record per line
+
+    :param path: Path of the log file
+    :param batch_size: Maximum number of records written at once
+    :param flush_interval: Maximum number of seconds a record waits in the queue before it is written
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0):
+        super().__init__(batch_size, flush_interval)
+        self._path = path
+
+    def _write(self, entries: List[Entry]):
+        lines = [
+            json.dumps({
+                'task_id': task_id,
+                'state': state,
+                'payload': base64.b64encode(payload).decode() if payload is not None else None,
+            })
+            for task_id, state, payload in entries
+        ]
+        with open(self._path, 'a') as f:
+            f.write('\n'.join(lines) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _read(self) -> List[Entry]:
+        if not os.path.exists(self._path):
+            return []
+        entries = []
+        with open(self._path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # The driver crashed while writing the last line
+                    continue
+                payload = base64.b64decode(record['payload']) if record['payload'] is not None else None
+                entries.append((record['task_id'], record['state'], payload))
+        return entries
+
+
+class SQLiteCheckpointLog(CheckpointLog):
+    """
+    Checkpoint log stored in a SQLite database
+
+    :param path: Path of the database file
+    :param batch_size: Maximum number of records written at once
+    :param flush_interval: Maximum number of seconds a record waits in the queue before it is written
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0):
+        super().__init__(batch_size, flush_interval)
+        self._path = path
+        with closing(sqlite3.connect(self._path)) as conn, conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS checkpoints '
+                '(task_id TEXT PRIMARY KEY, state TEXT NOT NULL, payload BLOB)'
+            )
+
+    def _write(self, entries: List[Entry]):
+        # SQLite connections can not be shared between threads
+        with closing(sqlite3.connect(self._path)) as conn, conn:
+            conn.executemany('INSERT OR REPLACE INTO checkpoints VALUES (?, ?, ?)', entries)
+
+    def _read(self) -> List[Entry]:
+        with closing(sqlite3.connect(self._path)) as conn:
+            return conn.execute('SELECT task_id, state, payload FROM checkpoints').fetchall()
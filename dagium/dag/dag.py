@@ -1,3 +1,8 @@
+from __future__ import annotations
+
+from array import array
+from typing import Dict, List, Optional
+
 from dagium.operators import Operator
 
 
@@ -5,12 +10,21 @@ class DAG:
     """
     Class to represent a DAG
 
+    Tasks are indexed by ID and the sets of root and leaf tasks are kept up to date from the in-degree and
+    out-degree of the tasks whose relations change, so building and inspecting large DAGs is linear in their
+    size, even when relations are changed and read alternately.
+
     :param dag_id: DAG ID
     """
 
     def __init__(self, dag_id):
         self._dag_id = dag_id
         self._tasks = set()
+        self._index: Dict[str, Operator] = dict()
+        self._topology_version = 0
+        self._root_tasks: set[Operator] = set()
+        self._leaf_tasks: set[Operator] = set()
+        self._expansions: Dict[Operator, List[Operator]] = dict()
 
     @property
     def dag_id(self):
@@ -22,6 +36,11 @@ class DAG:
         """Return all tasks in the DAG"""
         return self._tasks
 
+    @property
+    def topology_version(self) -> int:
+        """Return a counter that changes every time the tasks of the DAG or their relations change"""
+        return self._topology_version
+
     @property
     def root_tasks(self) -> set[Operator]:
         """
@@ -29,7 +48,7 @@ class DAG:
 
         A root task is a task that has no parents.
         """
-        return {task for task in self.tasks if not task.parents}
+        return self._root_tasks
 
     @property
     def leaf_tasks(self) -> set[Operator]:
@@ -38,7 +57,48 @@ class DAG:
 
         A leaf task is a task that has no children.
         """
-        return {task for task in self.tasks if not task.children}
+        return self._leaf_tasks
+
+    def get_task(self, task_id: str) -> Optional[Operator]:
+        """
+        Return the task with the given ID
+
+        :param task_id: Task ID
+        :return: The task, or None if there is no task with that ID in the DAG
+        """
+        return self._index.get(task_id)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def _relations_changed(self, task: Operator):
+        """
+        Advance the topology version and update the root and leaf tasks after the relations of a task changed
+
+        :param task: Task whose parents or children changed, which may belong to another DAG
+        """
+        self._topology_version += 1
+        if task not in self._tasks:
+            return
+        self._classify(task)
+
+    def _classify(self, task: Operator):
+        """
+        Add a task to the root and leaf tasks or remove it from them according to its degrees
+
+        :param task: Task of this DAG
+        """
+        if task.in_degree == 0:
+            self._root_tasks.add(task)
+        else:
+            self._root_tasks.discard(task)
+        if task.out_degree == 0:
+            self._leaf_tasks.add(task)
+        else:
+            self._leaf_tasks.discard(task)
 
     def add_task(self, task: Operator):
         """
@@ -47,10 +107,14 @@ class DAG:
         :param task: Task to add
         :raises ValueError: if the task is already in the DAG
         """
-        if task.task_id in {t.task_id for t in self.tasks}:
+        if task.task_id in self._index:
             raise ValueError(f"Task with id {task.task_id} already exists in DAG {self._dag_id}")
 
         self._tasks.add(task)
+        self._index[task.task_id] = task
+        task._add_dag(self)
+        self._topology_version += 1
+        self._classify(task)
 
     def add_tasks(self, tasks: list[Operator]):
         """
@@ -61,3 +125,188 @@ class DAG:
         """
         for task in tasks:
             self.add_task(task)
+
+    def remove_task(self, task: Operator):
+        """
+        Remove a task and its relations from this DAG
+
+        :param task: Task to remove
+        :raises ValueError: if the task is not in the DAG
+        """
+        if self._index.get(task.task_id) is not task:
+            raise ValueError(f"Task with id {task.task_id} does not exist in DAG {self._dag_id}")
+
+        task.remove_parent(list(task.parents))
+        task.remove_child(list(task.children))
+        self._tasks.discard(task)
+        self._root_tasks.discard(task)
+        self._leaf_tasks.discard(task)
+        del self._index[task.task_id]
+        task._remove_dag(self)
+        self._topology_version += 1
+
+    def insert_tasks(self, task: Operator, tasks: List[Operator]):
+        """
+        Insert tasks between a task and its children
+
+        The inserted tasks become the only children of the task and the parents of all its former children.
+        The insertion is undone by collapse.
+
+        :param task: Task
+        :param tasks: Tasks to insert
+        :raises ValueError: if any of the tasks is already in the DAG
+        """
+        children = list(task.children)
+        task.remove_child(children)
+        for new_task in tasks:
+            self.add_task(new_task)
+            task >> new_task
+            new_task >> children
+        self._expansions.setdefault(task, []).extend(tasks)
+
+    def collapse(self):
+        """
+        Remove every task inserted by insert_tasks and restore the relations they replaced
+        """
+        for task, inserted in reversed(list(self._expansions.items())):
+            children = {child for new_task in inserted for child in new_task.children}
+            for new_task in inserted:
+                self.remove_task(new_task)
+            task.add_child(list(children))
+        self._expansions = dict()
+
+    def compile(self) -> CompiledDAG:
+        """
+        Return a frozen form of this DAG with integer node IDs and array adjacency lists
+
+        :return: The compiled DAG
+        :raises ValueError: if a task is related to a task that is not in the DAG or if the DAG has a cycle
+        """
+        return CompiledDAG(self)
+
+
+class CompiledDAG:
+    """
+    Frozen form of a DAG
+
+    Nodes are numbered in topological order and the children and parents of every node are stored as
+    compressed adjacency arrays: the children of node ``i`` are ``child_ids[child_offsets[i]:child_offsets[i + 1]]``.
+    Later changes to the relations of the operators are not reflected.
+
+    :param dag: DAG to compile
+    :raises ValueError: if a task is related to a task that is not in the DAG or if the DAG has a cycle
+    """
+
+    def __init__(self, dag: DAG):
+        self._dag_id = dag.dag_id
+
+        # Kahn's algorithm, ties are broken by task ID so the numbering is deterministic
+        in_degree = {task: len(task.parents) for task in dag.tasks}
+        ready = sorted((task for task, degree in in_degree.items() if degree == 0), key=lambda t: t.task_id)
+        order: List[Operator] = []
+        while ready:
+            task = ready.pop()
+            order.append(task)
+            released = []
+            for child in task.children:
+                if child not in in_degree:
+                    raise ValueError(f"Task {child.task_id} is a child of {task.task_id} but not in DAG {dag.dag_id}")
+                in_degree[child] -= 1
+                if in_degree[child] == 0:
+                    released.append(child)
+            ready.extend(sorted(released, key=lambda t: t.task_id, reverse=True))
+
+        if len(order) != len(in_degree):
+            raise ValueError(f"DAG {dag.dag_id} has a cycle")
+
+        node_ids = {task: i for i, task in enumerate(order)}
+        self._tasks = order
+        self._index = {task.task_id: i for i, task in enumerate(order)}
+        self._in_degree = array('q', (len(task.parents) for task in order))
+        self._child_offsets, self._child_ids = self._adjacency(order, node_ids, lambda task: task.children)
+        self._parent_offsets, self._parent_ids = self._adjacency(order, node_ids, lambda task: task.parents)
+
+    @staticmethod
+    def _adjacency(order, node_ids, neighbours) -> tuple[array, array]:
+        offsets = array('q', [0])
+        ids = array('q')
+        for task in order:
+            ids.extend(sorted(node_ids[n] for n in neighbours(task)))
+            offsets.append(len(ids))
+        return offsets, ids
+
+    @property
+    def dag_id(self):
+        """Return the DAG ID"""
+        return self._dag_id
+
+    @property
+    def tasks(self) -> List[Operator]:
+        """Return the tasks in topological order, the position of a task is its node ID"""
+        return self._tasks
+
+    @property
+    def in_degree(self) -> array:
+        """Return the number of parents of every node"""
+        return self._in_degree
+
+    @property
+    def child_offsets(self) -> array:
+        """Return the offsets of the children of every node in child_ids"""
+        return self._child_offsets
+
+    @property
+    def child_ids(self) -> array:
+        """Return the node IDs of the children of all nodes"""
+        return self._child_ids
+
+    @property
+    def parent_offsets(self) -> array:
+        """Return the offsets of the parents of every node in parent_ids"""
+        return self._parent_offsets
+
+    @property
+    def parent_ids(self) -> array:
+        """Return the node IDs of the parents of all nodes"""
+        return self._parent_ids
+
+    @property
+    def root_ids(self) -> List[int]:
+        """Return the node IDs of the root tasks"""
+        return [i for i, degree in enumerate(self._in_degree) if degree == 0]
+
+    @property
+    def leaf_ids(self) -> List[int]:
+        """Return the node IDs of the leaf tasks"""
+        offsets = self._child_offsets
+        return [i for i in range(len(self._tasks)) if offsets[i] == offsets[i + 1]]
+
+    def node_id(self, task_id: str) -> int:
+        """
+        Return the node ID of a task
+
+        :param task_id: Task ID
+        :return: Node ID
+        """
+        return self._index[task_id]
+
+    def children(self, node_id: int) -> array:
+        """
+        Return the node IDs of the children of a node
+
+        :param node_id: Node ID
+        :return: Node IDs of the children
+        """
+        return self._child_ids[self._child_offsets[node_id]:self._child_offsets[node_id + 1]]
+
+    def parents(self, node_id: int) -> array:
+        """
+        Return the node IDs of the parents of a node
+
+        :param node_id: Node ID
+        :return: Node IDs of the parents
+        """
+        return self._parent_ids[self._parent_offsets[node_id]:self._parent_offsets[node_id + 1]]
+
+    def __len__(self) -> int:
+        return len(self._tasks)
@@ -1,13 +1,19 @@
 import logging
-from typing import Dict, Set, List
+import queue
+import time
+from typing import Dict, Set, List, Optional
 
-from dagium import Future, MAX_CONCURRENCY
-from dagium.dag import DAG
+from dagium import Future, MAX_CONCURRENCY, ResultStore
+from dagium.cache import task_key
+from dagium.dag.checkpoint import CheckpointLog
+from dagium.dag.dag import DAG
+from dagium.dag.optimizations import fuse_chains, pipeline_maps
 from dagium.execution.processors import Processor, ThreadPoolProcessor
 from dagium.operators import TaskState
-from execution import Executor, CallableExecutor, Selector, AllSelector
-from execution.selectors import MaxConcurrencySelector
-from operators import Operator
+from dagium.tracing import Tracer
+from dagium.execution import Executor, CallableExecutor, Selector
+from dagium.execution.selectors import MaxConcurrencySelector
+from dagium.operators import Operator
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +25,18 @@ class DagExecutor:
     :param dag: DAG to execute
     :param max_concurrency: Maximum number of tasks to execute in parallel, defaults to 10
     :param processor: Processor to use for executing tasks, defaults to DefaultProcessor
+    :param event_driven: Whether to release the children of a task as soon as it finishes instead of
+        waiting for the whole batch to finish, defaults to False
+    :param result_store: Store where the tasks keep their results, if given the tasks receive references
+        to the results of their parents and fetch them inside the worker instead of through the driver
+    :param checkpoint: Log where the terminal state and result pointer of every task are recorded, requires
+        a result store so the log records references to the stored results instead of the results themselves
+    :param tracer: Tracer that records the execution timeline of the tasks
+    :param fuse: Whether to execute the linear chains of CallAsync tasks as a single invocation
+    :param incremental: Whether to reuse the results of the previous execution for the tasks whose fingerprint
+        has not changed. The fingerprint of a task covers its functions, args and kwargs, the input data of
+        root tasks and the fingerprints of its parents, so a change also dirties every descendant
+    :raises ValueError: If a checkpoint log is given without a result store
     """
 
     def __init__(
@@ -28,76 +46,381 @@ class DagExecutor:
             processor: Processor = None,
             executor: Executor = CallableExecutor(),
             selector: Selector = None,
+            event_driven: bool = False,
+            result_store: Optional[ResultStore] = None,
+            checkpoint: Optional[CheckpointLog] = None,
+            tracer: Optional[Tracer] = None,
+            fuse: bool = False,
+            incremental: bool = False,
     ):
+        if checkpoint is not None and result_store is None:
+            raise ValueError('A checkpoint log requires a result store to record the results of the tasks')
         self._dag = dag
         self._max_concurrency = max_concurrency
         self._processor = processor or ThreadPoolProcessor(max_concurrency)
         self._executor = executor
         self._selector = selector or MaxConcurrencySelector(max_concurrency)
+        self._event_driven = event_driven
+        self._result_store = result_store
+        self._checkpoint = checkpoint
+        self._tracer = tracer
+        self._fuse = fuse
+        self._incremental = incremental
 
         self._futures: Dict[str, Future] = dict()
         self._num_final_tasks = 0
         self._dependence_free_tasks: List[Operator] = list()
         self._running_tasks: List[Operator] = list()
         self._finished_tasks: Set[Operator] = set()
+        self._pending_parents: Dict[Operator, int] = dict()
+        self._fused: Dict[Operator, Operator] = dict()
+        self._fingerprints: Dict[str, Optional[str]] = dict()
+        self._next_fingerprints: Dict[str, Optional[str]] = dict()
+        self._clean_futures: Dict[str, Future] = dict()
 
-    def execute(self) -> Dict[str, Future]:
+    @property
+    def fingerprints(self) -> Dict[str, Optional[str]]:
+        """Return the fingerprints of the tasks that succeeded in the last execution."""
+        return self._fingerprints
+
+    def execute(self, resume: bool = False) -> Dict[str, Future]:
         """
         Execute the DAG
 
+        :param resume: Whether to skip the tasks that already succeeded according to the checkpoint log
         :return: A dictionary with the output data of the DAG tasks with the task ID as key
+        :raises RuntimeError: If the selector selects no task while no task is running and has no delay
+        """
+        self._start(resume)
+
+        if self._event_driven:
+            self._execute_event_driven()
+        else:
+            self._execute_waves()
+
+        self._finish()
+        return self._futures
+
+    def _start(self, resume: bool = False):
+        """
+        Reset the execution state and find the first tasks to execute
+
+        :param resume: Whether to restore the tasks that already succeeded from the checkpoint log
+        :raises ValueError: If resuming without a checkpoint log
         """
         logger.info(f'Executing DAG {self._dag.dag_id}')
+        # Remove the tasks inserted by previous executions, they are inserted again as their parents finish
+        self._dag.collapse()
 
         self._num_final_tasks = len(self._dag.leaf_tasks)
         logger.info(f'DAG {self._dag.dag_id} has {self._num_final_tasks} final tasks')
 
         self._futures = dict()
-
-        # Start by executing the root tasks
-        self._dependence_free_tasks = set(self._dag.root_tasks)
         self._running_tasks = set()
         self._finished_tasks = set()
+        # Number of unfinished parents of every task, a task is released when it reaches zero
+        self._pending_parents = {task: len(task.parents) for task in self._dag.tasks}
+
+        for task in self._dag.tasks:
+            task.tracer = self._tracer
+        if self._tracer is not None:
+            self._tracer.start(self._dag.dag_id, self._dag.tasks)
+
+        self._fused = fuse_chains(self._dag) if self._fuse else dict()
+        # Partitioned maps are always pipelined with their parent map, and maps with a batch size with their
+        # parent map with a batch size
+        self._fused.update(pipeline_maps(self._dag))
+
+        restored: Dict[Operator, Future] = dict()
+        # Futures of the tasks that may be inserted by the restored tasks, with the task ID as key
+        restorable: Dict[str, Future] = dict()
+        if resume:
+            if self._checkpoint is None:
+                raise ValueError('Can not resume the execution without a checkpoint log')
+            restorable.update(
+                (task_id, future) for task_id, (state, future) in self._checkpoint.load().items()
+                if state == TaskState.SUCCESS
+            )
+            restored.update((task, restorable[task.task_id]) for task in self._dag.tasks if task.task_id in restorable)
+        if self._incremental:
+            clean = self._clean_tasks()
+            restored.update(clean)
+            if clean:
+                restorable.update(self._clean_futures)
+
+        if not restored:
+            # Start by executing the root tasks
+            self._dependence_free_tasks = set(self._dag.root_tasks)
+            self._trace_ready(self._dependence_free_tasks)
+            return
+
+        pending = list(restored.items())
+        while pending:
+            task, future = pending.pop()
+            task.state = TaskState.SUCCESS
+            self._futures[task.task_id] = future
+            self._finished_tasks.add(task)
+            # Restored tasks that expanded the DAG insert their tasks again, which may be restored as well
+            pending.extend(
+                (new_task, restorable[new_task.task_id]) for new_task in self._insert(task, future)
+                if new_task.task_id in restorable
+            )
+        logger.info(f'Restored {len(self._finished_tasks)} finished tasks of DAG {self._dag.dag_id}')
+        self._pending_parents = {task: len(task.parents) for task in self._dag.tasks}
+
+        # Chains that were partially executed are not fused or pipelined
+        self._fused = {
+            head: fused for head, fused in self._fused.items()
+            if not any(task in self._finished_tasks for task in fused.tasks)
+        }
+
+        for task in self._finished_tasks:
+            for child in task.children:
+                self._release(child)
+        self._dependence_free_tasks = {
+            task for task in self._dag.tasks
+            if task not in self._finished_tasks and self._pending_parents[task] == 0
+        }
+        self._trace_ready(self._dependence_free_tasks)
+
+    def _clean_tasks(self) -> Dict[Operator, Future]:
+        """
+        Compute the fingerprints of the tasks and find the ones whose result can be reused
 
+        :return: Futures of the previous execution of the tasks whose fingerprint has not changed
+        """
+        fingerprints = dict()
+        for task in self._dag.compile().tasks:
+            fingerprints[task.task_id] = task_key(task, fingerprints)
+        self._next_fingerprints = fingerprints
+
+        clean = {
+            task: self._clean_futures[task.task_id] for task in self._dag.tasks
+            if fingerprints[task.task_id] is not None
+            and fingerprints[task.task_id] == self._fingerprints.get(task.task_id)
+            and task.task_id in self._clean_futures
+        }
+        logger.info(f'{len(self._dag.tasks) - len(clean)} dirty tasks in DAG {self._dag.dag_id}')
+        return clean
+
+    def _finish(self):
+        """
+        Wait until the checkpoint log has recorded every finished task and keep the results of the execution
+        that can be reused by the next one
+        """
+        if self._checkpoint is not None:
+            self._checkpoint.flush()
+        if self._incremental:
+            self._clean_futures = {
+                task_id: future for task_id, future in self._futures.items() if not future.error()
+            }
+            self._fingerprints = {
+                task_id: key for task_id, key in self._next_fingerprints.items() if task_id in self._clean_futures
+            }
+
+    def _execute_waves(self):
+        """
+        Execute the DAG in waves, a batch of tasks is selected and the next batch is not
+        selected until every task of the current batch has finished
+        """
         # Execute tasks until all tasks have been executed
         while self._dependence_free_tasks or self._running_tasks:
             # Select the tasks to execute
             batch = self._selector.select(list(self._running_tasks), list(self._dependence_free_tasks))
+            if not batch:
+                # No task is running in between waves
+                time.sleep(self._selection_delay())
+                continue
+
+            # Fused chains are executed in place of their first task
+            ops = [self._fused.get(task, task) for task in batch]
 
             # Construct the input data for the batch
-            input_data = {}
-            for task in batch:
-                task.state = TaskState.SCHEDULED
-                # If the task has parents, then the input data is the output data of the parent tasks
-                # passed as a dictionary with the parent task ID as the key and the output data as the value
-                if task.parents:
-                    input_data[task.task_id] = {
-                        parent.task_id: self._futures[parent.task_id] for parent in task.parents
-                    }
-                else:
-                    input_data[task.task_id] = task.input_data
+            input_data = {op.task_id: self._schedule(op) for op in ops}
 
             # Add the batch to the running tasks
             set_batch = set(batch)
             self._running_tasks |= set_batch
 
             # Call the processor to execute the batch
-            futures = self._processor.process(batch, self._executor, input_data)
+            futures = self._processor.process(ops, self._executor, input_data)
+
+            for op in ops:
+                self._complete(op, futures[op.task_id])
+
+    def _execute_event_driven(self):
+        """
+        Execute the DAG driven by task completions, the children of a task are released and
+        submitted as soon as the task finishes, without waiting for the rest of its batch
+        """
+        done_queue = queue.Queue()
 
-            self._running_tasks -= set_batch
-            self._dependence_free_tasks -= set_batch
-            self._finished_tasks |= set_batch
+        def on_future_done(task: Operator, future: Future):
+            done_queue.put((task, future, None))
 
+        def on_error(task: Operator, ex_future):
+            if ex_future.exception() is not None:
+                done_queue.put((task, None, ex_future.exception()))
+
+        while self._dependence_free_tasks or self._running_tasks:
+            # Select and submit as many tasks as the selector allows
+            batch = self._selector.select(list(self._running_tasks), list(self._dependence_free_tasks))
             for task in batch:
-                self._futures[task.task_id] = futures[task.task_id]
-                for child in task.children:
-                    if child.parents.issubset(self._finished_tasks):
-                        self._dependence_free_tasks.add(child)
+                op = self._fused.get(task, task)
+                input_data = self._schedule(op)
+                self._running_tasks.add(task)
+                self._dependence_free_tasks.discard(task)
+                ex_future = self._processor.submit(op, self._executor, input_data, on_future_done)
+                ex_future.add_done_callback(lambda f, t=op: on_error(t, f))
 
-        return self._futures
+            if not self._running_tasks:
+                time.sleep(self._selection_delay())
+                continue
+
+            # Block until at least one task finishes, or until the selector may select held back tasks,
+            # then collect every other finished task
+            try:
+                completed = [done_queue.get(timeout=self._selector.delay() if self._dependence_free_tasks else None)]
+            except queue.Empty:
+                continue
+            while True:
+                try:
+                    completed.append(done_queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            for task, future, exception in completed:
+                if exception is not None:
+                    raise exception
+                self._complete(task, future)
+
+    def _selection_delay(self) -> float:
+        """
+        Return how long to wait before selecting again after a selection that was empty while no task was running
+
+        :return: Seconds until the selector may select a task
+        :raises RuntimeError: If only a finished task could change the selection, so the DAG would never finish
+        """
+        delay = self._selector.delay()
+        if delay is None:
+            raise self._stalled_error()
+        return delay
+
+    def _stalled_error(self) -> RuntimeError:
+        """Return the error of a DAG whose selector selects no task while no task is running and has no delay."""
+        return RuntimeError(
+            f'Selector {type(self._selector).__name__} selected none of the {len(self._dependence_free_tasks)} '
+            f'ready tasks of DAG {self._dag.dag_id} while no task is running'
+        )
+
+    def _schedule(self, task: Operator):
+        """
+        Mark a task as scheduled and construct its input data
+
+        If the task has parents, then the input data is the output data of the parent tasks
+        passed as a dictionary with the parent task ID as the key and the output data as the value.
+        When a result store is used, the output data of the parents is passed as references.
+
+        :param task: Task to schedule
+        :return: Input data of the task
+        """
+        task.state = TaskState.SCHEDULED
+        if self._result_store is not None:
+            task.result_store = self._result_store
+            if task.parents:
+                return {parent.task_id: self._futures[parent.task_id].reference() for parent in task.parents}
+        if task.parents:
+            return {parent.task_id: self._futures[parent.task_id] for parent in task.parents}
+        return task.input_data
+
+    def _complete(self, op: Operator, future: Future):
+        """
+        Mark the tasks executed by an operator as finished
+
+        :param op: Finished task or fused chain of tasks
+        :param future: Future of the operator
+        """
+        self._selector.on_task_done(op, future)
+        for task, task_future in op.split_future(future):
+            self._complete_task(task, task_future)
+
+    def _complete_task(self, task: Operator, future: Future):
+        """
+        Mark a task as finished and release the children that have all their parents finished
+
+        :param task: Finished task
+        :param future: Future of the task
+        """
+        self._running_tasks.discard(task)
+        self._dependence_free_tasks.discard(task)
+        self._finished_tasks.add(task)
+
+        self._futures[task.task_id] = future
+        if self._checkpoint is not None:
+            self._checkpoint.record(task, future)
+
+        inserted = self._insert(task, future)
+        if inserted:
+            # The former children of the task now wait for every inserted task instead of the task
+            for child in inserted[0].children:
+                self._pending_parents[child] += len(inserted) - 1
+            for new_task in inserted:
+                self._pending_parents[new_task] = 1
+
+        for child in task.children:
+            if self._release(child):
+                self._dependence_free_tasks.add(child)
+                self._trace_ready([child])
+
+    def _insert(self, task: Operator, future: Future) -> List[Operator]:
+        """
+        Insert into the DAG the tasks a finished task expands into, between the task and its children
+
+        :param task: Finished task
+        :param future: Future of the task
+        :return: Inserted tasks
+        """
+        if future.error():
+            return []
+        inserted = task.expand(future)
+        if not inserted:
+            return []
+
+        children = list(task.children)
+        self._dag.insert_tasks(task, inserted)
+        for new_task in inserted:
+            new_task.tracer = self._tracer
+        if self._tracer is not None:
+            self._tracer.add_tasks(inserted + children)
+        logger.info(f'Task {task.task_id} inserted {len(inserted)} tasks into DAG {self._dag.dag_id}')
+        return inserted
+
+    def _release(self, task: Operator) -> bool:
+        """
+        Account for a finished parent of a task
+
+        :param task: Task whose parent finished
+        :return: Whether all the parents of the task have finished
+        """
+        pending = self._pending_parents.get(task, len(task.parents)) - 1
+        self._pending_parents[task] = pending
+        return pending == 0
+
+    def _trace_ready(self, tasks):
+        """
+        Record that tasks became ready to be scheduled
+
+        :param tasks: Tasks whose parents have all finished
+        """
+        if self._tracer is not None:
+            for task in tasks:
+                self._tracer.event(task, 'READY')
 
     def shutdown(self):
         """
         Shutdown the executor
         """
+        if self._checkpoint is not None:
+            self._checkpoint.close()
         self._processor.shutdown()
+        self._executor.shutdown()
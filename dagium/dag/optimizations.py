@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from typing import Dict, List
+
+from dagium.dag.dag import DAG
+from dagium.operators import CallAsync, FusedCallAsync, Map, Operator, PipelinedMap
+
+
+def find_chains(dag: DAG) -> List[List[CallAsync]]:
+    """
+    Find the maximal linear chains of CallAsync tasks that can be fused into a single invocation
+
+    Two consecutive tasks are part of a chain if the first one is the only parent of the second one, the second
+    one is the only child of the first one, and both run on the same executor with the same arguments.
+
+    :param dag: DAG
+    :return: Chains of at least two tasks, in execution order
+    """
+    def fusable(parent: Operator, child: Operator) -> bool:
+        return (
+                type(parent) is CallAsync and type(child) is CallAsync
+                and parent.children == {child} and child.parents == {parent}
+                and child.executor is parent.executor
+                and child.args == parent.args and child.kwargs == parent.kwargs
+                and parent.metadata.get('fuse', True) and child.metadata.get('fuse', True)
+        )
+
+    chains = []
+    for task in sorted(dag.tasks, key=lambda t: t.task_id):
+        # Only start a chain at a task that can not be appended to its parent's chain
+        if len(task.parents) == 1 and fusable(next(iter(task.parents)), task):
+            continue
+        chain = [task]
+        while len(chain[-1].children) == 1 and fusable(chain[-1], next(iter(chain[-1].children))):
+            chain.append(next(iter(chain[-1].children)))
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+
+def fuse_chains(dag: DAG) -> Dict[Operator, FusedCallAsync]:
+    """
+    Fuse the linear chains of CallAsync tasks of a DAG
+
+    The DAG is not modified, the fused operators are executed in place of the first task of their chain.
+
+    :param dag: DAG
+    :return: Dictionary with the first task of every chain as key and the fused operator as value
+    """
+    return {chain[0]: FusedCallAsync(chain) for chain in find_chains(dag)}
+
+
+def find_pipelines(dag: DAG) -> List[List[Map]]:
+    """
+    Find the maximal chains of maps that can be executed partition by partition or chunk by chunk
+
+    Two consecutive maps are part of a chain if the first one is the only parent of the second one, the second one
+    is the only child of the first one and both run on the same executor, since the calls of every map are waited
+    for by the executor of the first one. Either both maps have a batch size, and the second one streams the
+    results of the first one, or the first one has no batch size and the second one is partitioned.
+
+    :param dag: DAG
+    :return: Chains of at least two maps, in execution order
+    """
+    def pipelinable(parent: Operator, child: Operator) -> bool:
+        if type(parent) is not Map or type(child) is not Map:
+            return False
+        streamed = parent.batch_size is not None and child.batch_size is not None
+        partitioned = parent.batch_size is None and child.batch_size is None and child.partitioned
+        return (
+                (streamed or partitioned)
+                and parent.children == {child} and child.parents == {parent}
+                and child.executor is parent.executor
+        )
+
+    chains = []
+    for task in sorted(dag.tasks, key=lambda t: t.task_id):
+        if len(task.parents) == 1 and pipelinable(next(iter(task.parents)), task):
+            continue
+        chain = [task]
+        while len(chain[-1].children) == 1 and pipelinable(chain[-1], next(iter(chain[-1].children))):
+            chain.append(next(iter(chain[-1].children)))
+        if len(chain) > 1:
+            chains.append(chain)
+    return chains
+
+
+def pipeline_maps(dag: DAG) -> Dict[Operator, PipelinedMap]:
+    """
+    Pipeline the chains of partitioned maps of a DAG
+
+    The DAG is not modified, the pipelines are executed in place of the first map of their chain.
+
+    :param dag: DAG
+    :return: Dictionary with the first map of every chain as key and the pipeline as value
+    """
+    return {chain[0]: PipelinedMap(chain) for chain in find_pipelines(dag)}
@@ -0,0 +1,338 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future as ConcurrentFuture
+from typing import Any, Dict, Optional
+
+from dagium import Future, MAX_CONCURRENCY
+from dagium.dag.dag import DAG
+from dagium.dag.dagexecutor import DagExecutor
+from dagium.execution import Executor, CallableExecutor, ThreadPoolProcessor
+from dagium.operators import Operator
+
+logger = logging.getLogger(__name__)
+
+
+class DagHandle:
+    """
+    Handle of a DAG submitted to a DagService
+
+    The handle can be polled, waited for or awaited from an asyncio event loop.
+
+    :param dag_id: DAG ID
+    """
+
+    def __init__(self, dag_id: str):
+        self._dag_id = dag_id
+        self._future: ConcurrentFuture = ConcurrentFuture()
+
+    @property
+    def dag_id(self) -> str:
+        """Return the DAG ID."""
+        return self._dag_id
+
+    def done(self) -> bool:
+        """Return whether the DAG has finished."""
+        return self._future.done()
+
+    def result(self, timeout: Optional[float] = None) -> Dict[str, Future]:
+        """
+        Wait for the DAG to finish and return the futures of its tasks
+
+        :param timeout: Maximum number of seconds to wait
+        :return: A dictionary with the output data of the DAG tasks with the task ID as key
+        :raises TimeoutError: If the DAG does not finish in time
+        """
+        return self._future.result(timeout)
+
+    def exception(self, timeout: Optional[float] = None) -> Optional[BaseException]:
+        """
+        Wait for the DAG to finish and return the exception that stopped it, if any
+
+        :param timeout: Maximum number of seconds to wait
+        :return: Exception raised by the DAG, or None if it succeeded
+        """
+        return self._future.exception(timeout)
+
+    def __await__(self):
+        return asyncio.wrap_future(self._future).__await__()
+
+
+class _Run:
+    """A DAG submitted to the service and the executor that keeps its execution state."""
+
+    def __init__(self, seq: int, dag_executor: DagExecutor, handle: DagHandle, weight: float, priority: int):
+        self.seq = seq
+        self.dag_executor = dag_executor
+        self.handle = handle
+        self.weight = weight
+        self.priority = priority
+
+
+class DagService:
+    """
+    Long-lived scheduler that executes many DAGs at the same time over a shared worker pool
+
+    All the DAGs share one processor and one concurrency budget. Every time a slot of the budget is free, the
+    next task is taken from the DAG with the highest priority, and among DAGs with the same priority from the one
+    with the fewest running tasks relative to its weight, so the budget is shared in proportion to the weights.
+    Tasks are submitted as soon as their parents finish, as in the event driven mode of DagExecutor.
+
+    :param max_concurrency: Maximum number of tasks running at the same time across all the DAGs
+    :param executor: Executor to use for executing tasks, defaults to CallableExecutor
+    """
+
+    def __init__(self, max_concurrency: int = MAX_CONCURRENCY, executor: Executor = None):
+        self._max_concurrency = max_concurrency
+        self._executor = executor or CallableExecutor()
+        self._processor = ThreadPoolProcessor(max_concurrency)
+
+        self._events: queue.Queue = queue.Queue()
+        self._runs: Dict[int, _Run] = dict()
+        self._running = 0
+        self._seq = itertools.count()
+        self._closed = False
+        # Time at which a selector that held back ready tasks may select them, if no task finishes before
+        self._wakeup: Optional[float] = None
+        self._thread = threading.Thread(target=self._loop, name='dagium-service', daemon=True)
+        self._thread.start()
+
+    @property
+    def max_concurrency(self) -> int:
+        """Return the concurrency budget shared by all the DAGs."""
+        return self._max_concurrency
+
+    def submit(
+            self,
+            dag: DAG,
+            weight: float = 1.0,
+            priority: int = 0,
+            resume: bool = False,
+            **options: Any
+    ) -> DagHandle:
+        """
+        Submit a DAG for execution
+
+        :param dag: DAG to execute
+        :param weight: Share of the concurrency budget of the DAG relative to the DAGs with the same priority
+        :param priority: DAGs with a higher priority take every free slot before DAGs with a lower priority
+        :param resume: Whether to skip the tasks that already succeeded according to the checkpoint log
+        :param options: Options of the DagExecutor of the DAG, like selector, result_store, checkpoint, tracer
+            or fuse. The selector limits the number of running tasks of this DAG
+        :return: Handle of the DAG
+        :raises ValueError: If the weight is not positive or the options have a checkpoint log without a result store
+        :raises RuntimeError: If the service has been shut down
+        """
+        if weight <= 0:
+            raise ValueError(f'Weight must be positive, got {weight}')
+        if self._closed:
+            raise RuntimeError('Can not submit a DAG to a service that has been shut down')
+
+        options.setdefault('executor', self._executor)
+        dag_executor = DagExecutor(
+            dag,
+            max_concurrency=self._max_concurrency,
+            processor=self._processor,
+            event_driven=True,
+            **options
+        )
+        handle = DagHandle(dag.dag_id)
+        self._events.put(('submit', _Run(next(self._seq), dag_executor, handle, weight, priority), resume))
+        return handle
+
+    def shutdown(self):
+        """
+        Stop the service, the DAGs that have not finished are failed
+        """
+        if self._closed:
+            return
+        self._closed = True
+        self._events.put(('stop',))
+        self._thread.join()
+        self._processor.shutdown()
+        self._executor.shutdown()
+
+    def _loop(self):
+        """
+        Scheduling loop, the state of every run is only accessed from this thread
+        """
+        while True:
+            timeout = None if self._wakeup is None else max(0.0, self._wakeup - time.monotonic())
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                # A selector may select the tasks it held back
+                self._dispatch()
+                continue
+            kind = event[0]
+            if kind == 'stop':
+                break
+            try:
+                if kind == 'submit':
+                    self._start(*event[1:])
+                elif kind == 'done':
+                    self._done(*event[1:])
+                elif kind == 'error':
+                    self._running -= 1
+                    self._fail(event[1], event[2])
+            except Exception as e:
+                # An error of one DAG only fails that DAG, the scheduler keeps serving the others
+                logger.exception(f'Error handling event {kind} of DAG {event[1].handle.dag_id}')
+                self._fail(event[1], e)
+            self._dispatch()
+
+        for run in list(self._runs.values()):
+            self._fail(run, RuntimeError('The DAG service was shut down'))
+
+    def _start(self, run: _Run, resume: bool):
+        """
+        Start the execution of a submitted DAG
+
+        :param run: Submitted DAG
+        :param resume: Whether to restore the tasks that already succeeded from the checkpoint log
+        """
+        logger.info(f'Starting DAG {run.handle.dag_id}')
+        try:
+            run.dag_executor._start(resume)
+        except Exception as e:
+            run.handle._future.set_exception(e)
+            return
+        self._runs[run.seq] = run
+        self._finish_if_done(run)
+
+    def _done(self, run: _Run, op: Operator, future: Future):
+        """
+        Account for a finished task
+
+        :param run: DAG of the task
+        :param op: Finished task or fused chain of tasks
+        :param future: Future of the task
+        """
+        self._running -= 1
+        if run.seq not in self._runs:
+            # The DAG already failed, the result of its remaining tasks is ignored
+            return
+        run.dag_executor._complete(op, future)
+        self._finish_if_done(run)
+
+    def _finish_if_done(self, run: _Run):
+        """
+        Resolve the handle of a DAG that has no ready or running tasks left
+
+        :param run: DAG
+        """
+        dag_executor = run.dag_executor
+        if dag_executor._dependence_free_tasks or dag_executor._running_tasks:
+            return
+        del self._runs[run.seq]
+        try:
+            dag_executor._finish()
+        except Exception as e:
+            run.handle._future.set_exception(e)
+            return
+        finally:
+            self._close_checkpoint(run)
+        logger.info(f'DAG {run.handle.dag_id} finished')
+        run.handle._future.set_result(dag_executor._futures)
+
+    def _fail(self, run: _Run, exception: BaseException):
+        """
+        Stop scheduling the tasks of a DAG and fail its handle
+
+        :param run: DAG
+        :param exception: Exception that stopped the DAG
+        """
+        if self._runs.pop(run.seq, None) is None:
+            return
+        self._close_checkpoint(run)
+        logger.info(f'DAG {run.handle.dag_id} failed: {exception}')
+        run.handle._future.set_exception(exception)
+
+    @staticmethod
+    def _close_checkpoint(run: _Run):
+        """
+        Write the queued checkpoint records of a DAG that has finished and stop the writer of its log
+
+        :param run: DAG
+        """
+        checkpoint = run.dag_executor._checkpoint
+        if checkpoint is not None:
+            try:
+                checkpoint.close()
+            except Exception as e:
+                logger.error(f'Failed to close the checkpoint log of DAG {run.handle.dag_id}: {e}')
+
+    def _dispatch(self):
+        """
+        Submit ready tasks until the concurrency budget is used up
+        """
+        self._wakeup = None
+        if self._running >= self._max_concurrency:
+            return
+
+        # Tasks every DAG allows to run now according to its own selector
+        candidates = {}
+        for run in list(self._runs.values()):
+            dag_executor = run.dag_executor
+            if dag_executor._dependence_free_tasks:
+                try:
+                    selected = dag_executor._selector.select(
+                        list(dag_executor._running_tasks), list(dag_executor._dependence_free_tasks)
+                    )
+                except Exception as e:
+                    self._fail(run, e)
+                    continue
+                if selected:
+                    candidates[run] = deque(selected)
+                    continue
+                delay = dag_executor._selector.delay()
+                if delay is not None:
+                    wakeup = time.monotonic() + delay
+                    self._wakeup = wakeup if self._wakeup is None else min(self._wakeup, wakeup)
+                elif not dag_executor._running_tasks:
+                    # No task of the DAG would ever finish to make its selector change its mind
+                    self._fail(run, dag_executor._stalled_error())
+
+        while candidates and self._running < self._max_concurrency:
+            run = min(
+                candidates,
+                key=lambda r: (-r.priority, len(r.dag_executor._running_tasks) / r.weight, r.seq)
+            )
+            task = candidates[run].popleft()
+            if not candidates[run]:
+                del candidates[run]
+            try:
+                self._submit(run, task)
+            except Exception as e:
+                candidates.pop(run, None)
+                self._fail(run, e)
+
+    def _submit(self, run: _Run, task: Operator):
+        """
+        Submit a ready task of a DAG to the shared processor
+
+        :param run: DAG of the task
+        :param task: Task to submit
+        """
+        dag_executor = run.dag_executor
+        op = dag_executor._fused.get(task, task)
+        input_data = dag_executor._schedule(op)
+        dag_executor._running_tasks.add(task)
+        dag_executor._dependence_free_tasks.discard(task)
+
+        def on_future_done(done_op: Operator, future: Future):
+            self._events.put(('done', run, done_op, future))
+
+        def on_error(ex_future):
+            if ex_future.exception() is not None:
+                self._events.put(('error', run, ex_future.exception()))
+
+        ex_future = self._processor.submit(op, dag_executor._executor, input_data, on_future_done)
+        self._running += 1
+        ex_future.add_done_callback(on_error)
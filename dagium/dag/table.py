@@ -0,0 +1,418 @@
+from __future__ import annotations
+
+from array import array
+from collections.abc import Set as AbstractSet
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from lithops import FunctionExecutor
+from lithops.future import ResponseFuture
+
+from dagium import Future, ResultStore
+from dagium.operators import CallAsync, Operator, TaskState
+
+_STATES = tuple(sorted(TaskState, key=lambda state: state.value))
+
+
+class TaskTable:
+    """
+    Compact storage for the tasks of very large DAGs
+
+    The state, the number of parents and the relations of the tasks are kept in array columns indexed by an
+    integer node ID instead of in attributes of every operator. The tasks are TaskHandle operators that only hold
+    their function and input data, and behave like CallAsync operators, so they can be added to a DAG and
+    executed by any DagExecutor. The executor, the args and the kwargs are shared by all the tasks of the table.
+
+    Relations are stored as a list of edges and the adjacency arrays are rebuilt the first time the relations
+    are read after they changed, so relations should be set before the DAG is executed.
+
+    :param executor: Executor of all the tasks
+    :param args: Arguments to pass to the executor on every call
+    :param kwargs: Keyword arguments to pass to the executor on every call
+    """
+
+    def __init__(self, executor: FunctionExecutor, *args, **kwargs):
+        self._executor = executor
+        self._args = args
+        self._kwargs = kwargs
+
+        self._ids: List[str] = []
+        self._index: Dict[str, int] = dict()
+        self._handles: List[TaskHandle] = []
+        self._state = array('b')
+        self._in_degree = array('q')
+        self._out_degree = array('q')
+        self._sources = array('q')
+        self._targets = array('q')
+        self._adjacency: Optional[Tuple[array, array, array, array]] = None
+
+        # Sparse columns, only the tasks that have a value are stored
+        self._metadata: Dict[int, Dict[str, Any]] = dict()
+        self._result_stores: Dict[int, ResultStore] = dict()
+        self._tracers: Dict[int, Any] = dict()
+        # Number of tasks of the table in every DAG, a relation change invalidates the topology of all of them
+        self._dag_counts: Dict[Any, int] = dict()
+
+    @property
+    def executor(self) -> FunctionExecutor:
+        """Return the executor of all the tasks."""
+        return self._executor
+
+    @property
+    def tasks(self) -> List[TaskHandle]:
+        """Return the tasks, the position of a task is its node ID."""
+        return self._handles
+
+    @property
+    def in_degree(self) -> array:
+        """Return the number of parents of every task."""
+        return self._in_degree
+
+    @property
+    def num_edges(self) -> int:
+        """Return the number of relations between the tasks."""
+        return len(self._sources)
+
+    def add(
+            self,
+            task_id: str,
+            func: Callable[[Dict[str, Future], ...], Any],
+            input_data: Optional[Dict[str, Future] | Future] = None,
+            metadata: Optional[Dict[str, Any]] = None
+    ) -> TaskHandle:
+        """
+        Add a task to the table
+
+        :param task_id: Task ID
+        :param func: Function to call
+        :param input_data: Input data for the task
+        :param metadata: Metadata of the task
+        :return: The task
+        :raises ValueError: if the table already has a task with that ID
+        """
+        if task_id in self._index:
+            raise ValueError(f"Task with id {task_id} already exists in the task table")
+
+        node = len(self._ids)
+        input_data = input_data if isinstance(input_data, dict) else {'root': input_data} if input_data else None
+        handle = TaskHandle(self, node, func, input_data)
+        self._ids.append(task_id)
+        self._index[task_id] = node
+        self._handles.append(handle)
+        self._state.append(TaskState.NONE.value)
+        self._in_degree.append(0)
+        self._out_degree.append(0)
+        if metadata:
+            self._metadata[node] = metadata
+        return handle
+
+    def get_task(self, task_id: str) -> Optional[TaskHandle]:
+        """
+        Return the task with the given ID
+
+        :param task_id: Task ID
+        :return: The task, or None if there is no task with that ID in the table
+        """
+        node = self._index.get(task_id)
+        return self._handles[node] if node is not None else None
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, task_id: str) -> bool:
+        return task_id in self._index
+
+    def add_edge(self, parent: int, child: int):
+        """
+        Add a relation between two tasks
+
+        :param parent: Node ID of the parent
+        :param child: Node ID of the child
+        """
+        self._sources.append(parent)
+        self._targets.append(child)
+        self._out_degree[parent] += 1
+        self._in_degree[child] += 1
+        self._adjacency = None
+
+    def remove_edges(self, edges: set[Tuple[int, int]]):
+        """
+        Remove relations between tasks, the edge columns are rebuilt
+
+        :param edges: Node IDs of the parent and the child of every relation
+        """
+        sources, targets = array('q'), array('q')
+        for source, target in zip(self._sources, self._targets):
+            if (source, target) in edges:
+                self._out_degree[source] -= 1
+                self._in_degree[target] -= 1
+            else:
+                sources.append(source)
+                targets.append(target)
+        self._sources, self._targets = sources, targets
+        self._adjacency = None
+
+    def children(self, node: int) -> array:
+        """
+        Return the node IDs of the children of a task
+
+        :param node: Node ID
+        :return: Node IDs of the children
+        """
+        child_offsets, child_ids, _, _ = self._build_adjacency()
+        return child_ids[child_offsets[node]:child_offsets[node + 1]]
+
+    def parents(self, node: int) -> array:
+        """
+        Return the node IDs of the parents of a task
+
+        :param node: Node ID
+        :return: Node IDs of the parents
+        """
+        _, _, parent_offsets, parent_ids = self._build_adjacency()
+        return parent_ids[parent_offsets[node]:parent_offsets[node + 1]]
+
+    def _build_adjacency(self) -> Tuple[array, array, array, array]:
+        """
+        Return the adjacency arrays of the children and the parents, rebuilding them if the relations changed
+        """
+        if self._adjacency is None:
+            self._adjacency = (
+                *self._group(self._sources, self._targets, self._out_degree),
+                *self._group(self._targets, self._sources, self._in_degree)
+            )
+        return self._adjacency
+
+    def _group(self, keys: array, values: array, degree: array) -> Tuple[array, array]:
+        """
+        Group the edges by one of their ends with a counting sort
+
+        :return: Offsets of the group of every node and the other end of the edges of every group
+        """
+        offsets = array('q', [0]) * (len(self._ids) + 1)
+        for node in range(len(self._ids)):
+            offsets[node + 1] = offsets[node] + degree[node]
+        ids = array('q', [0]) * len(keys)
+        cursor = offsets[:-1]
+        for key, value in zip(keys, values):
+            ids[cursor[key]] = value
+            cursor[key] += 1
+        return offsets, ids
+
+
+class _Relatives(AbstractSet):
+    """Read-only set of the parents or the children of a TaskHandle."""
+
+    __slots__ = ('_table', '_ids')
+
+    def __init__(self, table: TaskTable, ids: array):
+        self._table = table
+        self._ids = ids
+
+    @classmethod
+    def _from_iterable(cls, iterable) -> set:
+        return set(iterable)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __iter__(self) -> Iterator[TaskHandle]:
+        handles = self._table._handles
+        return (handles[node] for node in self._ids)
+
+    def __contains__(self, task) -> bool:
+        return isinstance(task, TaskHandle) and task._table is self._table and task._node in self._ids
+
+    def __repr__(self):
+        return f'{{{", ".join(self._table._ids[node] for node in self._ids)}}}'
+
+
+class TaskHandle(Operator):
+    """
+    Task of a TaskTable that behaves like a CallAsync operator
+
+    Only the function and the input data are kept in the handle, everything else is read from its table. The
+    parents and children are read-only sets, relations are changed with add_parent, add_child and their
+    counterparts, and only with other tasks of the same table.
+
+    :param table: Table of the task
+    :param node: Node ID of the task in the table
+    :param func: Function to call
+    :param input_data: Input data for the task
+    """
+
+    __slots__ = ('_table', '_node', '_func', '_input')
+
+    def __init__(
+            self,
+            table: TaskTable,
+            node: int,
+            func: Callable[[Dict[str, Future], ...], Any],
+            input_data: Optional[Dict[str, Future]] = None
+    ):
+        self._table = table
+        self._node = node
+        self._func = func
+        self._input = input_data
+
+    @property
+    def node_id(self) -> int:
+        """Return the node ID of the task in its table."""
+        return self._node
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return (self._func,)
+
+    # The attributes of Operator are read from the table
+    @property
+    def _task_id(self) -> str:
+        return self._table._ids[self._node]
+
+    @property
+    def _executor(self) -> FunctionExecutor:
+        return self._table._executor
+
+    @property
+    def _input_data(self) -> Dict[str, Future]:
+        return self._input if self._input is not None else {}
+
+    @property
+    def _metadata(self) -> Dict[str, Any]:
+        return self._table._metadata.get(self._node, {})
+
+    @property
+    def _args(self) -> Tuple[Any, ...]:
+        return self._table._args
+
+    @property
+    def _kwargs(self) -> Dict[str, Any]:
+        return self._table._kwargs
+
+    @property
+    def _parents(self) -> AbstractSet:
+        return _Relatives(self._table, self._table.parents(self._node))
+
+    @property
+    def _children(self) -> AbstractSet:
+        return _Relatives(self._table, self._table.children(self._node))
+
+    @property
+    def parents(self) -> AbstractSet:
+        """Return the parents of this operator."""
+        return self._parents
+
+    @property
+    def in_degree(self) -> int:
+        """Return the number of parents of this operator, without rebuilding the adjacency arrays."""
+        return self._table._in_degree[self._node]
+
+    @property
+    def out_degree(self) -> int:
+        """Return the number of children of this operator, without rebuilding the adjacency arrays."""
+        return self._table._out_degree[self._node]
+
+    @property
+    def children(self) -> AbstractSet:
+        """Return the children of this operator."""
+        return self._children
+
+    @property
+    def _state(self) -> TaskState:
+        return _STATES[self._table._state[self._node]]
+
+    @_state.setter
+    def _state(self, value: TaskState):
+        self._table._state[self._node] = value.value
+
+    @property
+    def _result_store(self) -> Optional[ResultStore]:
+        return self._table._result_stores.get(self._node)
+
+    @_result_store.setter
+    def _result_store(self, value: Optional[ResultStore]):
+        _set_sparse(self._table._result_stores, self._node, value)
+
+    @property
+    def _tracer(self):
+        return self._table._tracers.get(self._node)
+
+    @_tracer.setter
+    def _tracer(self, value):
+        _set_sparse(self._table._tracers, self._node, value)
+
+    # The DAGs are tracked per table, those of every task of the table are reported
+    @property
+    def _dags(self) -> tuple:
+        return tuple(self._table._dag_counts)
+
+    def _add_dag(self, dag):
+        counts = self._table._dag_counts
+        counts[dag] = counts.get(dag, 0) + 1
+
+    def _remove_dag(self, dag):
+        counts = self._table._dag_counts
+        counts[dag] -= 1
+        if counts[dag] == 0:
+            del counts[dag]
+
+    def _set_relation(self, operator_or_operators: Operator | List[Operator], upstream: bool = False):
+        operators = self._same_table(operator_or_operators)
+        for operator in operators:
+            if upstream:
+                self._table.add_edge(operator._node, self._node)
+            else:
+                self._table.add_edge(self._node, operator._node)
+        self._topology_changed(operators)
+
+    def _unset_relation(self, operator_or_operators: Operator | List[Operator], upstream: bool = False):
+        operators = self._same_table(operator_or_operators)
+        edges = {(operator._node, self._node) if upstream else (self._node, operator._node) for operator in operators}
+        self._table.remove_edges(edges)
+        self._topology_changed(operators)
+
+    def _same_table(self, operator_or_operators: Operator | List[Operator]) -> List[TaskHandle]:
+        """
+        Check that the operators are tasks of the table of this task
+
+        :raises TypeError: if any operator is not a task of the same table
+        """
+        operators = [operator_or_operators] if isinstance(operator_or_operators, Operator) \
+            else list(operator_or_operators)
+        for operator in operators:
+            if not isinstance(operator, TaskHandle) or operator._table is not self._table:
+                raise TypeError(f"Task {self.task_id} can only be related to tasks of the same task table")
+        return operators
+
+    def __call__(
+            self,
+            input_data: Dict[str, Future] = None,
+            *args,
+            **kwargs
+    ) -> ResponseFuture:
+        """
+        Execute the operator and return a future object.
+
+        :param input_data: Input data
+        :return: the future object
+        """
+        input_data = input_data or self._input_data
+        return self._executor.call_async(
+            self._wrap(self._func, input_data),
+            {'input_data': input_data, 'args': args, 'kwargs': kwargs},
+            *self._args,
+            **self._kwargs
+        )
+
+    local_call = CallAsync.local_call
+    _wrap = CallAsync._wrap
+
+    def __repr__(self):
+        return f'TaskHandle({self.task_id})'
+
+
+def _set_sparse(column: Dict[int, Any], node: int, value: Any):
+    if value is None:
+        column.pop(node, None)
+    else:
+        column[node] = value
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import uuid
+from typing import Any, Dict, Optional
+
+from lithops import Storage
+
+from dagium.future import ObjectRef
+from dagium.serializers import Serializer, CloudpickleSerializer, CompressedSerializer, FramesReader
+
+
+class ResultStore:
+    """
+    Location where tasks store their results when running in data plane mode
+
+    In data plane mode every task writes its result to the storage from inside the worker and returns
+    an ObjectRef instead of the value. Downstream tasks receive the references and fetch the data
+    directly in their workers, so large results never pass through the driver.
+
+    :param bucket: Bucket where the results are stored
+    :param prefix: Prefix of the keys of the stored results
+    :param config: Lithops configuration used to access the storage, defaults to the configuration
+        of the environment
+    :param serializer: Serializer of the results, defaults to CloudpickleSerializer. Pickle5Serializer and
+        ArrowSerializer avoid copying the buffers of array-like results
+    :param mmap: Whether the references memory-map the results they fetch instead of reading them into memory
+    :param compress: Whether to wrap the serializer in a CompressedSerializer, so that large results are compressed
+        when it reduces the time to transfer them
+    """
+
+    def __init__(
+            self,
+            bucket: str,
+            prefix: str = 'dagium/results',
+            config: Optional[Dict[str, Any]] = None,
+            serializer: Optional[Serializer] = None,
+            mmap: bool = False,
+            compress: bool = False,
+    ):
+        self._bucket = bucket
+        self._prefix = prefix
+        self._config = config
+        self._serializer = serializer or CloudpickleSerializer()
+        if compress and not isinstance(self._serializer, CompressedSerializer):
+            self._serializer = CompressedSerializer(self._serializer)
+        self._mmap = mmap
+
+    @classmethod
+    def from_storage(
+            cls,
+            storage: Storage,
+            prefix: str = 'dagium/results',
+            serializer: Optional[Serializer] = None,
+            mmap: bool = False,
+            compress: bool = False,
+    ) -> ResultStore:
+        """
+        Create a result store in the default bucket of a Lithops storage
+
+        :param storage: Lithops storage
+        :param prefix: Prefix of the keys of the stored results
+        :param serializer: Serializer of the results
+        :param mmap: Whether the references memory-map the results they fetch
+        :param compress: Whether to compress large results
+        :return: The result store
+        """
+        return cls(storage.bucket, prefix, serializer=serializer, mmap=mmap, compress=compress)
+
+    @property
+    def bucket(self) -> str:
+        """Return the bucket where the results are stored."""
+        return self._bucket
+
+    @property
+    def prefix(self) -> str:
+        """Return the prefix of the keys of the stored results."""
+        return self._prefix
+
+    @property
+    def serializer(self) -> Serializer:
+        """Return the serializer of the results."""
+        return self._serializer
+
+    def put(self, value: Any, task_id: str) -> ObjectRef:
+        """
+        Store the result of a task
+
+        :param value: Result of the task
+        :param task_id: Task ID
+        :return: Reference to the stored result
+        """
+        key = f'{self._prefix}/{task_id}/{uuid.uuid4().hex}'
+        frames = self._serializer.dumps(value)
+        body = frames[0] if len(frames) == 1 else FramesReader(frames)
+        Storage(config=self._config).put_object(self._bucket, key, body)
+        return ObjectRef(self._bucket, key, self._config, self._serializer, self._mmap)
@@ -1,3 +1,8 @@
-from dagium.execution.processors import Processor, ThreadPoolProcessor
-from dagium.execution.executors import Executor, CallableExecutor
-from dagium.execution.selectors import Selector, AllSelector
+from dagium.execution.processors import Processor, ThreadPoolProcessor, BatchingProcessor, AsyncProcessor
+from dagium.execution.executors import Executor, CallableExecutor, CachingExecutor, LocalExecutor, HybridExecutor, \
+    AsyncExecutor, AsyncCallableExecutor
+from dagium.execution.placement import Placement, PlacementPolicy
+from dagium.execution.speculation import SpeculativeFunctionExecutor
+from dagium.execution.retries import RetryPolicy, RetryingFunctionExecutor
+from dagium.execution.selectors import Selector, AllSelector, MaxConcurrencySelector, CriticalPathSelector, \
+    AdaptiveConcurrencySelector, TokenBucket
@@ -1,8 +1,24 @@
+import asyncio
+import functools
+import logging
+import time
 from abc import abstractmethod, ABC
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Optional
 
-from dagium import Future, LithopsFuture
-from operators import Operator
+import cloudpickle
+
+from lithops import FunctionExecutor
+from lithops.future import ResponseFuture
+from lithops.wait import ALWAYS
+
+from dagium import Future, LithopsFuture, InputData, ObjectRef, ObjectRefList, StreamingFuturesList, POLL_INTERVAL
+from dagium.cache import CacheBackend, task_key
+from dagium.execution.placement import Placement, PlacementPolicy
+from dagium.operators import Operator
+from dagium.tracing import trace_span
+
+logger = logging.getLogger(__name__)
 
 
 class Executor(ABC):
@@ -30,6 +46,9 @@ class Executor(ABC):
         """
         pass
 
+    def shutdown(self):
+        pass
+
 
 class CallableExecutor(Executor):
     """
@@ -53,6 +72,382 @@ class CallableExecutor(Executor):
         :param input_data: Input data
         :return: Output data of the tasks
         """
-        future = task(input_data, *args, **kwargs)
-        task.executor.wait(future)
-        return Future(future)
+        with trace_span(task, 'invoke'):
+            future = task(input_data, *args, **kwargs)
+        with trace_span(task, 'wait'):
+            if isinstance(future, StreamingFuturesList):
+                future.join()
+            done, _ = task.executor.wait(future)
+        if isinstance(future, ResponseFuture) and done:
+            # A call that was submitted again is replaced by the future of its last attempt
+            future = done[0]
+
+        result = Future(future)
+        if task.tracer is not None:
+            task.tracer.record_calls(task, result)
+        return result
+
+
+class CachingExecutor(Executor):
+    """
+    Executor that reuses the results of tasks whose functions and inputs have not changed
+
+    Results are addressed by a key computed from the bytecode of the functions of the task, its args and
+    kwargs and the keys of the results of its parents. On a hit the cached result is returned without
+    invoking Lithops, on a miss the task is executed by the wrapped executor and its result is stored.
+    Tasks can opt out of the cache with the metadata entry ``cache=False``, and invalidate their cached results
+    by changing the metadata entry ``cache_version``. Results kept in a result store are cached as references to
+    the stored objects, so they are never downloaded to the driver.
+
+    :param cache: Cache backend
+    :param executor: Executor used on a cache miss, defaults to CallableExecutor
+    """
+
+    def __init__(self, cache: CacheBackend, executor: Optional[Executor] = None):
+        super().__init__()
+        self._cache = cache
+        self._executor = executor or CallableExecutor()
+        self._keys: Dict[str, Optional[str]] = dict()
+
+    @property
+    def cache(self) -> CacheBackend:
+        """Return the cache backend."""
+        return self._cache
+
+    def execute(
+            self,
+            task: Operator,
+            input_data: Optional[Dict[str, Future]] = None,
+            *args,
+            **kwargs
+    ) -> Future:
+        """
+        Return the cached result of a task or execute it and cache its result
+
+        :param task: Task to execute
+        :param input_data: Input data
+        :return: Output data of the tasks
+        """
+        key = task_key(task, self._keys) if task.metadata.get('cache', True) else None
+        self._keys[task.task_id] = key
+
+        if key is not None:
+            data = self._cache.get(key)
+            if data is not None:
+                logger.info(f"Cache hit for task {task.task_id}")
+                value = cloudpickle.loads(data)
+                return value if isinstance(value, (ObjectRef, ObjectRefList)) else InputData(value)
+
+        future = self._executor.execute(task, input_data, *args, **kwargs)
+
+        if key is not None:
+            if future.error():
+                self._keys[task.task_id] = None
+            else:
+                ref = future.reference()
+                value = ref if isinstance(ref, (ObjectRef, ObjectRefList)) else future.result()
+                self._cache.put(key, cloudpickle.dumps(value))
+
+        return future
+
+    def shutdown(self):
+        self._executor.shutdown()
+
+
+class LocalExecutor(Executor):
+    """
+    Executor that runs tasks in a pool of local processes instead of their Lithops executor
+
+    The results of the parents of a task are resolved in the driver before the task is sent to the pool, except
+    for the results kept in a result store, which are fetched by the local process. Only the operators that
+    implement local_call can be executed.
+
+    :param max_workers: Number of processes of the pool, defaults to the number of CPUs
+    """
+
+    def __init__(self, max_workers: Optional[int] = None):
+        super().__init__()
+        self._pool = ProcessPoolExecutor(max_workers=max_workers)
+        self._result_sizes: Dict[str, int] = dict()
+
+    def execute(
+            self,
+            task: Operator,
+            input_data: Optional[Dict[str, Future]] = None,
+            *args,
+            **kwargs
+    ) -> Future:
+        """
+        Execute a task in the process pool and wait for it to finish
+
+        :param task: Task to execute
+        :param input_data: Input data
+        :return: Output data of the tasks
+        :raises TypeError: If the task can not be executed outside of its Lithops executor
+        """
+        if input_data:
+            input_data = {
+                key: value if isinstance(value, (InputData, ObjectRef)) else InputData(value.result())
+                for key, value in input_data.items()
+            }
+        call = task.local_call(input_data)
+        if call is None:
+            raise TypeError(f'Task {task.task_id} can not be executed locally')
+
+        with trace_span(task, 'invoke'):
+            ex_future = self._pool.submit(_run_pickled, cloudpickle.dumps(call))
+        with trace_span(task, 'wait'):
+            data = ex_future.result()
+
+        self._result_sizes[task.task_id] = len(data)
+        value = cloudpickle.loads(data)
+        return value if isinstance(value, ObjectRef) else InputData(value)
+
+    def result_size(self, task_id: str) -> Optional[int]:
+        """
+        Return the size of the serialized result of a task executed by this executor
+
+        :param task_id: Task ID
+        :return: Size in bytes, or None if the task was not executed by this executor
+        """
+        return self._result_sizes.get(task_id)
+
+    def shutdown(self):
+        self._pool.shutdown()
+
+
+class HybridExecutor(Executor):
+    """
+    Executor that runs every task either in a local process pool or in its Lithops executor
+
+    The placement policy decides where each task runs and learns the duration and result size of the
+    tasks as they finish, so that short tasks with small inputs are moved to the driver in later runs.
+
+    :param local: Executor of the local tasks, defaults to LocalExecutor
+    :param remote: Executor of the remote tasks, defaults to CallableExecutor
+    :param policy: Placement policy, defaults to PlacementPolicy
+    """
+
+    def __init__(
+            self,
+            local: Optional[LocalExecutor] = None,
+            remote: Optional[Executor] = None,
+            policy: Optional[PlacementPolicy] = None,
+    ):
+        super().__init__()
+        self._local = local or LocalExecutor()
+        self._remote = remote or CallableExecutor()
+        self._policy = policy or PlacementPolicy()
+
+    @property
+    def policy(self) -> PlacementPolicy:
+        """Return the placement policy."""
+        return self._policy
+
+    def execute(
+            self,
+            task: Operator,
+            input_data: Optional[Dict[str, Future]] = None,
+            *args,
+            **kwargs
+    ) -> Future:
+        """
+        Execute a task where the placement policy decides and wait for it to finish
+
+        :param task: Task to execute
+        :param input_data: Input data
+        :return: Output data of the tasks
+        """
+        local_capable = type(task).local_call is not Operator.local_call
+        placement = self._policy.place(task, local_capable)
+        logger.info(f"Placing task {task.task_id} {placement.value}")
+
+        start = time.perf_counter()
+        if placement == Placement.LOCAL:
+            future = self._local.execute(task, input_data, *args, **kwargs)
+            duration = time.perf_counter() - start
+            result_size = self._local.result_size(task.task_id)
+        else:
+            future = self._remote.execute(task, input_data, *args, **kwargs)
+            duration, result_size = _remote_measures(future, time.perf_counter() - start)
+
+        if not future.error():
+            self._policy.record(task.task_id, duration, result_size)
+        return future
+
+    def shutdown(self):
+        self._local.shutdown()
+        self._remote.shutdown()
+
+
+def _run_pickled(payload: bytes) -> bytes:
+    """
+    Run a function serialized with cloudpickle and serialize its result
+
+    :param payload: Serialized function without arguments
+    :return: Serialized result
+    """
+    return cloudpickle.dumps(cloudpickle.loads(payload)())
+
+
+def _remote_measures(future: Future, elapsed: float) -> tuple[float, Optional[int]]:
+    """
+    Return the execution time and result size of a task from the stats of its Lithops calls
+
+    :param future: Future of the task
+    :param elapsed: Time the driver waited for the task, used if the calls have no stats
+    :return: Longest execution time of the calls and total size of their results
+    """
+    stats = [getattr(f, 'stats', None) or {} for f in future.response_futures()]
+    durations = [
+        s['worker_end_tstamp'] - s['worker_start_tstamp']
+        for s in stats if 'worker_start_tstamp' in s and 'worker_end_tstamp' in s
+    ]
+    sizes = [s['func_result_size'] for s in stats if 'func_result_size' in s]
+    return max(durations, default=elapsed), sum(sizes) if sizes else None
+
+
+class AsyncExecutor(ABC):
+    """
+    Abstract base class for asyncio executors
+    """
+
+    def __init__(self):
+        pass
+
+    @abstractmethod
+    async def execute(
+            self,
+            task: Operator,
+            input_data: Optional[Dict[str, Future]] = None,
+            *args,
+            **kwargs
+    ) -> Future:
+        """
+        Execute a task and wait for it to finish without blocking the event loop
+
+        :param task: Task to execute
+        :param input_data: Input data
+        :return: Output data of the tasks
+        """
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class FuturePoller:
+    """
+    Polls the status of the Lithops futures of a FunctionExecutor from an asyncio event loop
+
+    A single polling loop checks the status of every pending future of the executor at once, so the
+    number of futures in flight is not limited by the number of threads.
+
+    :param executor: Lithops executor that owns the futures
+    :param poll_interval: Seconds to wait between two status checks
+    """
+
+    def __init__(self, executor: FunctionExecutor, poll_interval: float = POLL_INTERVAL):
+        self._executor = executor
+        self._poll_interval = poll_interval
+        self._pending: Dict[ResponseFuture, List[asyncio.Future]] = dict()
+        self._task: Optional[asyncio.Task] = None
+
+    async def wait(self, futures: List[ResponseFuture]) -> List[ResponseFuture]:
+        """
+        Wait until all the futures are done
+
+        :param futures: Futures to wait for
+        :return: The finished futures in the same order, a call that the executor submitted again is replaced by
+            the future of its last attempt
+        """
+        loop = asyncio.get_running_loop()
+        waiters = []
+        for future in futures:
+            waiter = loop.create_future()
+            self._pending.setdefault(future, []).append(waiter)
+            waiters.append(waiter)
+
+        if self._task is None or self._task.done():
+            self._task = loop.create_task(self._poll())
+
+        return list(await asyncio.gather(*waiters))
+
+    async def _poll(self):
+        """
+        Check the status of the pending futures until there are no pending futures left
+        """
+        loop = asyncio.get_running_loop()
+        while self._pending:
+            pending = list(self._pending)
+            futures = list(pending)
+            done, _ = await loop.run_in_executor(None, functools.partial(
+                self._executor.wait,
+                futures,
+                throw_except=False,
+                return_when=ALWAYS,
+                show_progressbar=False
+            ))
+            # A retrying executor replaces the future of a failed call by the future of its next attempt
+            for old, new in zip(pending, futures):
+                if new is not old:
+                    self._pending[new] = self._pending.pop(old)
+            for future in done:
+                for waiter in self._pending.pop(future, []):
+                    if not waiter.done():
+                        waiter.set_result(future)
+            if self._pending:
+                await asyncio.sleep(self._poll_interval)
+
+
+class AsyncCallableExecutor(AsyncExecutor):
+    """
+    Asyncio executor that executes a callable
+
+    The invocation is submitted from a worker thread and the resulting futures are polled
+    by a FuturePoller, so no thread is blocked while the task is running.
+
+    :param poll_interval: Seconds to wait between two status checks
+    """
+
+    def __init__(self, poll_interval: float = POLL_INTERVAL):
+        super().__init__()
+        self._poll_interval = poll_interval
+        self._pollers: Dict[int, FuturePoller] = dict()
+
+    async def execute(
+            self,
+            task: Operator,
+            input_data: Optional[Dict[str, Future]] = None,
+            *args,
+            **kwargs
+    ) -> Future:
+        """
+        Execute a task and wait for it to finish without blocking the event loop
+
+        :param task: Task to execute
+        :param input_data: Input data
+        :return: Output data of the tasks
+        """
+        loop = asyncio.get_running_loop()
+        with trace_span(task, 'invoke'):
+            future = await loop.run_in_executor(None, functools.partial(task, input_data, *args, **kwargs))
+
+        poller = self._pollers.get(id(task.executor))
+        if poller is None:
+            poller = FuturePoller(task.executor, self._poll_interval)
+            self._pollers[id(task.executor)] = poller
+
+        with trace_span(task, 'wait'):
+            if isinstance(future, StreamingFuturesList):
+                await loop.run_in_executor(None, future.join)
+            finished = await poller.wait([future] if isinstance(future, ResponseFuture) else list(future))
+        if isinstance(future, ResponseFuture):
+            future = finished[0]
+        else:
+            future[:] = finished
+
+        result = Future(future)
+        if task.tracer is not None:
+            task.tracer.record_calls(task, result)
+        return result
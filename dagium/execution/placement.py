@@ -0,0 +1,93 @@
+from __future__ import annotations
+
+import logging
+from enum import Enum
+from typing import Dict, Optional
+
+from dagium.operators import Operator
+
+logger = logging.getLogger(__name__)
+
+
+class Placement(Enum):
+    """
+    Where a task is executed
+    """
+    LOCAL = 'local'
+    REMOTE = 'remote'
+
+
+class PlacementPolicy:
+    """
+    Decides whether a task runs in a local process pool or in its Lithops executor
+
+    A task runs locally if its metadata says so with ``placement='local'``, or if it can run locally, its measured
+    duration from earlier runs is below a threshold and the results of its parents are small enough to be moved
+    to the driver. Tasks with ``placement='remote'`` and tasks without a measured duration run remotely.
+
+    :param max_duration: Maximum measured duration in seconds of a task that runs locally
+    :param max_input_bytes: Maximum size in bytes of the results of the parents of a task that runs locally
+    :param durations: Measured durations of the tasks from earlier runs with the task ID as key
+    :param result_sizes: Measured sizes in bytes of the results of the tasks from earlier runs with the task ID as key
+    :param placement_key: Metadata key of the placement hint of a task
+    """
+
+    def __init__(
+            self,
+            max_duration: float = 0.5,
+            max_input_bytes: int = 1024 * 1024,
+            durations: Optional[Dict[str, float]] = None,
+            result_sizes: Optional[Dict[str, int]] = None,
+            placement_key: str = 'placement',
+    ):
+        self._max_duration = max_duration
+        self._max_input_bytes = max_input_bytes
+        self._durations = dict(durations or {})
+        self._result_sizes = dict(result_sizes or {})
+        self._placement_key = placement_key
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        """Return the measured durations of the tasks."""
+        return self._durations
+
+    @property
+    def result_sizes(self) -> Dict[str, int]:
+        """Return the measured sizes of the results of the tasks."""
+        return self._result_sizes
+
+    def record(self, task_id: str, duration: float, result_size: Optional[int] = None):
+        """
+        Record the measured duration and result size of a task
+
+        :param task_id: Task ID
+        :param duration: Duration in seconds
+        :param result_size: Size of the result in bytes, if known
+        """
+        self._durations[task_id] = duration
+        if result_size is not None:
+            self._result_sizes[task_id] = result_size
+
+    def place(self, task: Operator, local_capable: bool = True) -> Placement:
+        """
+        Decide where a task is executed
+
+        :param task: Task
+        :param local_capable: Whether the task can be executed outside of its Lithops executor
+        :return: Placement of the task
+        """
+        hint = task.metadata.get(self._placement_key)
+        if hint is not None:
+            placement = Placement(hint)
+            if placement == Placement.LOCAL and not local_capable:
+                logger.warning(f'Task {task.task_id} can not run locally, running it remotely')
+                return Placement.REMOTE
+            return placement
+
+        if not local_capable or task.task_id not in self._durations:
+            return Placement.REMOTE
+
+        input_bytes = sum(self._result_sizes.get(parent.task_id, 0) for parent in task.parents)
+        if self._durations[task.task_id] <= self._max_duration and input_bytes <= self._max_input_bytes:
+            return Placement.LOCAL
+        return Placement.REMOTE
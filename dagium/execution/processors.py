@@ -1,15 +1,19 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import threading
 from abc import ABC, abstractmethod
-from concurrent.futures import ThreadPoolExecutor, wait
-from typing import List, Dict, Callable, Collection, Sequence
+from concurrent.futures import ThreadPoolExecutor, wait, Future as ConcurrentFuture
+from contextlib import ExitStack
+from typing import Any, List, Dict, Callable, Collection, Sequence, Optional
 
-from dagium import Future, MAX_CONCURRENCY, LithopsFuture
-from dagium.execution.executors import Executor
+from dagium import Future, MAX_CONCURRENCY, ASYNC_MAX_CONCURRENCY, BATCH_LINGER, LithopsFuture
+from dagium.execution.executors import Executor, AsyncExecutor, CallableExecutor
 
-from operators import Operator
-from operators.operator import TaskState
+from dagium.operators import Operator, CallAsync
+from dagium.operators.operator import TaskState
+from dagium.tracing import trace_span
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +46,33 @@ class Processor(ABC):
         """
         pass
 
+    def submit(
+            self,
+            task: Operator,
+            executor: Executor,
+            input_data: Dict[str, Future] = None,
+            on_future_done: Callable[[Operator, Future], None] = None,
+    ) -> ConcurrentFuture:
+        """
+        Submit a single task without waiting for it to finish
+
+        The default implementation processes the task synchronously, subclasses that can run tasks
+        in the background should override it.
+
+        :param task: Task to submit
+        :param executor: Executor to use
+        :param input_data: Input data of the task
+        :param on_future_done: Callback to execute when the future of the task is done
+        :return: A concurrent future that is resolved with the future of the task
+        """
+        ex_future = ConcurrentFuture()
+        try:
+            futures = self.process([task], executor, {task.task_id: input_data}, on_future_done)
+            ex_future.set_result(futures[task.task_id])
+        except Exception as e:
+            ex_future.set_exception(e)
+        return ex_future
+
     def shutdown(self):
         pass
 
@@ -82,25 +113,423 @@ class ThreadPoolProcessor(Processor):
         ex_futures = {}
 
         for task in tasks:
-            logger.info(f"Submitting task {task.task_id}")
-            task.state = TaskState.RUNNING
-            ex_futures[task.task_id] = self._pool.submit(
-                lambda: _process_task(
-                    task,
-                    executor,
-                    input_data[task.task_id] if input_data and task.task_id in input_data else None,
-                    on_future_done
-                )
+            ex_futures[task.task_id] = self.submit(
+                task,
+                executor,
+                input_data[task.task_id] if input_data and task.task_id in input_data else None,
+                on_future_done
             )
 
         wait(ex_futures.values())
 
         return {task_id: ex_future.result() for task_id, ex_future in ex_futures.items()}
 
+    def submit(
+            self,
+            task: Operator,
+            executor: Executor,
+            input_data: Dict[str, Future] = None,
+            on_future_done: Callable[[Operator, Future], None] = None,
+    ) -> ConcurrentFuture:
+        """
+        Submit a single task to the thread pool without waiting for it to finish
+
+        :param task: Task to submit
+        :param executor: Executor to use
+        :param input_data: Input data of the task
+        :param on_future_done: Callback to execute when the future of the task is done
+        :return: A concurrent future that is resolved with the future of the task
+        """
+        logger.info(f"Submitting task {task.task_id}")
+        task.state = TaskState.RUNNING
+        return self._pool.submit(_process_task, task, executor, input_data, on_future_done)
+
     def shutdown(self):
         self._pool.shutdown()
 
 
+class _Group:
+    """CallAsync tasks submitted one by one that wait to be submitted together as a map job."""
+
+    def __init__(self, executor: Executor, lithops_executor: Any, kwargs: Dict[str, Any]):
+        self.executor = executor
+        self.lithops_executor = lithops_executor
+        self.kwargs = kwargs
+        self.tasks: List[CallAsync] = []
+        self.input_data: List[Optional[Dict[str, Future]]] = []
+        self.callbacks: List[Optional[Callable[[Operator, Future], None]]] = []
+        self.ex_futures: List[ConcurrentFuture] = []
+
+
+class BatchingProcessor(ThreadPoolProcessor):
+    """
+    Processor that submits the CallAsync tasks of a batch that share a Lithops executor as a single map job
+
+    Every group of tasks runs as one call of ``executor.map`` with a dispatch function that invokes the
+    function of the corresponding task, so job creation, runtime packaging and status polling are paid once
+    per group and a single driver thread waits for the whole group. The futures of the job are split back
+    into the futures of the tasks. Tasks that can not be grouped are processed as in ThreadPoolProcessor.
+
+    Tasks submitted one by one through submit, as in the event driven mode, are held for the linger time
+    so the tasks submitted right after them can join their group.
+
+    :param max_concurrency: Maximum number of tasks to process at the same time
+    :param min_batch_size: Minimum number of tasks of a group to submit it as a map job
+    :param linger: Seconds a task submitted through submit waits for other tasks to join its group
+    """
+
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, min_batch_size: int = 2, linger: float = BATCH_LINGER):
+        super().__init__(max_concurrency)
+        self._min_batch_size = min_batch_size
+        self._linger = linger
+        self._lock = threading.Lock()
+        self._groups: List[_Group] = []
+
+    def process(
+            self,
+            tasks: Sequence[Operator],
+            executor: Executor,
+            input_data: Dict[str, Dict[str, Future]] = None,
+            on_future_done: Callable[[Operator, Future], None] = None,
+    ) -> dict[str, Future]:
+        """
+        Process a list of tasks
+
+        :param tasks: List of tasks to process
+        :param executor: Executor to use
+        :param input_data: Input data
+        :param on_future_done: Callback to execute every time a future is done
+        :return: Futures of the tasks
+        :raises ValueError: If there are no tasks to process or if there are more tasks than the maximum parallelism
+        """
+        if len(tasks) == 0:
+            raise ValueError('No tasks to process')
+
+        if len(tasks) > self._max_concurrency:
+            raise ValueError(f'Too many tasks to process. Max concurrency is {self._max_concurrency}')
+
+        input_data = input_data or {}
+        groups = self._group(tasks, executor)
+
+        pending = []
+        for group in groups:
+            if len(group) >= self._min_batch_size:
+                logger.info(f"Submitting tasks {', '.join(task.task_id for task in group)} as a single job")
+                for task in group:
+                    task.state = TaskState.RUNNING
+                ex_future = self._pool.submit(
+                    _process_batch,
+                    group,
+                    [input_data.get(task.task_id) for task in group],
+                    [on_future_done] * len(group)
+                )
+                pending.append((group, ex_future))
+            else:
+                for task in group:
+                    pending.append(([task], super().submit(
+                        task, executor, input_data.get(task.task_id), on_future_done
+                    )))
+
+        wait([ex_future for _, ex_future in pending])
+
+        futures = {}
+        for group, ex_future in pending:
+            result = ex_future.result()
+            futures.update(zip((task.task_id for task in group), result if isinstance(result, list) else [result]))
+        return futures
+
+    def submit(
+            self,
+            task: Operator,
+            executor: Executor,
+            input_data: Dict[str, Future] = None,
+            on_future_done: Callable[[Operator, Future], None] = None,
+    ) -> ConcurrentFuture:
+        """
+        Submit a single task without waiting for it to finish
+
+        A task that can be grouped joins the group of the tasks submitted in the last linger seconds that
+        share its Lithops executor and invocation options. The group is submitted when the linger time of its
+        first task is over, or as soon as it reaches the maximum concurrency.
+
+        :param task: Task to submit
+        :param executor: Executor to use
+        :param input_data: Input data of the task
+        :param on_future_done: Callback to execute when the future of the task is done
+        :return: A concurrent future that is resolved with the future of the task
+        """
+        if not _batchable(task, executor):
+            return super().submit(task, executor, input_data, on_future_done)
+
+        ex_future = ConcurrentFuture()
+        with self._lock:
+            group = next((
+                g for g in self._groups
+                if g.executor is executor and g.lithops_executor is task.executor and g.kwargs == task.kwargs
+            ), None)
+            if group is None:
+                group = _Group(executor, task.executor, task.kwargs)
+                self._groups.append(group)
+                timer = threading.Timer(self._linger, self._flush, (group,))
+                timer.daemon = True
+                timer.start()
+            group.tasks.append(task)
+            group.input_data.append(input_data)
+            group.callbacks.append(on_future_done)
+            group.ex_futures.append(ex_future)
+            full = len(group.tasks) >= self._max_concurrency
+        if full:
+            self._flush(group)
+        return ex_future
+
+    def shutdown(self):
+        """
+        Submit the groups that are still waiting for more tasks and stop the thread pool
+        """
+        with self._lock:
+            groups = list(self._groups)
+        for group in groups:
+            self._flush(group)
+        super().shutdown()
+
+    def _flush(self, group: _Group):
+        """
+        Submit a group of tasks collected by submit, as a map job if it is large enough
+
+        :param group: Group of tasks
+        """
+        with self._lock:
+            if group not in self._groups:
+                # Already submitted because it was full or the processor was shut down
+                return
+            self._groups.remove(group)
+
+        if len(group.tasks) < self._min_batch_size:
+            for task, data, callback, ex_future in zip(group.tasks, group.input_data, group.callbacks,
+                                                       group.ex_futures):
+                try:
+                    _chain(super().submit(task, group.executor, data, callback), ex_future)
+                except Exception as e:
+                    ex_future.set_exception(e)
+            return
+
+        logger.info(f"Submitting tasks {', '.join(task.task_id for task in group.tasks)} as a single job")
+        for task in group.tasks:
+            task.state = TaskState.RUNNING
+        try:
+            ex_future = self._pool.submit(_process_batch, group.tasks, group.input_data, group.callbacks)
+        except Exception as e:
+            for f in group.ex_futures:
+                f.set_exception(e)
+            return
+
+        def resolve(done: ConcurrentFuture):
+            if done.exception() is not None:
+                for f in group.ex_futures:
+                    f.set_exception(done.exception())
+            else:
+                for f, future in zip(group.ex_futures, done.result()):
+                    f.set_result(future)
+
+        ex_future.add_done_callback(resolve)
+
+    @staticmethod
+    def _group(tasks: Sequence[Operator], executor: Executor) -> List[List[Operator]]:
+        """
+        Group the tasks that can be submitted in the same map job
+
+        Only CallAsync tasks executed by a CallableExecutor are grouped, and only with tasks that share their
+        Lithops executor and their invocation options. Every other task is returned in a group of its own.
+
+        :param tasks: Tasks to group
+        :param executor: Executor to use
+        :return: Groups of tasks
+        """
+        groups: List[List[Operator]] = []
+        batchable: List[List[Operator]] = []
+        for task in tasks:
+            if not _batchable(task, executor):
+                groups.append([task])
+                continue
+            for group in batchable:
+                if group[0].executor is task.executor and group[0].kwargs == task.kwargs:
+                    group.append(task)
+                    break
+            else:
+                batchable.append([task])
+        return batchable + groups
+
+
+def _batchable(task: Operator, executor: Executor) -> bool:
+    """Return whether a task can be submitted in a map job together with other tasks."""
+    return type(executor) is CallableExecutor and type(task) is CallAsync and not task.args
+
+
+def _chain(source: ConcurrentFuture, target: ConcurrentFuture):
+    """Resolve a concurrent future with the outcome of another one."""
+
+    def copy(done: ConcurrentFuture):
+        if done.exception() is not None:
+            target.set_exception(done.exception())
+        else:
+            target.set_result(done.result())
+
+    source.add_done_callback(copy)
+
+
+class AsyncProcessor:
+    """
+    Processor that runs tasks as asyncio tasks on the running event loop
+
+    :param max_concurrency: Maximum number of tasks running at the same time
+    """
+
+    def __init__(self, max_concurrency=ASYNC_MAX_CONCURRENCY):
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def process(
+            self,
+            tasks: Sequence[Operator],
+            executor: AsyncExecutor,
+            input_data: Dict[str, Dict[str, Future]] = None,
+            on_future_done: Callable[[Operator, Future], None] = None,
+    ) -> dict[str, Future]:
+        """
+        Process a list of tasks
+
+        :param tasks: List of tasks to process
+        :param executor: Executor to use
+        :param input_data: Input data
+        :param on_future_done: Callback to execute every time a future is done
+        :return: Futures of the tasks
+        :raises ValueError: If there are no tasks to process
+        """
+        if len(tasks) == 0:
+            raise ValueError('No tasks to process')
+
+        ex_futures = [
+            self.submit(
+                task,
+                executor,
+                input_data[task.task_id] if input_data and task.task_id in input_data else None,
+                on_future_done
+            )
+            for task in tasks
+        ]
+        futures = await asyncio.gather(*ex_futures)
+
+        return {task.task_id: future for task, future in zip(tasks, futures)}
+
+    def submit(
+            self,
+            task: Operator,
+            executor: AsyncExecutor,
+            input_data: Dict[str, Future] = None,
+            on_future_done: Callable[[Operator, Future], None] = None,
+    ) -> asyncio.Task:
+        """
+        Submit a single task to the running event loop
+
+        :param task: Task to submit
+        :param executor: Executor to use
+        :param input_data: Input data of the task
+        :param on_future_done: Callback to execute when the future of the task is done
+        :return: An asyncio task that is resolved with the future of the task
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        return asyncio.get_running_loop().create_task(
+            _process_task_async(task, executor, self._semaphore, input_data, on_future_done)
+        )
+
+    def shutdown(self):
+        pass
+
+
+async def _process_task_async(
+        task: Operator,
+        executor: AsyncExecutor,
+        semaphore: asyncio.Semaphore,
+        input_data: Dict[str, Future] = None,
+        on_future_done: Callable[[Operator, Future], None] = None,
+) -> Future:
+    """
+    Process a task without blocking the event loop
+
+    :param task: Task to process
+    :param semaphore: Semaphore that limits the number of running tasks
+    :param input_data: Input data
+    :param on_future_done: Callback to execute every time a future is done
+    """
+    async with semaphore:
+        logger.info(f"Submitting task {task.task_id}")
+        task.state = TaskState.RUNNING
+        with trace_span(task, 'process'):
+            future = await executor.execute(task, input_data)
+
+    task.state = TaskState.FAILED if future.error() else TaskState.SUCCESS
+
+    if on_future_done:
+        on_future_done(task, future)
+
+    return future
+
+
+def _dispatch(funcs: List[Callable]) -> Callable:
+    """
+    Build the function of a map job that invokes a different function for every call
+
+    :param funcs: Function of every call of the job
+    :return: Dispatch function
+    """
+
+    def dispatch(index: int, input_data: Dict[str, Future], args, kwargs) -> Any:
+        # Same call convention as call_async with the data of a CallAsync task
+        return funcs[index](input_data, args=args, kwargs=kwargs)
+
+    return dispatch
+
+
+def _process_batch(
+        tasks: List[CallAsync],
+        input_data: List[Optional[Dict[str, Future]]],
+        on_future_done: List[Optional[Callable[[Operator, Future], None]]],
+) -> List[Future]:
+    """
+    Process a group of CallAsync tasks that share a Lithops executor as a single map job
+
+    :param tasks: Tasks to process
+    :param input_data: Input data of every task
+    :param on_future_done: Callback to execute when the future of every task is done
+    :return: Futures of the tasks
+    """
+    lithops_executor = tasks[0].executor
+    input_data = [data or task.input_data for task, data in zip(tasks, input_data)]
+    funcs = [task._wrap(task.functions[0], data) for task, data in zip(tasks, input_data)]
+
+    with ExitStack() as spans:
+        for task in tasks:
+            spans.enter_context(trace_span(task, 'process'))
+        response_futures = lithops_executor.map(
+            _dispatch(funcs),
+            [{'index': i, 'input_data': data, 'args': (), 'kwargs': {}} for i, data in enumerate(input_data)],
+            **tasks[0].kwargs
+        )
+        lithops_executor.wait(response_futures)
+
+    futures = []
+    for task, response_future, callback in zip(tasks, response_futures, on_future_done):
+        future = Future(response_future)
+        if task.tracer is not None:
+            task.tracer.record_calls(task, future)
+        task.state = TaskState.FAILED if future.error() else TaskState.SUCCESS
+        if callback:
+            callback(task, future)
+        futures.append(future)
+    return futures
+
+
 def _process_task(
         task: Operator,
         executor: Executor,
@@ -114,7 +543,8 @@ def _process_task(
     :param input_data: Input data
     :param on_future_done: Callback to execute every time a future is done
     """
-    future = executor.execute(task, input_data)
+    with trace_span(task, 'process'):
+        future = executor.execute(task, input_data)
 
     task.state = TaskState.FAILED if future.error() else TaskState.SUCCESS
 
@@ -0,0 +1,341 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple, Type
+
+from lithops import FunctionExecutor
+from lithops.future import ResponseFuture
+from lithops.utils import FuturesList
+from lithops.wait import ALL_COMPLETED, ALWAYS
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How many times and how late the failed calls are submitted again
+
+    The delay before retry ``n`` grows exponentially from ``backoff`` up to ``max_backoff``, and the given
+    fraction of it is drawn at random so that many failed calls are not submitted again all at once.
+
+    :param max_retries: Maximum number of times a call is submitted again
+    :param backoff: Seconds to wait before the first retry
+    :param multiplier: Factor by which the delay grows with every retry
+    :param max_backoff: Maximum seconds to wait before a retry
+    :param jitter: Fraction of the delay that is random, 1 waits a random time between zero and the delay
+    :param retry_on: Exceptions of the calls that are retried, other failures are final
+    """
+    max_retries: int = 3
+    backoff: float = 1.0
+    multiplier: float = 2.0
+    max_backoff: float = 60.0
+    jitter: float = 1.0
+    retry_on: Tuple[Type[BaseException], ...] = (Exception,)
+
+    def __post_init__(self):
+        if self.max_retries < 0:
+            raise ValueError(f'Maximum number of retries can not be negative, got {self.max_retries}')
+        if not 0 <= self.jitter <= 1:
+            raise ValueError(f'Jitter must be in [0, 1], got {self.jitter}')
+
+    def delay(self, attempt: int) -> float:
+        """
+        Return the seconds to wait before a retry
+
+        :param attempt: Number of the retry, starting at 1
+        :return: Delay in seconds
+        """
+        delay = min(self.max_backoff, self.backoff * self.multiplier ** (attempt - 1))
+        return delay * (1 - self.jitter) + random.uniform(0, delay * self.jitter)
+
+
+@dataclass
+class _Call:
+    """A submitted call and what is needed to submit it again."""
+    func: Callable
+    data: Any
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    is_map: bool
+    retries: int = 0
+    # Monotonic time of the next attempt of a failed call that is waiting for its backoff
+    retry_at: Optional[float] = None
+
+
+class RetryingFunctionExecutor:
+    """
+    Lithops executor that submits the failed calls again, with exponential backoff and jitter
+
+    Wraps a FunctionExecutor and is used in its place by the operators, so an operator gets its own policy by
+    being given its own RetryingFunctionExecutor. When a wait finds that a call failed, the call is submitted again
+    after its backoff until it succeeds or the policy gives up, and its future is replaced in place in the waited
+    list by the future of the new attempt, so the successful calls are never submitted again and the list holds
+    the usual results. A single future is replaced in the lists of futures returned by wait.
+
+    A wait for all the futures returns once every call has succeeded or has been given up. Waits that return
+    sooner, like the polls of the asynchronous executors, report a failed call as not done while it is waiting
+    for its backoff or running again, and submit it when its backoff is over, during that wait or a later one.
+
+    :param executor: Lithops executor that runs the calls
+    :param policy: Retry policy, defaults to RetryPolicy()
+    """
+
+    def __init__(self, executor: FunctionExecutor, policy: RetryPolicy = None):
+        self._executor = executor
+        self._policy = policy or RetryPolicy()
+        # Calls that have not finished for good, the entries of the futures that are dropped vanish with them
+        self._calls: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._retried = 0
+        self._recovered = 0
+        self._exhausted = 0
+        self._wasted_time = 0.0
+        self._backoff_time = 0.0
+
+    @property
+    def executor(self) -> FunctionExecutor:
+        """Return the wrapped Lithops executor."""
+        return self._executor
+
+    @property
+    def policy(self) -> RetryPolicy:
+        """Return the retry policy."""
+        return self._policy
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the number of calls submitted again, the ones that then succeeded and the ones that were given up,
+        and the seconds spent running failed attempts and waiting before retries
+        """
+        with self._lock:
+            return {
+                'retried': self._retried,
+                'recovered': self._recovered,
+                'exhausted': self._exhausted,
+                'wasted_time': self._wasted_time,
+                'backoff_time': self._backoff_time,
+            }
+
+    def call_async(self, func: Callable, data: Any, *args, **kwargs) -> ResponseFuture:
+        """
+        Submit a call and keep what is needed to submit it again
+
+        :param func: Function to call
+        :param data: Input data of the call
+        :return: Future of the call
+        """
+        future = self._executor.call_async(func, data, *args, **kwargs)
+        with self._lock:
+            self._calls[future] = _Call(func, data, args, kwargs, is_map=False)
+        return future
+
+    def map(self, map_function: Callable, map_iterdata, *args, **kwargs) -> FuturesList:
+        """
+        Submit a map job and keep what is needed to submit each of its calls again
+
+        :param map_function: Function to apply to every element
+        :param map_iterdata: Elements of the map
+        :return: Futures of the calls
+        """
+        iterdata = list(map_iterdata)
+        futures = self._executor.map(map_function, iterdata, *args, **kwargs)
+        if len(futures) != len(iterdata):
+            # The calls process chunks of the input and can not be submitted again one by one
+            return futures
+
+        with self._lock:
+            for future, data in zip(futures, iterdata):
+                self._calls[future] = _Call(map_function, data, args, kwargs, is_map=True)
+        return futures
+
+    def wait(self, fs=None, throw_except=True, return_when=ALL_COMPLETED, **kwargs):
+        """
+        Wait for futures, submitting the failed calls again
+
+        :param fs: Futures to wait for, the futures of the calls submitted again are replaced in place
+        :param throw_except: Whether to raise the exception of a call that failed for good
+        :param return_when: When to stop waiting
+        :return: Finished and unfinished futures
+        """
+        if fs is None:
+            return self._executor.wait(fs, throw_except=throw_except, return_when=return_when, **kwargs)
+
+        futures = [fs] if isinstance(fs, ResponseFuture) else fs if isinstance(fs, list) else list(fs)
+        if return_when == ALL_COMPLETED:
+            self._retry(futures)
+            return self._executor.wait(futures, throw_except=throw_except, return_when=return_when, **kwargs)
+
+        finished = self._wait_some(futures, return_when, **kwargs)
+        if throw_except:
+            for future in finished:
+                if future.error:
+                    # Raises the exception of the call
+                    future.result()
+        ids = {id(future) for future in finished}
+        return finished, [future for future in futures if id(future) not in ids]
+
+    def _retry(self, fs: List[ResponseFuture]):
+        """
+        Wait until every call of a list of futures has succeeded or has been given up, submitting failed calls again
+
+        :param fs: Futures to wait for, replaced in place by the future of the last attempt of their call
+        """
+        while True:
+            self._resubmit_due(fs)
+            tracked = [future for future in fs if self._is_tracked(future)]
+            if not tracked:
+                return
+            running = [future for future in tracked if self._retry_at(future) is None]
+            if not running:
+                time.sleep(max(0.0, min(self._retry_at(future) for future in tracked) - time.monotonic()))
+                continue
+            self._executor.wait(running, throw_except=False, return_when=ALL_COMPLETED, show_progressbar=False)
+            self._settle(running)
+
+    def _wait_some(self, fs: List[ResponseFuture], return_when: int, **kwargs) -> List[ResponseFuture]:
+        """
+        Wait until some futures have finished for good, submitting failed calls again
+
+        A retry that is due while the wrapped executor waits for other calls is submitted by the next wait.
+
+        :param fs: Futures to wait for, replaced in place by the future of the next attempt of their call
+        :param return_when: When to stop waiting
+        :return: The futures that succeeded or failed for good
+        """
+        while True:
+            self._resubmit_due(fs)
+            running = [future for future in fs if self._retry_at(future) is None]
+            if not running:
+                if not fs or return_when == ALWAYS:
+                    return []
+                time.sleep(max(0.0, min(self._retry_at(future) for future in fs) - time.monotonic()))
+                continue
+            done, _ = self._executor.wait(running, throw_except=False, return_when=return_when, **kwargs)
+            finished = self._settle(done)
+            if finished or return_when == ALWAYS:
+                return finished
+
+    def _settle(self, futures: List[ResponseFuture]) -> List[ResponseFuture]:
+        """
+        Account for finished futures, scheduling the next attempt of the failed calls the policy retries
+
+        The calls that failed together are submitted again together, after the delay of their next attempt.
+
+        :param futures: Finished futures
+        :return: The futures whose call has finished for good
+        """
+        finished, failed = [], []
+        for future in futures:
+            with self._lock:
+                call = self._calls.get(future)
+            if call is None:
+                finished.append(future)
+            elif future.error and call.retries < self._policy.max_retries and self._retryable(future):
+                if call.retry_at is None:
+                    failed.append((future, call))
+            else:
+                with self._lock:
+                    self._calls.pop(future, None)
+                    if future.error:
+                        self._exhausted += 1
+                    elif call.retries:
+                        self._recovered += 1
+                finished.append(future)
+
+        if failed:
+            delay = self._policy.delay(max(call.retries for _, call in failed) + 1)
+            logger.info(f'Retrying {len(failed)} failed calls in {delay:.2f}s')
+            retry_at = time.monotonic() + delay
+            for _, call in failed:
+                call.retry_at = retry_at
+            with self._lock:
+                self._wasted_time += sum(_duration(future) for future, _ in failed)
+                self._backoff_time += delay
+        return finished
+
+    def _resubmit_due(self, fs: List[ResponseFuture]):
+        """
+        Submit again the failed calls of a list of futures whose backoff is over
+
+        :param fs: Futures, the futures of the calls submitted again are replaced in place
+        """
+        now = time.monotonic()
+        due = dict()
+        with self._lock:
+            for i, future in enumerate(fs):
+                call = self._calls.get(future)
+                if call is not None and call.retry_at is not None and call.retry_at <= now:
+                    due[i] = self._calls.pop(future)
+        if not due:
+            return
+
+        attempts = self._resubmit(due)
+        with self._lock:
+            for i, future in attempts.items():
+                fs[i] = future
+                self._calls[future] = due[i]
+            self._retried += len(due)
+
+    def _resubmit(self, calls: Dict[int, _Call]) -> Dict[int, ResponseFuture]:
+        """
+        Submit calls again, the calls of the same map job in a single map job
+
+        :param calls: Calls to submit with their position in the waited list as key
+        :return: Futures of the new attempts with the position of their call as key
+        """
+        futures = dict()
+        jobs: Dict[Tuple[int, int, int], List[int]] = dict()
+        for i, call in calls.items():
+            call.retries += 1
+            call.retry_at = None
+            if call.is_map:
+                jobs.setdefault((id(call.func), id(call.args), id(call.kwargs)), []).append(i)
+            else:
+                futures[i] = self._executor.call_async(call.func, call.data, *call.args, **call.kwargs)
+        for indexes in jobs.values():
+            call = calls[indexes[0]]
+            job = self._executor.map(call.func, [calls[i].data for i in indexes], *call.args, **call.kwargs)
+            futures.update(zip(indexes, job))
+        return futures
+
+    def _is_tracked(self, future: ResponseFuture) -> bool:
+        """Return whether the call of a future may still be submitted again."""
+        with self._lock:
+            return future in self._calls
+
+    def _retry_at(self, future: ResponseFuture) -> Optional[float]:
+        """Return when the failed call of a future is submitted again, or None if it is not waiting for it."""
+        with self._lock:
+            call = self._calls.get(future)
+        return call.retry_at if call is not None else None
+
+    def _retryable(self, future: ResponseFuture) -> bool:
+        """
+        Check whether the exception of a failed call is retried by the policy
+
+        :param future: Future of the failed call
+        :return: Whether to submit the call again
+        """
+        try:
+            future.result()
+        except Exception as e:
+            return isinstance(e, self._policy.retry_on)
+        return False
+
+    def __getattr__(self, item):
+        return getattr(self._executor, item)
+
+
+def _duration(future: ResponseFuture) -> float:
+    """Return the seconds a failed call ran, or zero if it is not known."""
+    stats = future.stats or {}
+    if 'worker_end_tstamp' in stats and 'worker_start_tstamp' in stats:
+        return max(0.0, stats['worker_end_tstamp'] - stats['worker_start_tstamp'])
+    return 0.0
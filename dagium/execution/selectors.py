@@ -1,8 +1,14 @@
+import logging
+import threading
+import time
 from abc import ABC, abstractmethod
-from typing import List, Iterable, Sized, Sequence, Collection
+from typing import Any, Callable, List, Iterable, Sized, Sequence, Collection, Dict, Optional, Tuple
 
+from dagium import Future, MAX_CONCURRENCY
 from dagium.operators import Operator
 
+logger = logging.getLogger(__name__)
+
 
 class Selector(ABC):
     """
@@ -23,6 +29,27 @@ class Selector(ABC):
         """
         pass
 
+    def delay(self) -> Optional[float]:
+        """
+        Return the seconds after which the selector may select tasks that it did not select in the last selection
+
+        Selectors that hold tasks back until some time passes, like rate limits, return the time until they allow
+        the next task. Drivers never block inside select, they wait for a task to finish at most this long and
+        then select again.
+
+        :return: Seconds to wait, or None if only a finished task can change the selection
+        """
+        return None
+
+    def on_task_done(self, task: Operator, future: Future):
+        """
+        Receive the future of a finished task, selectors that adapt to the execution override it
+
+        :param task: Finished task
+        :param future: Future of the task
+        """
+        pass
+
 
 class AllSelector(Selector):
     """
@@ -61,3 +88,358 @@ class MaxConcurrencySelector(Selector):
         :return: Selected tasks
         """
         return waiting_tasks[:min(len(waiting_tasks), max(0, self._max_concurrency - len(running_tasks)))]
+
+
+class CriticalPathSelector(Selector):
+    """
+    Selects tasks up to a maximum concurrency, prioritizing the tasks with the longest remaining path
+
+    The rank of a task is its own cost plus the largest rank of its children, so the tasks that
+    are selected first are the ones that lie on the critical path of the remaining DAG. The cost
+    of a task is its measured duration if known, otherwise the cost hint from its metadata.
+
+    The durations of the tasks that finish are measured from the stats of their Lithops calls, or
+    from the time since they were selected, and used by the next executions of the DAG. The ranks
+    are cached until the topology of the DAGs of the tasks changes.
+
+    :param max_concurrency: Maximum number of tasks running at the same time
+    :param durations: Measured durations of the tasks from earlier runs with the task ID as key
+    :param cost_key: Metadata key of the static cost hint of a task
+    :param default_cost: Cost of the tasks without a measured duration or a cost hint
+    """
+
+    def __init__(
+            self,
+            max_concurrency: int = MAX_CONCURRENCY,
+            durations: Optional[Dict[str, float]] = None,
+            cost_key: str = 'cost',
+            default_cost: float = 1.0,
+    ):
+        super().__init__()
+        self._max_concurrency = max_concurrency
+        self._durations = dict(durations or {})
+        self._cost_key = cost_key
+        self._default_cost = default_cost
+        self._ranks: Dict[Operator, float] = dict()
+        # Topology version of every DAG whose tasks have cached ranks
+        self._versions: Dict[Any, int] = dict()
+        self._selected: Dict[Operator, float] = dict()
+
+    @property
+    def durations(self) -> Dict[str, float]:
+        """Return the measured durations of the tasks."""
+        return self._durations
+
+    def record(self, task_id: str, duration: float):
+        """
+        Record the measured duration of a task
+
+        :param task_id: Task ID
+        :param duration: Duration in seconds
+        """
+        self._durations[task_id] = duration
+        self._ranks.clear()
+
+    def cost(self, task: Operator) -> float:
+        """
+        Return the cost of a task
+
+        :param task: Task
+        :return: Measured duration, cost hint or default cost of the task
+        """
+        if task.task_id in self._durations:
+            return self._durations[task.task_id]
+        return float(task.metadata.get(self._cost_key, self._default_cost))
+
+    def rank(self, task: Operator) -> float:
+        """
+        Return the length of the longest path from a task to a leaf task, including the task itself
+
+        :param task: Task
+        :return: Rank of the task
+        """
+        self._check_topology(task)
+        # Iterative post-order traversal, deep chains would exceed the recursion limit
+        stack = [(task, False)]
+        while stack:
+            current, expanded = stack.pop()
+            if current in self._ranks:
+                continue
+            if expanded:
+                self._ranks[current] = self.cost(current) + max(
+                    (self._ranks[child] for child in current.children), default=0.0
+                )
+            else:
+                stack.append((current, True))
+                stack.extend((child, False) for child in current.children if child not in self._ranks)
+        return self._ranks[task]
+
+    def select(self, running_tasks: Sequence[Operator], waiting_tasks: Sequence[Operator]) -> Sequence[Operator]:
+        """
+        Select the tasks with the highest rank up to the maximum concurrency
+
+        :param running_tasks:
+        :param waiting_tasks:
+        :return: Selected tasks
+        """
+        slots = max(0, self._max_concurrency - len(running_tasks))
+        ranked = sorted(waiting_tasks, key=lambda task: (-self.rank(task), task.task_id))
+        selected = ranked[:slots]
+        now = time.monotonic()
+        for task in selected:
+            self._selected[task] = now
+        return selected
+
+    def on_task_done(self, task: Operator, future: Future):
+        """
+        Record the measured duration of the tasks executed by a finished operator
+
+        The duration of a fused chain or a pipeline is split evenly between its tasks.
+
+        :param task: Finished task or fused chain of tasks
+        :param future: Future of the task
+        """
+        tasks = [t for t, _ in task.split_future(future)]
+        selected = [self._selected.pop(t) for t in {task, *tasks} if t in self._selected]
+        if future.error():
+            return
+
+        durations = [
+            stats['worker_end_tstamp'] - stats['worker_start_tstamp']
+            for stats in (getattr(f, 'stats', None) or {} for f in future.response_futures())
+            if 'worker_start_tstamp' in stats and 'worker_end_tstamp' in stats
+        ]
+        if durations:
+            duration = max(durations)
+        elif selected:
+            duration = time.monotonic() - min(selected)
+        else:
+            return
+
+        for t in tasks:
+            self._durations[t.task_id] = duration / len(tasks)
+            # Only the ranks of the task and its ancestors include its cost, they are all finished so the
+            # ranks of the waiting tasks stay valid and the walk stops at the ranks already dropped
+            stack = [t]
+            while stack:
+                current = stack.pop()
+                if self._ranks.pop(current, None) is not None:
+                    stack.extend(current.parents)
+
+    def _check_topology(self, task: Operator):
+        """
+        Drop the cached ranks if the topology of a DAG of a task changed since they were computed
+
+        :param task: Task to rank
+        """
+        for dag in task.dags:
+            if self._versions.get(dag) != dag.topology_version:
+                if dag in self._versions:
+                    self._ranks.clear()
+                    self._versions.clear()
+                self._versions[dag] = dag.topology_version
+
+
+class TokenBucket:
+    """
+    Rate limit that allows a burst of operations and then a steady number of operations per second
+
+    :param rate: Operations per second
+    :param burst: Maximum number of operations allowed at once
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        if rate <= 0:
+            raise ValueError(f'Rate must be positive, got {rate}')
+        self._rate = rate
+        self._burst = burst if burst is not None else max(1.0, rate)
+        self._tokens = self._burst
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self._burst, self._tokens + (now - self._updated) * self._rate)
+        self._updated = now
+
+    def try_acquire(self) -> bool:
+        """
+        Take a token if one is available
+
+        :return: Whether a token was taken
+        """
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    def delay(self) -> float:
+        """Return the seconds until the next token is available."""
+        self._refill()
+        return max(0.0, (1 - self._tokens) / self._rate)
+
+
+class AdaptiveConcurrencySelector(Selector):
+    """
+    Selects tasks up to a limit that adapts to the feedback of the backend with AIMD
+
+    Every successful task increases the limit so that it grows by one per limit tasks, and a failed task or an
+    invocation latency above the target divides it by the decrease factor, at most once per limit tasks so a burst
+    of bad signals only counts once. The invocation latency of a task is the time its Lithops calls spent between
+    being submitted and starting in a worker, which includes the queueing in the backend. Without an explicit
+    target, the latency is too high when its moving average exceeds the lowest latency observed times the tolerance.
+    Tasks can also be rate limited per Lithops executor with token buckets.
+
+    :param initial_concurrency: Initial limit
+    :param min_concurrency: Lowest limit
+    :param max_concurrency: Highest limit
+    :param decrease: Factor by which the limit is multiplied when the backend is overloaded
+    :param latency_target: Invocation latency in seconds above which the backend is considered overloaded
+    :param latency_tolerance: Ratio to the lowest observed latency above which the backend is considered
+        overloaded, used when there is no latency target
+    :param rate_limits: Token bucket of every Lithops executor whose invocations are rate limited
+    :param on_limit_change: Callback that receives the new limit every time it changes, to publish it as a metric
+    """
+
+    def __init__(
+            self,
+            initial_concurrency: int = 8,
+            min_concurrency: int = 1,
+            max_concurrency: int = MAX_CONCURRENCY,
+            decrease: float = 0.5,
+            latency_target: Optional[float] = None,
+            latency_tolerance: float = 2.0,
+            rate_limits: Optional[Dict[Any, TokenBucket]] = None,
+            on_limit_change: Optional[Callable[[int], None]] = None,
+    ):
+        super().__init__()
+        if not 1 <= min_concurrency <= max_concurrency:
+            raise ValueError(f'Invalid concurrency range [{min_concurrency}, {max_concurrency}]')
+        if not 0 < decrease < 1:
+            raise ValueError(f'Decrease factor must be in (0, 1), got {decrease}')
+        self._min_concurrency = min_concurrency
+        self._max_concurrency = max_concurrency
+        self._decrease = decrease
+        self._latency_target = latency_target
+        self._latency_tolerance = latency_tolerance
+        self._rate_limits = dict(rate_limits or {})
+        self._on_limit_change = on_limit_change
+
+        self._lock = threading.Lock()
+        self._limit = float(min(max(initial_concurrency, min_concurrency), max_concurrency))
+        self._latency: Optional[float] = None
+        self._min_latency: Optional[float] = None
+        self._completed = 0
+        self._failed = 0
+        # Number of completions to ignore before the limit can be decreased again
+        self._cooldown = 0
+        self._history: List[Tuple[float, int]] = [(time.time(), self.limit)]
+        # Token buckets that held back a task in the last selection
+        self._limited: List[TokenBucket] = []
+
+    @property
+    def limit(self) -> int:
+        """Return the current limit of tasks in flight."""
+        return int(self._limit)
+
+    @property
+    def history(self) -> List[Tuple[float, int]]:
+        """Return the timestamp and value of every change of the limit."""
+        return self._history
+
+    @property
+    def metrics(self) -> Dict[str, Optional[float]]:
+        """Return the current limit, the moving average of the invocation latency and the error rate."""
+        with self._lock:
+            total = self._completed + self._failed
+            return {
+                'limit': self.limit,
+                'latency': self._latency,
+                'error_rate': self._failed / total if total else 0.0,
+            }
+
+    def select(self, running_tasks: Sequence[Operator], waiting_tasks: Sequence[Operator]) -> Sequence[Operator]:
+        """
+        Select tasks up to the current limit and the rate limits of their executors
+
+        Tasks whose executor has no token left are not selected, delay returns the time until a token is available.
+
+        :param running_tasks:
+        :param waiting_tasks:
+        :return: Selected tasks
+        """
+        slots = max(0, self.limit - len(running_tasks))
+        selected = []
+        limited = []
+        for task in waiting_tasks:
+            if len(selected) == slots:
+                break
+            bucket = self._rate_limits.get(task.executor)
+            if bucket is None or bucket.try_acquire():
+                selected.append(task)
+            else:
+                limited.append(bucket)
+        self._limited = limited
+        return selected
+
+    def delay(self) -> Optional[float]:
+        """
+        Return the seconds until a token is available for a task that was held back by a rate limit
+
+        :return: Seconds to wait, or None if no task was held back by a rate limit in the last selection
+        """
+        if not self._limited:
+            return None
+        return min(bucket.delay() for bucket in self._limited)
+
+    def on_task_done(self, task: Operator, future: Future):
+        """
+        Adjust the limit with the outcome and the invocation latency of a finished task
+
+        :param task: Finished task
+        :param future: Future of the task
+        """
+        latencies = [
+            stats['worker_start_tstamp'] - stats['host_submit_tstamp']
+            for stats in (getattr(f, 'stats', None) or {} for f in future.response_futures())
+            if 'worker_start_tstamp' in stats and 'host_submit_tstamp' in stats
+        ]
+        latency = sum(latencies) / len(latencies) if latencies else None
+
+        with self._lock:
+            if future.error():
+                self._failed += 1
+                overloaded = True
+            else:
+                self._completed += 1
+                overloaded = latency is not None and self._observe(latency)
+
+            if overloaded and self._cooldown == 0:
+                self._set_limit(self._limit * self._decrease)
+                self._cooldown = self.limit
+            else:
+                self._cooldown = max(0, self._cooldown - 1)
+                if not overloaded:
+                    self._set_limit(self._limit + 1 / self._limit)
+
+    def _observe(self, latency: float) -> bool:
+        """
+        Update the latency averages with the latency of a task
+
+        :param latency: Invocation latency in seconds
+        :return: Whether the latency shows that the backend is overloaded
+        """
+        self._min_latency = latency if self._min_latency is None else min(self._min_latency, latency)
+        self._latency = latency if self._latency is None else 0.8 * self._latency + 0.2 * latency
+        if self._latency_target is not None:
+            return self._latency > self._latency_target
+        return self._latency > max(self._min_latency * self._latency_tolerance, 1e-3)
+
+    def _set_limit(self, limit: float):
+        previous = self.limit
+        self._limit = min(max(limit, self._min_concurrency), self._max_concurrency)
+        if self.limit != previous:
+            logger.info(f'Concurrency limit changed from {previous} to {self.limit}')
+            self._history.append((time.time(), self.limit))
+            if self._on_limit_change is not None:
+                self._on_limit_change(self.limit)
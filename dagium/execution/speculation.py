@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import logging
+import math
+import threading
+import time
+import weakref
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from lithops import FunctionExecutor
+from lithops.future import ResponseFuture
+from lithops.utils import FuturesList
+from lithops.wait import ALL_COMPLETED, ALWAYS
+
+from dagium import POLL_INTERVAL
+
+logger = logging.getLogger(__name__)
+
+# Map options that make the calls of a job not correspond one to one with the elements of the iterdata
+_CHUNKING_OPTIONS = ('chunksize', 'obj_chunk_size', 'obj_chunk_number')
+
+
+@dataclass
+class _Job:
+    """Calls of a single map job and the completion times observed so far."""
+    func: Callable
+    args: Tuple[Any, ...]
+    kwargs: Dict[str, Any]
+    submitted: float
+    size: int
+    durations: List[float] = field(default_factory=list)
+
+
+@dataclass
+class _Call:
+    """A call of a map job and the backup copy launched for it, if any."""
+    job: _Job
+    data: Any
+    backup: Optional[ResponseFuture] = None
+
+
+class SpeculativeFunctionExecutor:
+    """
+    Lithops executor that relaunches the straggler calls of its map jobs
+
+    Wraps a FunctionExecutor and is used in its place by the operators. While waiting for the calls of a map job,
+    the completion times of the finished calls are tracked, and every call that has been running longer than a
+    percentile of those times multiplied by a factor gets a backup copy. Each call takes the result of whichever
+    copy finishes first, the other copy is ignored since Lithops can not cancel a single call. Single futures and
+    jobs whose calls process chunks of the input are waited for without speculation.
+
+    :param executor: Lithops executor that runs the calls
+    :param quantile: Quantile of the completion times of the finished calls of a job used as the reference time
+    :param multiplier: Number of times the reference time a call must run before a backup copy is launched
+    :param min_done: Fraction of the calls of a job that must finish before any backup copy is launched
+    :param poll_interval: Seconds to wait between two status checks
+    """
+
+    def __init__(
+            self,
+            executor: FunctionExecutor,
+            quantile: float = 0.75,
+            multiplier: float = 1.5,
+            min_done: float = 0.5,
+            poll_interval: float = POLL_INTERVAL,
+    ):
+        if not 0 < quantile <= 1:
+            raise ValueError(f'Quantile must be in (0, 1], got {quantile}')
+        if multiplier < 1:
+            raise ValueError(f'Multiplier must be at least 1, got {multiplier}')
+        self._executor = executor
+        self._quantile = quantile
+        self._multiplier = multiplier
+        self._min_done = min_done
+        self._poll_interval = poll_interval
+
+        # Calls of map jobs that have not been waited for, the entries of the futures that are dropped vanish with them
+        self._calls: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self._launched = 0
+        self._won = 0
+        # End of every job that a backup copy finished first and the original copies that lost
+        self._losers: List[Tuple[float, List[ResponseFuture]]] = list()
+
+    @property
+    def executor(self) -> FunctionExecutor:
+        """Return the wrapped Lithops executor."""
+        return self._executor
+
+    @property
+    def stats(self) -> Dict[str, float]:
+        """
+        Return the number of backup copies launched and won and the time saved by them
+
+        The time saved by a job is how much later its slowest losing copy finished than the job did. For losing
+        copies that are still running the current time is used, so the time saved is a lower bound.
+        """
+        with self._lock:
+            losers = list(self._losers)
+            launched, won = self._launched, self._won
+        saved = 0.0
+        if losers:
+            self._executor.wait(
+                [f for _, fs in losers for f in fs], throw_except=False, return_when=ALWAYS, show_progressbar=False
+            )
+            now = time.time()
+            for job_end, fs in losers:
+                loser_end = max((f.stats or {}).get('worker_end_tstamp', now) for f in fs)
+                saved += max(0.0, loser_end - job_end)
+        return {'launched': launched, 'won': won, 'time_saved': saved}
+
+    def map(self, map_function: Callable, map_iterdata, *args, **kwargs) -> FuturesList:
+        """
+        Submit a map job and keep what is needed to relaunch each of its calls
+
+        :param map_function: Function to apply to every element
+        :param map_iterdata: Elements of the map
+        :return: Futures of the calls
+        """
+        iterdata = list(map_iterdata)
+        futures = self._executor.map(map_function, iterdata, *args, **kwargs)
+        if any(kwargs.get(option) for option in _CHUNKING_OPTIONS) or len(futures) != len(iterdata):
+            return futures
+
+        job = _Job(map_function, args, kwargs, time.time(), len(futures))
+        with self._lock:
+            for future, data in zip(futures, iterdata):
+                self._calls[future] = _Call(job, data)
+        return futures
+
+    def wait(self, fs=None, throw_except=True, return_when=ALL_COMPLETED, **kwargs):
+        """
+        Wait for futures, relaunching the straggler calls of map jobs
+
+        The futures of the calls whose backup copy finished first are replaced in place by the backup copy.
+
+        :param fs: Futures to wait for
+        :param throw_except: Whether to raise the exception of a failed call
+        :param return_when: When to stop waiting
+        :return: Finished and unfinished futures
+        """
+        if isinstance(fs, list) and return_when == ALL_COMPLETED:
+            self._speculate(fs)
+            return self._executor.wait(fs, throw_except=throw_except, return_when=return_when, **kwargs)
+
+        done, not_done = self._executor.wait(fs, throw_except=throw_except, return_when=return_when, **kwargs)
+        # Calls that finish in other waits are not relaunched any more
+        with self._lock:
+            for future in done:
+                self._calls.pop(future, None)
+        return done, not_done
+
+    def _speculate(self, fs: List[ResponseFuture]):
+        """
+        Wait until every call of a list of futures has a finished copy, launching backup copies of the stragglers
+
+        A copy that fails only wins if the other copy fails as well or there is no other copy, so a failed backup
+        never replaces an original that is still running and a failed original does not beat its backup.
+
+        :param fs: Futures to wait for, replaced in place by the copy that finished first
+        """
+        with self._lock:
+            calls = {i: self._calls.pop(f) for i, f in enumerate(fs) if f in self._calls}
+        if not calls:
+            return
+
+        winners: Dict[int, ResponseFuture] = dict()
+        while len(winners) < len(calls):
+            copies = [f for i, call in calls.items() if i not in winners for f in (fs[i], call.backup) if f is not None]
+            done, _ = self._executor.wait(copies, throw_except=False, return_when=ALWAYS, show_progressbar=False)
+            done = {id(f) for f in done}
+            now = time.time()
+
+            for i, call in calls.items():
+                if i in winners:
+                    continue
+                copies = [copy for copy in (fs[i], call.backup) if copy is not None]
+                finished = [copy for copy in copies if id(copy) in done]
+                succeeded = [copy for copy in finished if not copy.error]
+                if succeeded:
+                    winners[i] = succeeded[0]
+                    call.job.durations.append(now - call.job.submitted)
+                elif finished and len(finished) == len(copies):
+                    # Every copy failed, the original reports the failure
+                    winners[i] = fs[i]
+
+            for i, call in calls.items():
+                if i not in winners and call.backup is None and self._is_straggler(call, now):
+                    call.backup = self._executor.map(call.job.func, [call.data], *call.job.args, **call.job.kwargs)[0]
+                    with self._lock:
+                        self._launched += 1
+                    logger.info(f'Launched a backup copy of call {fs[i].call_id} of job {fs[i].job_id}')
+
+            if len(winners) < len(calls):
+                time.sleep(self._poll_interval)
+
+        job_end = time.time()
+        losers = []
+        for i, call in calls.items():
+            if call.backup is not None and winners[i] is call.backup:
+                losers.append(fs[i])
+                fs[i] = call.backup
+        if losers:
+            with self._lock:
+                self._won += len(losers)
+                self._losers.append((job_end, losers))
+
+    def _is_straggler(self, call: _Call, now: float) -> bool:
+        """
+        Check whether a call has been running for much longer than the finished calls of its job
+
+        :param call: Unfinished call
+        :param now: Current time
+        :return: Whether a backup copy of the call should be launched
+        """
+        job = call.job
+        if not job.durations or len(job.durations) < self._min_done * job.size:
+            return False
+        ordered = sorted(job.durations)
+        reference = ordered[max(0, math.ceil(self._quantile * len(ordered)) - 1)]
+        return now - job.submitted > reference * self._multiplier
+
+    def __getattr__(self, item):
+        return getattr(self._executor, item)
@@ -1,10 +1,22 @@
 from __future__ import annotations
 
+import contextlib
+import os
+import shutil
+import sys
+import tempfile
+import threading
 from abc import ABC
-from typing import Any, Union, List, Optional
+from itertools import islice
+from typing import Any, Union, List, Optional, Dict, Callable, Iterable, Iterator, Set, Tuple
 
+from lithops import Storage, FunctionExecutor
 from lithops.future import ResponseFuture
 from lithops.utils import FuturesList
+from lithops.wait import ANY_COMPLETED
+
+from dagium.resultcache import get_result_cache
+from dagium.serializers import Serializer, CloudpickleSerializer
 
 LithopsFuture = Union[ResponseFuture, FuturesList, List[ResponseFuture]]
 
@@ -17,6 +29,103 @@ class Future:
             self.__future = future
 
     def result(self) -> Any:
+        """
+        Return the result of this future
+
+        The result is kept in the shared result cache, so the futures of the same Lithops calls only fetch it
+        once, also when they are resolved from several threads at the same time.
+
+        :return: The result
+        """
+        cache = get_result_cache()
+        key = self._cache_key()
+        if cache is None or key is None:
+            return _dereference(self._raw_result(), chunked=self._chunked())
+        return cache.get(key, self._fetch)
+
+    def reference(self) -> Future:
+        """
+        Return a lightweight reference to the result of this future
+
+        If the task stored its result in a ResultStore, the returned future only holds the location
+        of the stored objects, so it can be shipped to a worker that fetches the data directly.
+        Otherwise this future is returned unchanged.
+
+        :return: Reference to the result
+        """
+        value = self._raw_result()
+        if isinstance(value, ObjectRef):
+            return value
+        elif isinstance(value, list) and value and all(isinstance(v, ObjectRef) for v in value):
+            return ObjectRefList(value, chunked=self._chunked())
+        return self
+
+    def stream(self) -> Iterator[Any]:
+        """
+        Yield the elements of the result of this future
+
+        The elements of a streaming map task are yielded as soon as the chunk that contains them finishes,
+        before the rest of the chunks have finished. A result that is not a list is yielded as a single element.
+
+        :return: Iterator over the elements of the result
+        """
+        future = vars(self).get('_Future__future')
+        if isinstance(future, StreamingFuturesList):
+            yield from future.stream()
+            return
+        value = self.result()
+        if isinstance(value, list):
+            yield from value
+        else:
+            yield value
+
+    def response_futures(self) -> List[ResponseFuture]:
+        """
+        Return the Lithops futures of the calls behind this future
+
+        :return: List of Lithops futures, empty if the result did not come from Lithops calls
+        """
+        future = vars(self).get('_Future__future')
+        if isinstance(future, ResponseFuture):
+            return [future]
+        elif isinstance(future, list):
+            return list(future)
+        return []
+
+    def _chunked(self) -> bool:
+        return isinstance(vars(self).get('_Future__future'), ChunkedFuturesList)
+
+    def _streaming(self) -> bool:
+        """Return whether this is the future of a map task whose chunks are still being submitted or running."""
+        future = vars(self).get('_Future__future')
+        return isinstance(future, StreamingFuturesList) and not future.finished
+
+    def _cache_key(self) -> Optional[tuple]:
+        """Return the key of the result in the result cache, or None if it can not be cached."""
+        future = vars(self).get('_Future__future')
+        if isinstance(future, StreamingFuturesList):
+            # The key must cover every chunk
+            future.join()
+        futures = self.response_futures()
+        if not futures:
+            return None
+        return ('calls', self._chunked()) + tuple((f.executor_id, f.job_id, f.call_id) for f in futures)
+
+    def _fetch(self) -> Tuple[Any, Optional[int]]:
+        """
+        Fetch the result of this future for the result cache
+
+        :return: The result and its size, or None as the size if it is not known
+        """
+        raw = self._raw_result()
+        value = _dereference(raw, chunked=self._chunked())
+        if isinstance(raw, ObjectRef) or (isinstance(raw, list) and any(isinstance(v, ObjectRef) for v in raw)):
+            # The stored objects are cached on their own, only the list that holds them is accounted here
+            return value, sys.getsizeof(value) if isinstance(value, list) else 0
+        sizes = [f.stats.get('func_result_size') for f in self.response_futures()]
+        return value, sum(sizes) if sizes and None not in sizes else None
+
+    def _raw_result(self) -> Any:
         if isinstance(self.__future, ResponseFuture):
             return self.__future.result()
         elif isinstance(self.__future, FuturesList):
@@ -50,5 +159,317 @@ class InputData(Future):
     def result(self) -> Any:
         return self._data
 
+    def reference(self) -> Future:
+        return self
+
+    def _raw_result(self) -> Any:
+        return self._data
+
+    def error(self) -> bool:
+        return False
+
+
+class ObjectRef(Future):
+    """
+    Reference to a task result stored in a Lithops storage
+
+    The result is fetched from the storage the first time it is accessed, in the process that accesses it, and kept
+    in the result cache of that process.
+
+    :param bucket: Bucket of the stored object
+    :param key: Key of the stored object
+    :param config: Lithops configuration used to access the storage, defaults to the configuration
+        of the environment
+    :param serializer: Serializer of the stored object, defaults to CloudpickleSerializer
+    :param mmap: Whether to download the object to a temporary file and memory-map it instead of reading it
+        into memory
+    """
+
+    def __init__(
+            self,
+            bucket: str,
+            key: str,
+            config: Optional[Dict[str, Any]] = None,
+            serializer: Optional[Serializer] = None,
+            mmap: bool = False,
+    ):
+        super().__init__()
+        self._bucket = bucket
+        self._key = key
+        self._config = config
+        self._serializer = serializer
+        self._mmap = mmap
+
+    @property
+    def bucket(self) -> str:
+        """Return the bucket of the stored object."""
+        return self._bucket
+
+    @property
+    def key(self) -> str:
+        """Return the key of the stored object."""
+        return self._key
+
+    def result(self) -> Any:
+        cache = get_result_cache()
+        if cache is None:
+            return self._fetch()[0]
+        return cache.get(('object', self._bucket, self._key), self._fetch)
+
+    def _fetch(self) -> Tuple[Any, Optional[int]]:
+        """
+        Fetch the stored object and deserialize it
+
+        :return: The value and the size of the stored object
+        """
+        # References created before serializers were configurable have neither attribute
+        serializer = getattr(self, '_serializer', None) or CloudpickleSerializer()
+        storage = Storage(config=self._config)
+        if getattr(self, '_mmap', False):
+            path = self._download(storage)
+            try:
+                return serializer.load_file(path), os.path.getsize(path)
+            finally:
+                # The mapping stays valid after the file is removed
+                with contextlib.suppress(OSError):
+                    os.remove(path)
+        data = storage.get_object(self._bucket, self._key)
+        return serializer.loads(data), len(data)
+
+    def _download(self, storage: Storage) -> str:
+        """
+        Download the stored object to a temporary file that is removed once it is mapped
+
+        :param storage: Lithops storage
+        :return: Path of the file
+        """
+        fd, path = tempfile.mkstemp(prefix='dagium-')
+        with os.fdopen(fd, 'wb') as f:
+            body = storage.get_object(self._bucket, self._key, stream=True)
+            if hasattr(body, 'read'):
+                shutil.copyfileobj(body, f, 16 * 1024 * 1024)
+            else:
+                f.write(body)
+        return path
+
+    def reference(self) -> Future:
+        return self
+
+    def error(self) -> bool:
+        return False
+
+    def __repr__(self):
+        return f'ObjectRef({self._bucket}/{self._key})'
+
+
+class ObjectRefList(Future):
+    """
+    List of references to the results of the calls of a map task
+
+    :param refs: References to the stored objects
+    :param chunked: Whether every stored object is a chunk of results that must be flattened
+    """
+
+    def __init__(self, refs: List[ObjectRef], chunked: bool = False):
+        super().__init__()
+        self._refs = refs
+        self._is_chunked = chunked
+
+    @property
+    def refs(self) -> List[ObjectRef]:
+        """Return the references to the stored objects."""
+        return self._refs
+
+    def result(self) -> Any:
+        return _dereference(self._refs, chunked=self._is_chunked)
+
+    def reference(self) -> Future:
+        return self
+
     def error(self) -> bool:
         return False
+
+
+class ElementFuture(Future):
+    """
+    Future of one element of the list returned by another future
+
+    :param future: Future whose result is a list
+    :param index: Index of the element
+    """
+
+    def __init__(self, future: Future, index: int):
+        super().__init__()
+        self._parent = future
+        self._index = index
+
+    def result(self) -> Any:
+        return _dereference(self._parent._raw_result()[self._index])
+
+    def reference(self) -> Future:
+        value = self._parent._raw_result()[self._index]
+        return value if isinstance(value, ObjectRef) else self
+
+    def response_futures(self) -> List[ResponseFuture]:
+        return self._parent.response_futures()
+
+    def error(self) -> bool:
+        return self._parent.error()
+
+
+class ChunkedFuturesList(FuturesList):
+    """
+    Futures of a map task where every call processes a chunk of elements and returns a list of results
+
+    The results of the chunks are flattened by Future.result().
+    """
+
+    def get_result(self, **kwargs) -> List[Any]:
+        return [future.result() for future in self]
+
+
+class StreamingFuturesList(ChunkedFuturesList):
+    """
+    Futures of a map task whose chunks are submitted as a rolling window
+
+    A background thread pulls chunks of elements from the source iterator and keeps at most ``window`` chunks in
+    flight, submitting new chunks as soon as previous ones finish, so the source is never fully materialized.
+    The futures are appended to this list in the order of the chunks, while the task is still running.
+
+    :param executor: Lithops executor
+    :param func: Function that processes a chunk of elements
+    :param elements: Iterator over the elements
+    :param batch_size: Number of elements of every chunk
+    :param window: Maximum number of chunks in flight
+    :param burst: Maximum number of chunks submitted in the same map job, every free slot of the window if not
+        given. A source that produces its elements slowly, like the stream of a running map, should use 1, so
+        every chunk is submitted as soon as its elements are available
+    """
+
+    def __init__(
+            self,
+            executor: FunctionExecutor,
+            func: Callable[[List[Any]], Any],
+            elements: Iterable[Any],
+            batch_size: int,
+            window: int,
+            *args,
+            burst: Optional[int] = None,
+            **kwargs
+    ):
+        super().__init__()
+        self._cond = threading.Condition()
+        self._finished = False
+        self._exception: Optional[BaseException] = None
+        # Positions of the chunks that finished for good
+        self._settled: Set[int] = set()
+        self._feeder = threading.Thread(
+            target=self._feed,
+            args=(executor, func, iter(elements), batch_size, window, burst or window, args, kwargs),
+            name='dagium-map-feeder',
+            daemon=True
+        )
+        self._feeder.start()
+
+    @property
+    def finished(self) -> bool:
+        """Return whether every chunk has been submitted and has finished."""
+        return self._finished
+
+    def join(self, timeout: Optional[float] = None):
+        """
+        Wait until every chunk has been submitted and has finished
+
+        :param timeout: Maximum number of seconds to wait
+        :raises Exception: The exception raised while pulling or submitting the chunks, if any
+        """
+        self._feeder.join(timeout)
+        if self._exception is not None:
+            raise self._exception
+
+    def stream(self) -> Iterator[Any]:
+        """
+        Yield the results of the elements in order, as soon as the chunk that contains them finishes
+
+        :return: Iterator over the results
+        """
+        i = 0
+        while True:
+            with self._cond:
+                while i not in self._settled and not self._finished:
+                    self._cond.wait()
+                if i >= len(self):
+                    break
+                future = self[i]
+            yield from _dereference(future.result())
+            i += 1
+        if self._exception is not None:
+            raise self._exception
+
+    def get_result(self, **kwargs) -> List[Any]:
+        self.join()
+        return super().get_result(**kwargs)
+
+    def _feed(self, executor, func, elements, batch_size, window, burst, args, kwargs):
+        try:
+            chunks = iter(lambda: list(islice(elements, batch_size)), [])
+            in_flight = []
+            positions: Dict[ResponseFuture, int] = dict()
+            exhausted = False
+            while not exhausted or in_flight:
+                free = min(window - len(in_flight), burst)
+                batch = list(islice(chunks, free)) if not exhausted and free > 0 else []
+                exhausted = exhausted or len(batch) < free
+                if batch:
+                    futures = executor.map(func, [(chunk,) for chunk in batch], *args, **kwargs)
+                    with self._cond:
+                        positions.update((future, len(self) + i) for i, future in enumerate(futures))
+                        self.extend(futures)
+                        self._cond.notify_all()
+                    in_flight.extend(futures)
+                if in_flight:
+                    waited = list(in_flight)
+                    done, not_done = executor.wait(
+                        in_flight,
+                        throw_except=False,
+                        return_when=ANY_COMPLETED,
+                        show_progressbar=False
+                    )
+                    with self._cond:
+                        # A retrying executor replaces the future of a failed chunk by the future of its next attempt
+                        for old, new in zip(waited, in_flight):
+                            if new is not old:
+                                positions[new] = positions.pop(old)
+                                self[positions[new]] = new
+                        for future in done:
+                            self._settled.add(positions.pop(future))
+                        self._cond.notify_all()
+                    in_flight = list(not_done)
+        except BaseException as e:
+            self._exception = e
+        finally:
+            with self._cond:
+                self._finished = True
+                self._cond.notify_all()
+
+    def __reduce__(self):
+        # Ship the futures of the finished chunks, never the feeder thread
+        self.join()
+        return ChunkedFuturesList, (list(self),)
+
+
+def _dereference(value: Any, chunked: bool = False) -> Any:
+    """
+    Fetch the stored results referenced by a value
+
+    :param value: Result or list of results, possibly ObjectRefs
+    :param chunked: Whether the value is a list of chunks of results that must be flattened
+    :return: The dereferenced value
+    """
+    if isinstance(value, ObjectRef):
+        return value.result()
+    if isinstance(value, list):
+        value = [v.result() if isinstance(v, ObjectRef) else v for v in value]
+        if chunked:
+            value = [element for chunk in value for element in chunk]
+    return value
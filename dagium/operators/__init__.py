@@ -2,3 +2,6 @@ from dagium.operators.callasync import CallAsync
 from dagium.operators.map import Map
 from dagium.operators.mapreduce import MapReduce
 from dagium.operators.operator import Operator, TaskState
+from dagium.operators.fused import FusedCallAsync
+from dagium.operators.expand import Expand
+from dagium.operators.pipelined import PipelinedMap
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import Any, Dict, Callable, Union, Optional
+import functools
+from typing import Any, Dict, Callable, Union, Optional, Tuple
 
 from dagium import Future
 from dagium.operators.operator import Operator
@@ -41,6 +42,11 @@ class CallAsync(Operator):
         )
         self._func = func
 
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return (self._func,)
+
     def __call__(
             self,
             input_data: Dict[str, Future] = None,
@@ -60,6 +66,16 @@ class CallAsync(Operator):
             **self._kwargs
         )
 
+    def local_call(self, input_data: Dict[str, Future] = None) -> Callable[[], Any]:
+        """
+        Return a function that executes the operator outside of its Lithops executor
+
+        :param input_data: Input data
+        :return: Function without arguments that returns the result of the operator
+        """
+        input_data = input_data or self._input_data
+        return functools.partial(self._wrap(self._func, input_data), input_data, args=(), kwargs={})
+
     def _wrap(
             self,
             func: Callable[[Dict[str, Future], ...], Any],
@@ -72,7 +88,11 @@ class CallAsync(Operator):
         :param in_data: Input data
         :return: Wrapped function
         """
+        store = self._result_store
+        task_id = self._task_id
+
         def wrapped_func(input_data: Dict[str, Future], *args, **kwargs) -> Any:
-            return func(input_data, *args, **kwargs)
+            result = func(input_data, *args, **kwargs)
+            return store.put(result, task_id) if store is not None else result
 
         return wrapped_func
@@ -0,0 +1,161 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from lithops import FunctionExecutor
+
+from dagium import Future, InputData
+from dagium.operators.callasync import CallAsync
+from dagium.operators.operator import Operator
+
+
+class Expand(CallAsync):
+    """
+    Operator that splits its work into a number of tasks that is only known at runtime
+
+    The partition function runs first and returns the list of elements to process, for example the keys of the
+    objects under a prefix or the byte ranges of a file. Then the elements are grouped in chunks so that every
+    chunk takes about the target duration, and a new task that applies the map function to every element of its
+    chunk is inserted into the running DAG for each chunk. The children of the operator become children of the new
+    tasks, so they wait for all of them and receive their results, one list per chunk. If there are no elements a
+    single task with an empty chunk is inserted, so the children always receive the results of the chunks.
+
+    :param task_id: Task ID
+    :param executor: Executor to use
+    :param partition_func: Function called with the input data that returns the list of elements to process
+    :param map_func: Function applied to every element
+    :param input_data: Input data for the operator
+    :param metadata: Metadata to pass to the operator
+    :param args: Arguments to pass to the operator
+    :param target_duration: Seconds every chunk should take
+    :param element_duration: Seconds it takes to process an element, or function that returns them for a given
+        element. If not given every element is processed in its own task
+    :param max_tasks: Maximum number of tasks to insert
+    :param kwargs: Keyword arguments to pass to the operator
+    """
+
+    def __init__(
+            self,
+            task_id: str,
+            executor: FunctionExecutor,
+            partition_func: Callable[[Dict[str, Future], ...], List[Any]],
+            map_func: Callable[[Any], Any],
+            input_data: Optional[Dict[str, Future] | Future] = None,
+            metadata: Optional[Dict[str, Any]] = None,
+            *args,
+            target_duration: float = 1.0,
+            element_duration: Optional[Union[float, Callable[[Any], float]]] = None,
+            max_tasks: Optional[int] = None,
+            **kwargs
+    ):
+        super().__init__(
+            task_id,
+            executor,
+            partition_func,
+            input_data,
+            metadata,
+            *args,
+            **kwargs
+        )
+        if target_duration <= 0:
+            raise ValueError(f'Target duration must be positive, got {target_duration}')
+        if max_tasks is not None and max_tasks < 1:
+            raise ValueError(f'Maximum number of tasks must be positive, got {max_tasks}')
+        self._map_func = map_func
+        self._target_duration = target_duration
+        self._element_duration = element_duration
+        self._max_tasks = max_tasks
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return self._func, self._map_func
+
+    def expand(self, future: Future) -> List[Operator]:
+        """
+        Create a task for every chunk of the elements returned by the partition function
+
+        Every task receives its own chunk as input data, instead of the whole result of this operator.
+
+        :param future: Future of the partition function
+        :return: Tasks to insert after this operator, named after it with the index of their chunk
+        """
+        elements = list(future.result())
+        tasks = []
+        for i, chunk in enumerate(self._chunks(elements) or [[]]):
+            tasks.append(_ChunkTask(
+                f'{self._task_id}/{i}',
+                self._executor,
+                _chunk_func(self._map_func, self._task_id),
+                {self._task_id: InputData(chunk)},
+                None,
+                *self._args,
+                **self._kwargs
+            ))
+        return tasks
+
+    def _chunks(self, elements: List[Any]) -> List[List[Any]]:
+        """
+        Group the elements in chunks of about the target duration
+
+        :param elements: Elements to process
+        :return: Chunks of consecutive elements
+        """
+        if not elements:
+            return []
+
+        if self._element_duration is None:
+            chunks = [[element] for element in elements]
+        elif callable(self._element_duration):
+            chunks, chunk, duration = [], [], 0.0
+            for element in elements:
+                element_duration = self._element_duration(element)
+                if chunk and duration + element_duration > self._target_duration:
+                    chunks.append(chunk)
+                    chunk, duration = [], 0.0
+                chunk.append(element)
+                duration += element_duration
+            chunks.append(chunk)
+        else:
+            size = max(1, int(self._target_duration // self._element_duration))
+            chunks = [elements[i:i + size] for i in range(0, len(elements), size)]
+
+        if self._max_tasks is not None and len(chunks) > self._max_tasks:
+            # Merge consecutive chunks, keeping the number of elements of every task balanced
+            size = math.ceil(len(elements) / self._max_tasks)
+            chunks = [elements[i:i + size] for i in range(0, len(elements), size)]
+        return chunks
+
+
+class _ChunkTask(CallAsync):
+    """
+    Task of a chunk of the elements of an Expand operator
+
+    The task always runs with its chunk as input data. The result of the Expand operator, which the DAG executor
+    passes as the input data of its children, is not sent to the task. The chunk is part of the cache key of the
+    task, like the input data of a root task.
+    """
+
+    def __call__(self, input_data: Dict[str, Future] = None, *args, **kwargs):
+        return super().__call__(self._input_data, *args, **kwargs)
+
+    def local_call(self, input_data: Dict[str, Future] = None) -> Callable[[], Any]:
+        return super().local_call(self._input_data)
+
+
+def _chunk_func(map_func: Callable[[Any], Any], parent_id: str) -> Callable:
+    """
+    Build the function of the task that processes a chunk of the elements of an Expand operator
+
+    The cache key of the task covers its chunk, which is its input data.
+
+    :param map_func: Function applied to every element
+    :param parent_id: Task ID of the Expand operator
+    :return: Function of the task
+    """
+
+    def chunk_func(input_data: Dict[str, Future], *args, **kwargs) -> List[Any]:
+        return [map_func(element) for element in input_data[parent_id].result()]
+
+    return chunk_func
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import functools
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from lithops.future import ResponseFuture
+
+from dagium import Future, InputData, ObjectRef, ElementFuture, ResultStore
+from dagium.operators.callasync import CallAsync
+from dagium.operators.operator import Operator
+
+
+class FusedCallAsync(Operator):
+    """
+    Operator that executes a linear chain of CallAsync tasks in a single invocation
+
+    The remote function calls the functions of the tasks in order, passing the result of every task as the
+    input data of the next one, and returns the list of the results of all the tasks, so the future of each
+    task can still be reported. The state and result store of the fused operator are propagated to the tasks.
+
+    :param tasks: Chain of tasks, every task must be the only child of the previous one
+    :raises ValueError: If the tasks do not form a chain on the same executor with the same arguments
+    """
+
+    def __init__(self, tasks: List[CallAsync]):
+        if len(tasks) < 2:
+            raise ValueError('A fused chain needs at least two tasks')
+        head = tasks[0]
+        for parent, child in zip(tasks, tasks[1:]):
+            if parent.children != {child} or child.parents != {parent}:
+                raise ValueError(f'Tasks {parent.task_id} and {child.task_id} are not a link of a linear chain')
+            if child.executor is not head.executor or child.args != head.args or child.kwargs != head.kwargs:
+                raise ValueError(f'Task {child.task_id} runs with a different executor or arguments than {head.task_id}')
+
+        super().__init__(
+            '+'.join(task.task_id for task in tasks),
+            head.executor,
+            head.input_data,
+            head.metadata,
+            *head.args,
+            **head.kwargs
+        )
+        self._tasks = tasks
+
+    @property
+    def tasks(self) -> List[CallAsync]:
+        """Return the fused tasks in execution order."""
+        return self._tasks
+
+    @property
+    def parents(self) -> Set[Operator]:
+        """Return the parents of the first task of the chain."""
+        return self._tasks[0].parents
+
+    @property
+    def children(self) -> Set[Operator]:
+        """Return the children of the last task of the chain."""
+        return self._tasks[-1].children
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return tuple(func for task in self._tasks for func in task.functions)
+
+    @Operator.state.setter
+    def state(self, value):
+        """Set the state of the fused operator and of all its tasks."""
+        self._state = value
+        for task in self._tasks:
+            task.state = value
+
+    @Operator.result_store.setter
+    def result_store(self, value: Optional[ResultStore]):
+        """Set the result store of the fused operator and of all its tasks."""
+        self._result_store = value
+        for task in self._tasks:
+            task.result_store = value
+
+    def split_future(self, future: Future) -> List[Tuple[Operator, Future]]:
+        """
+        Split the future of the fused invocation into the futures of the tasks
+
+        :param future: Future of the fused invocation
+        :return: List of tasks and their futures
+        """
+        return [(task, ElementFuture(future, i)) for i, task in enumerate(self._tasks)]
+
+    def __call__(
+            self,
+            input_data: Dict[str, Future] = None,
+            *args,
+            **kwargs
+    ) -> ResponseFuture:
+        """
+        Execute the chain and return a future object.
+
+        :param input_data: Input data of the first task
+        :return: the future object
+        """
+        input_data = input_data or self._input_data
+        return self._executor.call_async(
+            self._wrap(input_data),
+            {'input_data': input_data, 'args': args, 'kwargs': kwargs},
+            *self._args,
+            **self._kwargs
+        )
+
+    def local_call(self, input_data: Dict[str, Future] = None) -> Callable[[], List[Any]]:
+        """
+        Return a function that executes the chain outside of its Lithops executor
+
+        :param input_data: Input data of the first task
+        :return: Function without arguments that returns the list of the results of the tasks
+        """
+        input_data = input_data or self._input_data
+        return functools.partial(self._wrap(input_data), input_data)
+
+    def _wrap(self, in_data: Dict[str, Future]) -> Callable:
+        """
+        Compose the wrapped functions of the tasks into a single function
+
+        :param in_data: Input data
+        :return: Composed function
+        """
+        steps = [(task.task_id, task._wrap(task.functions[0], None)) for task in self._tasks]
+
+        def wrapped_func(input_data: Dict[str, Future], *args, **kwargs) -> List[Any]:
+            results = []
+            for task_id, func in steps:
+                result = func(input_data, *args, **kwargs)
+                results.append(result)
+                input_data = {task_id: result if isinstance(result, ObjectRef) else InputData(result)}
+            return results
+
+        return wrapped_func
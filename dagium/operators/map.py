@@ -1,9 +1,9 @@
 from __future__ import annotations
 
 import inspect
-from typing import Any, Callable, Union, Dict, Optional
+from typing import Any, Callable, Union, Dict, Optional, Tuple, Iterator, List
 
-from dagium import Future
+from dagium import Future, MAP_WINDOW, StreamingFuturesList, InputData, ObjectRefList
 from lithops import FunctionExecutor
 from lithops.utils import FuturesList
 
@@ -20,6 +20,17 @@ class Map(Operator):
     :param input_data: Input data for the operator
     :param metadata: Metadata to pass to the operator
     :param args: Arguments to pass to the operator
+    :param batch_size: If given, map over the elements of the input data instead of over the parent tasks.
+        The elements are grouped in chunks of this size, every call processes one chunk and the chunks
+        are submitted as a rolling window, the map function receives each element. When the only parent is a
+        Map with a batch size whose only child is this map, the DagExecutor pipelines both maps and this map
+        consumes the results of the parent as its chunks finish. Any other child waits for the last chunk
+    :param window: Maximum number of chunks in flight when ``batch_size`` is given
+    :param partitioned: If true, map over the partitions of the results of the parent tasks instead of over the
+        parent tasks, so every call only depends on one call of a parent map. The map function receives the
+        partition and the ID of its parent. When the only parent is a Map whose only child is this map, the
+        DagExecutor pipelines both maps and every partition is submitted as soon as the matching partition of the
+        parent finishes
     :param kwargs: Keyword arguments to pass to the operator
     """
 
@@ -31,6 +42,9 @@ class Map(Operator):
             input_data: Optional[Dict[str, Future] | Future] = None,
             metadata: Optional[Dict[str, Any]] = None,
             *args,
+            batch_size: Optional[int] = None,
+            window: int = MAP_WINDOW,
+            partitioned: bool = False,
             **kwargs
     ):
         super().__init__(
@@ -41,7 +55,29 @@ class Map(Operator):
             *args,
             **kwargs
         )
+        if batch_size is not None and batch_size < 1:
+            raise ValueError(f'Batch size must be positive, got {batch_size}')
+        if partitioned and batch_size is not None:
+            raise ValueError('A partitioned map can not have a batch size')
         self._map_func = map_func
+        self._batch_size = batch_size
+        self._window = window
+        self._partitioned = partitioned
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return (self._map_func,)
+
+    @property
+    def batch_size(self) -> Optional[int]:
+        """Return the number of elements of every chunk, or None if the map is over the parent tasks."""
+        return self._batch_size
+
+    @property
+    def partitioned(self) -> bool:
+        """Return whether the map is over the partitions of the results of the parent tasks."""
+        return self._partitioned
 
     def __call__(
             self,
@@ -58,7 +94,24 @@ class Map(Operator):
 
         input_data = input_data or self._input_data
 
-        iterdata = [(v, k) for k, v in input_data.items()]
+        if self._batch_size is not None:
+            # The chunks of a parent that is still running become available one by one
+            streamed = any(isinstance(value, Future) and value._streaming() for value in input_data.values())
+            return StreamingFuturesList(
+                self._executor,
+                self._wrap_batch(self._map_func),
+                self._elements(input_data),
+                self._batch_size,
+                self._window,
+                *self._args,
+                burst=1 if streamed else None,
+                **self._kwargs
+            )
+
+        if self._partitioned:
+            iterdata = [(part, k) for k in sorted(input_data) for part in self._partitions(input_data[k])]
+        else:
+            iterdata = [(v, k) for k, v in input_data.items()]
 
         return self._executor.map(
             self._wrap(self._map_func, input_data),
@@ -80,7 +133,60 @@ class Map(Operator):
         :return: Wrapped function
         """
 
+        store = self._result_store
+        task_id = self._task_id
+
         def wrapped_func(input_data: Future, parent_id: Optional[str] = None, *args, **kwargs):
-            return func(input_data, parent_id, *args, **kwargs)
+            result = func(input_data, parent_id, *args, **kwargs)
+            return store.put(result, task_id) if store is not None else result
+
+        return wrapped_func
+
+    def _wrap_batch(self, func: Callable[[Any, ...], Any]) -> Callable[[List[Any]], Any]:
+        """
+        Wrap a function to be applied to every element of a chunk
+
+        :param func: Function to wrap
+        :return: Wrapped function
+        """
+        store = self._result_store
+        task_id = self._task_id
+
+        def wrapped_func(chunk: List[Any], *args, **kwargs) -> Any:
+            result = [func(element, *args, **kwargs) for element in chunk]
+            return store.put(result, task_id) if store is not None else result
 
         return wrapped_func
+
+    @staticmethod
+    def _partitions(future: Future) -> List[Future]:
+        """
+        Split the result of a parent task into the results of its calls
+
+        :param future: Future of the parent task
+        :return: Future of every call, or of every element of the result if it did not come from Lithops calls
+        """
+        if isinstance(future, ObjectRefList):
+            return list(future.refs)
+        futures = future.response_futures() if type(future) is Future else []
+        if futures:
+            return [Future(f) for f in futures]
+        return [InputData(value) for value in future.result()]
+
+    @staticmethod
+    def _elements(input_data: Dict[str, Any]) -> Iterator[Any]:
+        """
+        Iterate lazily over the elements of the input data
+
+        Futures yield the elements of their results, streaming parents yield their elements as their chunks finish.
+        Any other value, like a generator given as input data, is iterated directly.
+
+        :param input_data: Input data
+        :return: Iterator over the elements
+        """
+        for key in sorted(input_data):
+            value = input_data[key]
+            if isinstance(value, Future):
+                yield from value.stream()
+            else:
+                yield from value
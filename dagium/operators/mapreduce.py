@@ -1,17 +1,34 @@
 from __future__ import annotations
 
-from typing import Any, Callable, Dict, Optional
+import zlib
+from typing import Any, Callable, Dict, Optional, Tuple, List, Iterable
 
-from dagium import Future
+from dagium import Future, ObjectRefList
 from lithops import FunctionExecutor
+from lithops.future import ResponseFuture
 from lithops.utils import FuturesList
 
 from dagium.operators.operator import Operator
 
 
+
 class MapReduce(Operator):
     """
-    Map operator
+    MapReduce operator
+
+    The map function is applied to every parent task like in the Map operator. Without ``num_reducers``,
+    the reduce function receives the list of map results and returns a single value. With ``num_reducers``,
+    the map function returns an iterable of (key, value) pairs that are shuffled to ``num_reducers`` partitions
+    by key, and the reduce function is called with every key and the list of its values. The result is then
+    the list of dictionaries of reduced values of the partitions. A keyed shuffle requires a result store: every
+    map task stores each of its partitions as a separate object, so a reducer downloads only its partition.
+
+    With ``fan_in``, no reducer receives more than ``fan_in`` partial results. Map results are reduced in
+    a tree: intermediate levels apply the combiner, or the reduce function if there is no combiner, to groups
+    of ``fan_in`` partial results until a single group is left for the final reduction. In keyed mode the
+    combiner is also applied to the values of every key inside the map tasks. The combiner must return a
+    value of the same kind as its inputs, ``combiner(values)`` without keys and ``combiner(key, values)``
+    with keys.
 
     :param task_id: Task ID
     :param executor: Executor to use
@@ -20,6 +37,9 @@ class MapReduce(Operator):
     :param input_data: Input data for the operator
     :param metadata: Metadata to pass to the operator
     :param args: Arguments to pass to the operator
+    :param combiner: Function that partially reduces values before the final reduction
+    :param fan_in: Maximum number of partial results received by a reducer, defaults to all of them
+    :param num_reducers: Number of partitions of a keyed shuffle, defaults to an unkeyed reduction
     :param kwargs: Keyword arguments to pass to the operator
     """
 
@@ -32,6 +52,9 @@ class MapReduce(Operator):
             input_data: Optional[Dict[str, Future] | Future] = None,
             metadata: Optional[Dict[str, Any]] = None,
             *args,
+            combiner: Optional[Callable] = None,
+            fan_in: Optional[int] = None,
+            num_reducers: Optional[int] = None,
             **kwargs
     ):
         super().__init__(
@@ -42,38 +65,100 @@ class MapReduce(Operator):
             *args,
             **kwargs
         )
+        if fan_in is not None and fan_in < 2:
+            raise ValueError(f'Reducer fan-in must be at least 2, got {fan_in}')
+        if num_reducers is not None and num_reducers < 1:
+            raise ValueError(f'Number of reducers must be positive, got {num_reducers}')
         self._map_func = map_func
         self._reduce_func = reduce_func
+        self._combiner = combiner
+        self._fan_in = fan_in
+        self._num_reducers = num_reducers
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return tuple(f for f in (self._map_func, self._reduce_func, self._combiner) if f is not None)
 
-    # TODO: Implement this, it's not working yet
     def __call__(
             self,
             input_data: Dict[str, Future] = None,
             *args,
             **kwargs
-    ) -> FuturesList:
+    ) -> ResponseFuture | FuturesList:
         """
         Execute the operator and return a future object.
 
+        The inputs of a reducer are only known once the tasks that produce them have finished, so the calling
+        thread waits for the map stage and the intermediate reduction levels. Only the final reduction is
+        returned without waiting.
+
         :param input_data: Input data
-        :return: the future object
+        :return: the future of the final reducer, or the futures of the reducers of every partition
+        :raises ValueError: If the shuffle is keyed and the task has no result store
         """
-
+        if self._num_reducers is not None and self._result_store is None:
+            raise ValueError(f'The keyed shuffle of task {self._task_id} requires a result store')
         input_data = input_data or self._input_data
 
-        if isinstance(input_data, dict):
-            iterdata = [(v, k) for k, v in input_data.items()]
-        else:
-            iterdata = input_data
-
-        return self._executor.map_reduce(
+        iterdata = [(v, k) for k, v in input_data.items()]
+        map_futures = self._executor.map(
             self._wrap(self._map_func, input_data),
             iterdata,
-            self._reduce_func,
             *self._args,
             **self._kwargs
         )
 
+        num_partitions = self._num_reducers or 1
+        partials = [self._partials(map_futures, p) for p in range(num_partitions)]
+        fan_in = self._fan_in or max(len(p) for p in partials)
+
+        # Combine groups of partial results until every partition fits in a single reducer
+        while any(len(p) > fan_in for p in partials):
+            groups = [
+                (p, group[i:i + fan_in])
+                for p, group in enumerate(partials)
+                for i in range(0, len(group), fan_in)
+            ]
+            futures = self._executor.map(
+                self._wrap_reduce(final=False),
+                [(group,) for _, group in groups],
+                *self._args,
+                **self._kwargs
+            )
+            partials = [[] for _ in range(num_partitions)]
+            for (p, _), future in zip(groups, futures):
+                partials[p].append(future)
+            partials = [self._partials(group) for group in partials]
+
+        futures = self._executor.map(
+            self._wrap_reduce(final=True),
+            [(group,) for group in partials],
+            *self._args,
+            **self._kwargs
+        )
+        return futures if self._num_reducers else futures[0]
+
+    def _partials(self, futures: List[ResponseFuture], partition: int = 0) -> List[Future]:
+        """
+        Wait for a level of futures and build the partial results of a partition from them
+
+        Stored results are passed as references, so reducers fetch them directly from the storage.
+
+        :param futures: Futures of the map tasks or of the previous reduction level
+        :param partition: Partition to take from every partitioned result
+        :return: Partial results for the reducers
+        """
+        if not futures:
+            return []
+        self._executor.wait(futures, show_progressbar=False)
+        partials = []
+        for future in futures:
+            ref = Future(future).reference() if self._result_store is not None else Future(future)
+            # Every partition of a keyed map result was stored as a separate object
+            partials.append(ref.refs[partition] if isinstance(ref, ObjectRefList) else ref)
+        return partials
+
     def _wrap(
             self,
             func: Callable[[Future, ...], Any] | Callable[[Future, str, ...], Any],
@@ -82,12 +167,83 @@ class MapReduce(Operator):
         """
         Wrap a function to be executed in the operator
 
+        In keyed mode the wrapped function partitions the (key, value) pairs returned by the function and
+        applies the combiner to the values of every key.
+
         :param func: Function to wrap
         :param in_data: Input data
         :return: Wrapped function
         """
+        store = self._result_store
+        task_id = self._task_id
+        combiner = self._combiner
+        num_reducers = self._num_reducers
 
         def wrapped_func(input_data: Future, parent_id: Optional[str] = None, *args, **kwargs) -> Any:
-            return func(input_data, parent_id, *args, **kwargs)
+            result = func(input_data, parent_id, *args, **kwargs)
+            if num_reducers is None:
+                return store.put(result, task_id) if store is not None else result
+
+            partitions = _partition(result, num_reducers)
+            if combiner is not None:
+                partitions = [{key: [combiner(key, values)] for key, values in p.items()} for p in partitions]
+            return [store.put(p, task_id) for p in partitions]
+
+        return wrapped_func
+
+    def _wrap_reduce(self, final: bool) -> Callable[[List[Future]], Any]:
+        """
+        Wrap the reduce function or the combiner to be applied to a group of partial results
+
+        :param final: Whether the wrapped function is the final reduction of a partition
+        :return: Wrapped function
+        """
+        store = self._result_store
+        task_id = self._task_id
+        reduce_func = self._reduce_func
+        combiner = self._combiner or (None if self._num_reducers else self._reduce_func)
+        keyed = self._num_reducers is not None
+
+        def wrapped_func(partials: List[Future]) -> Any:
+            values = [future.result() for future in partials]
+
+            if not keyed:
+                result = reduce_func(values) if final else combiner(values)
+            else:
+                merged = dict()
+                for part in values:
+                    for key, key_values in part.items():
+                        merged.setdefault(key, []).extend(key_values)
+                if final:
+                    result = {key: reduce_func(key, key_values) for key, key_values in merged.items()}
+                elif combiner is not None:
+                    result = {key: [combiner(key, key_values)] for key, key_values in merged.items()}
+                else:
+                    result = merged
+
+            return store.put(result, task_id) if store is not None else result
 
         return wrapped_func
+
+
+def _partition(pairs: Iterable[Tuple[Any, Any]], num_partitions: int) -> List[Dict[Any, List[Any]]]:
+    """
+    Group (key, value) pairs by key into partitions
+
+    :param pairs: Pairs to partition
+    :param num_partitions: Number of partitions
+    :return: Dictionary from key to list of values of every partition
+    """
+    partitions = [dict() for _ in range(num_partitions)]
+    for key, value in pairs:
+        partitions[_stable_hash(key) % num_partitions].setdefault(key, []).append(value)
+    return partitions
+
+
+def _stable_hash(key: Any) -> int:
+    """Hash a key consistently across worker processes, unlike the salted built-in hash of strings."""
+    if isinstance(key, bytes):
+        return zlib.crc32(key)
+    if isinstance(key, str):
+        return zlib.crc32(key.encode())
+    return zlib.crc32(repr(key).encode())
@@ -2,12 +2,16 @@ from __future__ import annotations
 
 from abc import abstractmethod, ABC
 from enum import Enum
-from typing import Any, Dict, Set, List, Optional
+from typing import Any, Callable, Dict, Set, List, Optional, Tuple, TYPE_CHECKING
 
-from dagium import Future, LithopsFuture
+from dagium import Future, LithopsFuture, ResultStore
 
 from lithops import FunctionExecutor
 
+if TYPE_CHECKING:
+    from dagium.dag.dag import DAG
+    from dagium.tracing import Tracer
+
 
 class TaskState(Enum):
     """
@@ -35,6 +39,12 @@ class Operator(ABC):
     :param kwargs: Keyword arguments to pass to the operator
     """
 
+    # Subclasses that declare their own slots, like TaskHandle, have no instance dictionary
+    __slots__ = ()
+
+    # DAGs that contain the operator, their topology version changes every time a relation of the operator changes
+    _dags: Tuple[DAG, ...] = ()
+
     def __init__(
             self,
             task_id: str,
@@ -55,6 +65,8 @@ class Operator(ABC):
         self._children: Set[Operator] = set()
         self._parents: Set[Operator] = set()
         self._state = TaskState.NONE
+        self._result_store: Optional[ResultStore] = None
+        self._tracer: Optional[Tracer] = None
 
     @property
     def task_id(self) -> str:
@@ -76,11 +88,56 @@ class Operator(ABC):
         """Return the children of this operator."""
         return self._children
 
+    @property
+    def in_degree(self) -> int:
+        """Return the number of parents of this operator."""
+        return len(self._parents)
+
+    @property
+    def out_degree(self) -> int:
+        """Return the number of children of this operator."""
+        return len(self._children)
+
+    @property
+    def dags(self) -> Tuple[DAG, ...]:
+        """Return the DAGs that contain this operator."""
+        return self._dags
+
     @property
     def input_data(self) -> Dict[str, Future]:
         """Return the input data."""
         return self._input_data
 
+    @property
+    def args(self) -> Tuple[Any, ...]:
+        """Return the arguments passed to the operator."""
+        return self._args
+
+    @property
+    def kwargs(self) -> Dict[str, Any]:
+        """Return the keyword arguments passed to the operator."""
+        return self._kwargs
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return ()
+
+    @property
+    def metadata(self) -> Dict[str, Any]:
+        """Return the metadata of the operator."""
+        return self._metadata
+
+    @property
+    def result_store(self) -> Optional[ResultStore]:
+        """Return the result store where the operator stores its results, if any."""
+        return self._result_store
+
+    @result_store.setter
+    def result_store(self, value: Optional[ResultStore]):
+        """Set the result store where the operator stores its results."""
+        self._result_store = value
+
     @property
     def state(self) -> TaskState:
         """Return the state of the task."""
@@ -90,6 +147,18 @@ class Operator(ABC):
     def state(self, value):
         """Set the state of the task."""
         self._state = value
+        if self._tracer is not None:
+            self._tracer.event(self, value.name)
+
+    @property
+    def tracer(self) -> Optional[Tracer]:
+        """Return the tracer that records the execution of the task, if any."""
+        return self._tracer
+
+    @tracer.setter
+    def tracer(self, value: Optional[Tracer]):
+        """Set the tracer that records the execution of the task."""
+        self._tracer = value
 
     def _set_relation(self, operator_or_operators: Operator | List[Operator], upstream: bool = False):
         """
@@ -109,6 +178,8 @@ class Operator(ABC):
                 self.children.add(operator)
                 operator.parents.add(self)
 
+        self._topology_changed(operator_or_operators)
+
     def add_parent(self, operator: Operator | List[Operator]):
         """
         Add a parent to this operator.
@@ -123,6 +194,96 @@ class Operator(ABC):
         """
         self._set_relation(operator, upstream=False)
 
+    def remove_parent(self, operator: Operator | List[Operator]):
+        """
+        Remove a parent from this operator.
+        :param operator: Operator or list of operators
+        """
+        self._unset_relation(operator, upstream=True)
+
+    def remove_child(self, operator: Operator | List[Operator]):
+        """
+        Remove a child from this operator.
+        :param operator: Operator or list of operators
+        """
+        self._unset_relation(operator, upstream=False)
+
+    def _unset_relation(self, operator_or_operators: Operator | List[Operator], upstream: bool = False):
+        """
+        Remove the relation between this operator and another operator or list of operators
+
+        :param operator_or_operators: Operator or list of operators
+        :param upstream: Whether the relation to remove is upstream or downstream
+        """
+        if isinstance(operator_or_operators, Operator):
+            operator_or_operators = [operator_or_operators]
+
+        for operator in operator_or_operators:
+            if upstream:
+                self.parents.discard(operator)
+                operator.children.discard(self)
+            else:
+                self.children.discard(operator)
+                operator.parents.discard(self)
+
+        self._topology_changed(operator_or_operators)
+
+    def _add_dag(self, dag: DAG):
+        """
+        Record that this operator was added to a DAG
+
+        :param dag: DAG
+        """
+        self._dags = self._dags + (dag,)
+
+    def _remove_dag(self, dag: DAG):
+        """
+        Record that this operator was removed from a DAG
+
+        :param dag: DAG
+        """
+        self._dags = tuple(d for d in self._dags if d is not dag)
+
+    def _topology_changed(self, operators: List[Operator]):
+        """
+        Report a relation change to the DAGs that contain this operator or any operator related to it
+
+        :param operators: Operators whose relation with this operator changed
+        """
+        for operator in (self, *operators):
+            for dag in operator._dags:
+                dag._relations_changed(operator)
+
+    def split_future(self, future: Future) -> List[Tuple[Operator, Future]]:
+        """
+        Split the future returned by the execution of this operator into the futures of the DAG tasks it covers
+
+        :param future: Future of the operator
+        :return: List of tasks and their futures
+        """
+        return [(self, future)]
+
+    def expand(self, future: Future) -> List[Operator]:
+        """
+        Return the tasks to insert into the running DAG after this operator finishes
+
+        The inserted tasks become the only children of this operator and the parents of its former children.
+
+        :param future: Future of the operator
+        :return: Tasks to insert, empty if the DAG does not change
+        """
+        return []
+
+    def local_call(self, input_data: Dict[str, Future] = None) -> Optional[Callable[[], Any]]:
+        """
+        Return a function that executes this operator outside of its Lithops executor
+
+        :param input_data: Input data
+        :return: Function without arguments that returns the result of the operator, or None if the operator
+            can only be executed by its Lithops executor
+        """
+        return None
+
     @abstractmethod
     def __call__(
             self,
@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import math
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from lithops.future import ResponseFuture
+from lithops.wait import ANY_COMPLETED
+
+from dagium import Future, InputData, ObjectRefList, ResultStore
+from dagium.future import ChunkedFuturesList
+from dagium.operators.map import Map
+from dagium.operators.operator import Operator
+
+
+class PipelinedMap(Operator):
+    """
+    Operator that executes a chain of maps partition by partition
+
+    The first map is submitted as usual, and every time a call of a map finishes the call of the next map for
+    the same partition is submitted, so the next map does not wait for the other partitions. The future of the
+    operator holds the calls of all the maps, and it is split into one future per map with the usual result of
+    a map, the list of the results of its calls. The state and result store of the operator are propagated to
+    the maps.
+
+    A chain of maps with a batch size is streamed instead: every map iterates over the results of the previous
+    one as its chunks finish, so it submits its own chunks before the previous map has finished.
+
+    :param tasks: Chain of maps, every map after the first one must be the only child of the previous one and run
+        on the same executor, and either all the maps have a batch size or every map after the first one is
+        partitioned
+    :raises ValueError: If the tasks do not form a chain of maps that can be pipelined
+    """
+
+    def __init__(self, tasks: List[Map]):
+        if len(tasks) < 2:
+            raise ValueError('A pipeline needs at least two maps')
+        streaming = isinstance(tasks[0], Map) and tasks[0].batch_size is not None
+        for task in tasks:
+            if not isinstance(task, Map) or (task.batch_size is not None) != streaming:
+                kind = 'with' if streaming else 'without'
+                raise ValueError(f'Task {task.task_id} is not a map {kind} a batch size')
+        for parent, child in zip(tasks, tasks[1:]):
+            if not streaming and not child.partitioned:
+                raise ValueError(f'Map {child.task_id} is not partitioned')
+            if parent.children != {child} or child.parents != {parent}:
+                raise ValueError(f'Maps {parent.task_id} and {child.task_id} are not a link of a linear chain')
+            if child.executor is not parent.executor:
+                raise ValueError(f'Maps {parent.task_id} and {child.task_id} do not run on the same executor')
+
+        head = tasks[0]
+        super().__init__(
+            '|'.join(task.task_id for task in tasks),
+            head.executor,
+            head.input_data,
+            head.metadata,
+            *head.args,
+            **head.kwargs
+        )
+        self._tasks = tasks
+        self._streaming = streaming
+
+    @property
+    def tasks(self) -> List[Map]:
+        """Return the pipelined maps in execution order."""
+        return self._tasks
+
+    @property
+    def streaming(self) -> bool:
+        """Return whether the maps are streamed chunk by chunk instead of pipelined partition by partition."""
+        return self._streaming
+
+    @property
+    def parents(self) -> Set[Operator]:
+        """Return the parents of the first map of the chain."""
+        return self._tasks[0].parents
+
+    @property
+    def children(self) -> Set[Operator]:
+        """Return the children of the last map of the chain."""
+        return self._tasks[-1].children
+
+    @property
+    def functions(self) -> Tuple[Callable, ...]:
+        """Return the user functions executed by the operator."""
+        return tuple(func for task in self._tasks for func in task.functions)
+
+    @Operator.state.setter
+    def state(self, value):
+        """Set the state of the pipeline and of all its maps."""
+        self._state = value
+        for task in self._tasks:
+            task.state = value
+
+    @Operator.result_store.setter
+    def result_store(self, value: Optional[ResultStore]):
+        """Set the result store of the pipeline and of all its maps."""
+        self._result_store = value
+        for task in self._tasks:
+            task.result_store = value
+
+    def split_future(self, future: Future) -> List[Tuple[Operator, Future]]:
+        """
+        Split the future of the pipeline into the futures of the maps
+
+        :param future: Future of the pipeline, with the calls of every map one after the other
+        :return: List of tasks and their futures
+        """
+        if isinstance(future, ObjectRefList):
+            # A cached result kept in a result store, one reference per call
+            refs = future.refs
+            return [
+                (task, ObjectRefList(refs[start:end], chunked=self._streaming))
+                for task, (start, end) in zip(self._tasks, self._stages(len(refs)))
+            ]
+
+        if isinstance(future, InputData):
+            # A result that did not come from Lithops, like a cached one, is the list of the results of the calls
+            values = future.result()
+            return [
+                (task, InputData(
+                    [element for chunk in values[start:end] for element in chunk] if self._streaming
+                    else values[start:end]
+                ))
+                for task, (start, end) in zip(self._tasks, self._stages(len(values)))
+            ]
+
+        futures = future.response_futures()
+        return [
+            (task, Future(ChunkedFuturesList(futures[start:end]) if self._streaming else futures[start:end]))
+            for task, (start, end) in zip(self._tasks, self._stages(len(futures)))
+        ]
+
+    def _stages(self, calls: int) -> List[Tuple[int, int]]:
+        """
+        Return the range of the calls of every map in the list of the calls of the pipeline
+
+        Partitioned maps have one call per partition. The maps of a streaming pipeline all process the same
+        elements in chunks of their own batch size, and the total number of calls only grows with the number of
+        elements, so every number of elements that gives the same total gives the same number of calls per map.
+
+        :param calls: Number of calls of all the maps
+        :return: Start and end of the calls of every map
+        """
+        if self._streaming:
+            def counts(elements: int) -> List[int]:
+                return [math.ceil(elements / task.batch_size) for task in self._tasks]
+
+            low, high = 0, calls * max(task.batch_size for task in self._tasks)
+            while low < high:
+                middle = (low + high) // 2
+                if sum(counts(middle)) < calls:
+                    low = middle + 1
+                else:
+                    high = middle
+            sizes = counts(low)
+        else:
+            sizes = [calls // len(self._tasks)] * len(self._tasks)
+
+        ranges, start = [], 0
+        for size in sizes:
+            ranges.append((start, start + size))
+            start += size
+        return ranges
+
+    def __call__(
+            self,
+            input_data: Dict[str, Future] = None,
+            *args,
+            **kwargs
+    ) -> List[ResponseFuture]:
+        """
+        Execute the maps and wait until every partition has gone through all of them
+
+        :param input_data: Input data of the first map
+        :return: The futures of the calls of every map, one map after the other
+        :raises Exception: The exception of the first call that fails for good, no more calls are submitted after it
+        """
+        if self._streaming:
+            return self._stream(input_data, *args, **kwargs)
+
+        head = self._tasks[0]
+        first = list(head(input_data or self._input_data, *args, **kwargs))
+        stages: List[List[Any]] = [first] + [[None] * len(first) for _ in self._tasks[1:]]
+        positions: Dict[ResponseFuture, Tuple[int, int]] = {future: (0, i) for i, future in enumerate(first)}
+
+        pending = list(first)
+        while pending:
+            waited = list(pending)
+            done, not_done = head.executor.wait(
+                pending,
+                throw_except=False,
+                return_when=ANY_COMPLETED,
+                show_progressbar=False
+            )
+            # A retrying executor replaces the future of a failed call by the future of its next attempt
+            for old, new in zip(waited, pending):
+                if new is not old:
+                    stage, i = positions[new] = positions.pop(old)
+                    stages[stage][i] = new
+            pending = list(not_done)
+
+            # Partitions that finished a map, grouped by the map they go through next
+            ready: Dict[int, List[Tuple[int, ResponseFuture]]] = dict()
+            for future in done:
+                stage, i = positions.pop(future)
+                if future.error:
+                    # Raises the exception of the call
+                    future.result()
+                if stage + 1 < len(self._tasks):
+                    ready.setdefault(stage + 1, []).append((i, future))
+
+            for stage, partitions in sorted(ready.items()):
+                futures = self._submit(stage, [future for _, future in partitions])
+                for (i, _), future in zip(partitions, futures):
+                    stages[stage][i] = future
+                    positions[future] = (stage, i)
+                    pending.append(future)
+
+        return [future for stage in stages for future in stage]
+
+    def _stream(self, input_data: Dict[str, Future] = None, *args, **kwargs) -> List[ResponseFuture]:
+        """
+        Execute a chain of maps with a batch size, every map iterating over the stream of the previous one
+
+        :param input_data: Input data of the first map
+        :return: The futures of the calls of every map, one map after the other
+        :raises Exception: The exception raised while pulling or submitting the chunks of any map
+        """
+        stages = [self._tasks[0](input_data or self._input_data, *args, **kwargs)]
+        for parent, task in zip(self._tasks, self._tasks[1:]):
+            # With a result store the chunks hold references, which the stream dereferences
+            stages.append(task({parent.task_id: Future(stages[-1])}))
+        for stage in stages:
+            stage.join()
+        return [future for stage in stages for future in stage]
+
+    def _submit(self, stage: int, parts: List[ResponseFuture]) -> List[ResponseFuture]:
+        """
+        Submit the calls of a map for some partitions
+
+        :param stage: Position of the map in the chain
+        :param parts: Futures of the calls of the previous map for the partitions
+        :return: Futures of the calls, in the order of the partitions
+        """
+        task = self._tasks[stage]
+        parent_id = self._tasks[stage - 1].task_id
+        # With a result store the calls receive the references to the stored partitions, like in a DagExecutor
+        iterdata = [
+            (Future(part).reference() if task.result_store is not None else Future(part), parent_id)
+            for part in parts
+        ]
+        return task.executor.map(
+            task._wrap(task.functions[0]),
+            iterdata,
+            *task.args,
+            **task.kwargs
+        )
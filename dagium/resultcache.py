@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future as ConcurrentFuture
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from dagium.config import RESULT_CACHE_BYTES
+
+
+class ResultCache:
+    """
+    In-process cache of resolved task results shared by all the futures
+
+    Results are kept until the total size exceeds the budget, then the least recently used ones are evicted and
+    fetched again the next time they are accessed. Concurrent lookups of a result that is being fetched wait for
+    that fetch instead of starting their own.
+
+    :param max_bytes: Maximum total size of the cached results in bytes
+    """
+
+    def __init__(self, max_bytes: int = RESULT_CACHE_BYTES):
+        self._max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._data: OrderedDict[Hashable, Tuple[Any, int]] = OrderedDict()
+        self._inflight: Dict[Hashable, ConcurrentFuture] = dict()
+        self._size = 0
+        self._hits = 0
+        self._misses = 0
+        self._coalesced = 0
+        self._evictions = 0
+
+    @property
+    def size(self) -> int:
+        """Return the total size of the cached results in bytes."""
+        return self._size
+
+    @property
+    def stats(self) -> Dict[str, int]:
+        """Return the hit, miss, coalesced lookup and eviction counters."""
+        return {
+            'hits': self._hits,
+            'misses': self._misses,
+            'coalesced': self._coalesced,
+            'evictions': self._evictions,
+        }
+
+    def get(self, key: Hashable, fetch: Callable[[], Tuple[Any, Optional[int]]]) -> Any:
+        """
+        Return a cached result or fetch it
+
+        :param key: Key of the result
+        :param fetch: Function that fetches the result and returns it with its size in bytes, or None as the size
+            if it is not known
+        :return: The result
+        """
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self._hits += 1
+                return self._data[key][0]
+            inflight = self._inflight.get(key)
+            owner = inflight is None
+            if owner:
+                inflight = self._inflight[key] = ConcurrentFuture()
+                self._misses += 1
+            else:
+                self._coalesced += 1
+
+        if not owner:
+            return inflight.result()
+
+        try:
+            value, size = fetch()
+        except BaseException as e:
+            with self._lock:
+                del self._inflight[key]
+            inflight.set_exception(e)
+            raise
+
+        size = size if size is not None else _sizeof(value)
+        with self._lock:
+            del self._inflight[key]
+            if size <= self._max_bytes:
+                self._data[key] = (value, size)
+                self._size += size
+                while self._size > self._max_bytes:
+                    _, (_, evicted) = self._data.popitem(last=False)
+                    self._size -= evicted
+                    self._evictions += 1
+        inflight.set_result(value)
+        return value
+
+    def clear(self):
+        """
+        Remove every cached result
+        """
+        with self._lock:
+            self._data.clear()
+            self._size = 0
+
+
+_result_cache: Optional[ResultCache] = ResultCache()
+
+
+def get_result_cache() -> Optional[ResultCache]:
+    """Return the result cache shared by the futures of this process, or None if results are not cached."""
+    return _result_cache
+
+
+def set_result_cache(cache: Optional[ResultCache]):
+    """
+    Replace the result cache shared by the futures of this process
+
+    :param cache: Result cache, or None to stop caching results
+    """
+    global _result_cache
+    _result_cache = cache
+
+
+def _sizeof(value: Any, depth: int = 0) -> int:
+    """Return an estimate of the memory used by a value and the values it contains."""
+    nbytes = getattr(value, 'nbytes', None)
+    if isinstance(nbytes, int):
+        return nbytes
+    size = sys.getsizeof(value)
+    if depth < 2:
+        if isinstance(value, (list, tuple, set, frozenset)):
+            size += sum(_sizeof(v, depth + 1) for v in value)
+        elif isinstance(value, dict):
+            size += sum(_sizeof(k, depth + 1) + _sizeof(v, depth + 1) for k, v in value.items())
+    return size
@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import io
+import mmap
+import os
+import pickle
+import struct
+import time
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, List, Optional, Union
+
+import cloudpickle
+
+from dagium.config import COMPRESSION_THRESHOLD, COMPRESSION_BANDWIDTH
+
+try:
+    import pyarrow as pa
+except ImportError:
+    pa = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Buffers are aligned so arrays can be used in place
+_ALIGNMENT = 64
+_PICKLE5_MAGIC = b'DGP5'
+_ARROW_MAGIC = b'DGAR'
+_COMPRESSED_MAGIC = b'DGCZ'
+_COMPRESSED_HEADER = struct.Struct('<4sBQ')
+# Number of evenly spaced slices of the payload that make up the sample used to choose a codec
+_SAMPLE_SLICES = 4
+
+
+class Serializer(ABC):
+    """
+    Abstract class for the serializers of the results kept in a ResultStore
+
+    A serialized value is a list of frames that are written one after the other, so large buffers are
+    never concatenated into a single blob before being uploaded.
+    """
+
+    @abstractmethod
+    def dumps(self, value: Any) -> List[Buffer]:
+        """
+        Serialize a value
+
+        :param value: Value to serialize
+        :return: Frames of the serialized value
+        """
+        pass
+
+    @abstractmethod
+    def loads(self, data: Buffer) -> Any:
+        """
+        Deserialize a value
+
+        :param data: Serialized value
+        :return: The value
+        """
+        pass
+
+    def load_file(self, path: str) -> Any:
+        """
+        Deserialize a value from a file by memory-mapping it
+
+        Serializers that support it return values that point into the mapped file instead of copies.
+
+        :param path: Path of the file
+        :return: The value
+        """
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return self.loads(b'')
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self.loads(memoryview(mapped))
+
+
+class CloudpickleSerializer(Serializer):
+    """
+    Serializer that uses cloudpickle, the values are copied in and out of a single blob
+    """
+
+    def dumps(self, value: Any) -> List[Buffer]:
+        return [cloudpickle.dumps(value)]
+
+    def loads(self, data: Buffer) -> Any:
+        return cloudpickle.loads(data)
+
+
+class Pickle5Serializer(Serializer):
+    """
+    Serializer that uses pickle protocol 5 with out-of-band buffers
+
+    The large buffers of the value, like the data of NumPy arrays, are written as separate frames instead of
+    being copied into the pickle, and on load the objects are rebuilt on top of the loaded data without copying
+    it, so a memory-mapped file is read lazily. Data serialized by cloudpickle is also loaded.
+    """
+
+    def dumps(self, value: Any) -> List[Buffer]:
+        buffers: List[pickle.PickleBuffer] = []
+        data = cloudpickle.dumps(value, protocol=5, buffer_callback=buffers.append)
+        raws = [buffer.raw() for buffer in buffers]
+
+        header = struct.pack(f'<4sIQ{len(raws)}Q', _PICKLE5_MAGIC, len(raws), len(data), *(r.nbytes for r in raws))
+        frames = [header, data]
+        offset = len(header) + len(data)
+        for raw in raws:
+            padding = -offset % _ALIGNMENT
+            frames.append(b'\0' * padding)
+            frames.append(raw)
+            offset += padding + raw.nbytes
+        return frames
+
+    def loads(self, data: Buffer) -> Any:
+        view = memoryview(data)
+        if bytes(view[:4]) != _PICKLE5_MAGIC:
+            return cloudpickle.loads(view)
+
+        num_buffers, size = struct.unpack_from('<IQ', view, 4)
+        lengths = struct.unpack_from(f'<{num_buffers}Q', view, 16)
+        offset = 16 + 8 * num_buffers
+        data_view = view[offset:offset + size]
+        offset += size
+        buffers = []
+        for length in lengths:
+            offset += -offset % _ALIGNMENT
+            buffers.append(view[offset:offset + length])
+            offset += length
+        return pickle.loads(data_view, buffers=buffers)
+
+
+class ArrowSerializer(Serializer):
+    """
+    Serializer that writes Arrow tables in the Arrow IPC stream format
+
+    Tables and record batches are written as IPC streams and loaded as tables whose columns point into the loaded
+    data, any other value is serialized with pickle protocol 5. Requires pyarrow.
+    """
+
+    def __init__(self):
+        if pa is None:
+            raise ImportError('ArrowSerializer requires pyarrow, install it with: pip install pyarrow')
+        self._fallback = Pickle5Serializer()
+
+    def dumps(self, value: Any) -> List[Buffer]:
+        if isinstance(value, pa.RecordBatch):
+            value = pa.Table.from_batches([value])
+        if not isinstance(value, pa.Table):
+            return self._fallback.dumps(value)
+
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, value.schema) as writer:
+            writer.write_table(value)
+        return [_ARROW_MAGIC, memoryview(sink.getvalue())]
+
+    def loads(self, data: Buffer) -> Any:
+        view = memoryview(data)
+        if bytes(view[:4]) != _ARROW_MAGIC:
+            return self._fallback.loads(view)
+        return pa.ipc.open_stream(pa.py_buffer(view[4:])).read_all()
+
+
+class Codec(ABC):
+    """
+    Abstract class for the compression codecs of the CompressedSerializer
+
+    Every codec has a unique ID that is written in the header of the compressed data, so the data is decompressed
+    with the same codec whatever the codecs available to the serializer that loads it.
+    """
+
+    id: int
+    name: str
+
+    @abstractmethod
+    def compress(self, frames: List[Buffer]) -> List[bytes]:
+        """
+        Compress the frames of a serialized value as a single stream
+
+        :param frames: Frames of the serialized value
+        :return: Frames of the compressed stream
+        """
+        pass
+
+    @abstractmethod
+    def decompress(self, data: Buffer, size: int) -> bytes:
+        """
+        Decompress a compressed stream
+
+        :param data: Compressed stream
+        :param size: Size of the decompressed data
+        :return: The decompressed data
+        """
+        pass
+
+
+class ZlibCodec(Codec):
+    """
+    Codec that uses zlib from the standard library, always available
+
+    :param level: Compression level, from 1 (fastest) to 9 (smallest)
+    """
+
+    id = 1
+    name = 'zlib'
+
+    def __init__(self, level: int = 1):
+        self._level = level
+
+    def compress(self, frames: List[Buffer]) -> List[bytes]:
+        compressor = zlib.compressobj(self._level)
+        return [compressor.compress(frame) for frame in frames] + [compressor.flush()]
+
+    def decompress(self, data: Buffer, size: int) -> bytes:
+        return zlib.decompress(data, bufsize=max(size, 1))
+
+
+class ZstdCodec(Codec):
+    """
+    Codec that uses Zstandard, requires zstandard
+
+    :param level: Compression level, from 1 (fastest) to 22 (smallest)
+    """
+
+    id = 2
+    name = 'zstd'
+
+    def __init__(self, level: int = 1):
+        if zstandard is None:
+            raise ImportError('ZstdCodec requires zstandard, install it with: pip install zstandard')
+        self._level = level
+
+    def compress(self, frames: List[Buffer]) -> List[bytes]:
+        compressor = zstandard.ZstdCompressor(level=self._level).compressobj()
+        return [compressor.compress(frame) for frame in frames] + [compressor.flush()]
+
+    def decompress(self, data: Buffer, size: int) -> bytes:
+        return zstandard.ZstdDecompressor().decompress(data, max_output_size=size)
+
+
+class Lz4Codec(Codec):
+    """
+    Codec that uses the LZ4 frame format, requires lz4
+    """
+
+    id = 3
+    name = 'lz4'
+
+    def __init__(self):
+        if lz4_frame is None:
+            raise ImportError('Lz4Codec requires lz4, install it with: pip install lz4')
+
+    def compress(self, frames: List[Buffer]) -> List[bytes]:
+        compressor = lz4_frame.LZ4FrameCompressor()
+        return [compressor.begin()] + [compressor.compress(frame) for frame in frames] + [compressor.flush()]
+
+    def decompress(self, data: Buffer, size: int) -> bytes:
+        return lz4_frame.decompress(data)
+
+
+_CODECS = {codec.id: codec for codec in (ZlibCodec, ZstdCodec, Lz4Codec)}
+
+
+def available_codecs() -> List[Codec]:
+    """
+    Return the codecs whose library is installed, the fastest ones first
+
+    :return: Codecs with their default settings
+    """
+    codecs = []
+    if lz4_frame is not None:
+        codecs.append(Lz4Codec())
+    if zstandard is not None:
+        codecs.append(ZstdCodec())
+    codecs.append(ZlibCodec())
+    return codecs
+
+
+class CompressedSerializer(Serializer):
+    """
+    Serializer that compresses the values serialized by another serializer when it pays off
+
+    Values smaller than the threshold are written as they are. For larger values a sample of the payload is
+    compressed and decompressed with every codec, and the codec is chosen to minimize the estimated time of the
+    round trip of the payload through the storage at the given bandwidth, so payloads that do not compress well,
+    or not enough to make up for the compression time, are also written as they are. Compressed data starts with
+    a header with the codec, and any other data is loaded by the wrapped serializer, so loading is transparent.
+    Values that are not compressed keep the zero-copy loading of the wrapped serializer, compressed ones are
+    decompressed in memory.
+
+    :param serializer: Serializer of the values, defaults to CloudpickleSerializer
+    :param codecs: Candidate codecs, defaults to the ones among LZ4, Zstandard and zlib that are available in the
+        process that serializes the value
+    :param threshold: Minimum size in bytes of a serialized value to try to compress it
+    :param bandwidth: Expected transfer bandwidth to and from the storage in bytes per second
+    :param sample_size: Size in bytes of the sample used to choose the codec
+    """
+
+    def __init__(
+            self,
+            serializer: Optional[Serializer] = None,
+            codecs: Optional[List[Codec]] = None,
+            threshold: int = COMPRESSION_THRESHOLD,
+            bandwidth: float = COMPRESSION_BANDWIDTH,
+            sample_size: int = 1 << 18,
+    ):
+        if bandwidth <= 0:
+            raise ValueError(f'Bandwidth must be positive, got {bandwidth}')
+        self._serializer = serializer or CloudpickleSerializer()
+        self._codecs = codecs
+        self._threshold = threshold
+        self._bandwidth = bandwidth
+        self._sample_size = sample_size
+
+    @property
+    def serializer(self) -> Serializer:
+        """Return the wrapped serializer."""
+        return self._serializer
+
+    @property
+    def codecs(self) -> List[Codec]:
+        """Return the candidate codecs."""
+        return self._codecs if self._codecs is not None else available_codecs()
+
+    def dumps(self, value: Any) -> List[Buffer]:
+        frames = self._serializer.dumps(value)
+        size = sum(memoryview(frame).nbytes for frame in frames)
+        if size < self._threshold:
+            return frames
+
+        codec = self.choose_codec(frames, size)
+        if codec is None:
+            return frames
+        compressed = codec.compress(frames)
+        if sum(len(frame) for frame in compressed) >= size:
+            return frames
+        return [_COMPRESSED_HEADER.pack(_COMPRESSED_MAGIC, codec.id, size)] + compressed
+
+    def loads(self, data: Buffer) -> Any:
+        view = memoryview(data)
+        if view.nbytes < _COMPRESSED_HEADER.size or bytes(view[:4]) != _COMPRESSED_MAGIC:
+            return self._serializer.loads(data)
+
+        _, codec_id, size = _COMPRESSED_HEADER.unpack_from(view)
+        codec_type = _CODECS.get(codec_id)
+        if codec_type is None:
+            raise ValueError(f'Unknown compression codec {codec_id}')
+        return self._serializer.loads(codec_type().decompress(view[_COMPRESSED_HEADER.size:], size))
+
+    def choose_codec(self, frames: List[Buffer], size: int) -> Optional[Codec]:
+        """
+        Choose the codec of a serialized value from the compression of a sample of it
+
+        :param frames: Frames of the serialized value
+        :param size: Size of the serialized value
+        :return: The codec that minimizes the estimated time to compress, upload, download and decompress the
+            value, or None if it is faster to transfer it uncompressed
+        """
+        sample = self._sample(frames, size)
+        if not sample:
+            return None
+
+        # Estimated seconds per byte of the payload, the value is transferred once to the storage and once back
+        best, best_cost = None, 2 / self._bandwidth
+        for codec in self.codecs:
+            start = time.perf_counter()
+            compressed = b''.join(codec.compress([sample]))
+            codec.decompress(compressed, len(sample))
+            elapsed = time.perf_counter() - start
+            cost = elapsed / len(sample) + 2 * len(compressed) / len(sample) / self._bandwidth
+            if cost < best_cost:
+                best, best_cost = codec, cost
+        return best
+
+    def _sample(self, frames: List[Buffer], size: int) -> bytes:
+        """
+        Take evenly spaced slices of a serialized value, so that a header does not decide the codec alone
+        """
+        data = [memoryview(frame).cast('B') for frame in frames if memoryview(frame).nbytes]
+        if size <= self._sample_size:
+            return b''.join(data)
+
+        length = self._sample_size // _SAMPLE_SLICES
+        offsets = [i * (size - length) // (_SAMPLE_SLICES - 1) for i in range(_SAMPLE_SLICES)]
+        sample = bytearray()
+        index, start = 0, 0
+        for offset in offsets:
+            # Copy the slice from the frames it spans
+            while start + data[index].nbytes <= offset:
+                start += data[index].nbytes
+                index += 1
+            i, position, remaining = index, offset - start, length
+            while remaining:
+                chunk = data[i][position:position + remaining]
+                sample += chunk
+                remaining -= chunk.nbytes
+                i, position = i + 1, 0
+        return bytes(sample)
+
+
+class FramesReader(io.RawIOBase):
+    """
+    Read-only file object over the frames of a serialized value, used to upload them without concatenating them
+
+    :param frames: Frames of the serialized value
+    """
+
+    def __init__(self, frames: List[Buffer]):
+        super().__init__()
+        self._frames = [memoryview(frame).cast('B') for frame in frames if memoryview(frame).nbytes]
+        self._index = 0
+        self._offset = 0
+
+    def __len__(self) -> int:
+        return sum(frame.nbytes for frame in self._frames)
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        out = memoryview(buffer).cast('B')
+        written = 0
+        while written < len(out) and self._index < len(self._frames):
+            frame = self._frames[self._index]
+            n = min(len(out) - written, frame.nbytes - self._offset)
+            out[written:written + n] = frame[self._offset:self._offset + n]
+            written += n
+            self._offset += n
+            if self._offset == frame.nbytes:
+                self._index += 1
+                self._offset = 0
+        return written
@@ -0,0 +1,342 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, List, Optional, Tuple, TYPE_CHECKING
+
+from dagium.future import Future
+
+if TYPE_CHECKING:
+    from dagium.operators import Operator
+
+# Lithops call stats converted to phases of the call: (phase name, start key, end key)
+CALL_PHASES = [
+    ('invoke', 'host_submit_tstamp', 'worker_start_tstamp'),
+    ('exec', 'worker_start_tstamp', 'worker_end_tstamp'),
+    ('status', 'worker_end_tstamp', 'host_status_done_tstamp'),
+    ('download', 'host_status_done_tstamp', 'host_result_done_tstamp'),
+]
+
+
+class Tracer:
+    """
+    Records the execution timeline of the tasks of a DAG
+
+    The DagExecutor, the processors and the executors report to the tracer every TaskState transition of a task,
+    when the task became ready, the time spent in the phases of its execution, and the Lithops stats of its calls.
+    The timeline can be exported as Chrome trace events or as OpenTelemetry-style spans and summarized.
+    A tracer records one DAG execution at a time: starting an execution discards the previous timeline, so
+    DAGs that run concurrently, like the DAGs of a DagService, need a tracer each.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._dag_id: Optional[str] = None
+        self._events: Dict[str, List[Tuple[str, float]]] = defaultdict(list)
+        self._spans: List[Tuple[str, str, float, float, int]] = []
+        self._calls: List[Tuple[str, str, Dict[str, Any]]] = []
+        self._operators: Dict[str, str] = dict()
+        self._parents: Dict[str, List[str]] = dict()
+
+    def start(self, dag_id: str, tasks):
+        """
+        Start recording the execution of a DAG, discarding the timeline of the previous execution
+
+        :param dag_id: DAG ID
+        :param tasks: Tasks of the DAG
+        """
+        with self._lock:
+            self._dag_id = dag_id
+            self._events.clear()
+            self._spans.clear()
+            self._calls.clear()
+            self._operators.clear()
+            self._parents.clear()
+        self.add_tasks(tasks)
+
+    def add_tasks(self, tasks):
+        """
+        Record tasks inserted into the DAG during its execution
+
+        :param tasks: Inserted tasks and the tasks whose parents changed
+        """
+        with self._lock:
+            for task in tasks:
+                self._operators[task.task_id] = type(task).__name__
+                self._parents[task.task_id] = sorted(parent.task_id for parent in task.parents)
+
+    def event(self, task: Operator, name: str, timestamp: Optional[float] = None):
+        """
+        Record an event of a task, like a TaskState transition
+
+        :param task: Task
+        :param name: Event name
+        :param timestamp: Epoch timestamp of the event, defaults to now
+        """
+        with self._lock:
+            self._events[task.task_id].append((name, timestamp or time.time()))
+
+    @contextmanager
+    def span(self, task: Operator, name: str):
+        """
+        Record the time spent in a phase of the execution of a task
+
+        :param task: Task
+        :param name: Phase name
+        """
+        start = time.time()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._spans.append((task.task_id, name, start, time.time(), threading.get_ident()))
+
+    def record_calls(self, task: Operator, future: Future):
+        """
+        Record the Lithops stats of the calls of a task
+
+        :param task: Task
+        :param future: Future of the task
+        """
+        calls = [
+            (f'{getattr(f, "job_id", "")}/{getattr(f, "call_id", i)}', dict(getattr(f, 'stats', None) or {}))
+            for i, f in enumerate(future.response_futures())
+        ]
+        with self._lock:
+            self._calls.extend((task.task_id, call_id, stats) for call_id, stats in calls)
+
+    def _intervals(self) -> Dict[str, Tuple[float, float, float]]:
+        """Return the ready, first start and last end timestamps of every finished task."""
+        intervals = {}
+        for task_id, events in self._events.items():
+            times = {}
+            end = None
+            for name, ts in events:
+                times.setdefault(name, ts)
+                if name in ('SUCCESS', 'FAILED'):
+                    end = ts
+            if end is None:
+                continue
+            start = times.get('RUNNING', end)
+            ready = min(times.get('READY', start), times.get('SCHEDULED', start))
+            intervals[task_id] = (ready, start, end)
+        return intervals
+
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """
+        Export the timeline in the Chrome trace event format, viewable in chrome://tracing or Perfetto
+
+        Tasks are drawn in the driver process with their queued and running intervals and their phases,
+        Lithops calls are drawn in the workers process with their invocation, execution, status and download phases.
+
+        :return: Trace as a JSON-serializable dictionary
+        """
+        with self._lock:
+            intervals = self._intervals()
+            spans = list(self._spans)
+            calls = list(self._calls)
+
+        origin = min([ready for ready, _, _ in intervals.values()] + [start for _, _, start, _, _ in spans], default=0)
+        lanes = {task_id: i for i, task_id in enumerate(sorted(intervals))}
+
+        def us(ts: float) -> float:
+            return round((ts - origin) * 1e6, 3)
+
+        def complete(name, cat, start, end, pid, tid, args=None):
+            return {'name': name, 'cat': cat, 'ph': 'X', 'ts': us(start), 'dur': round((end - start) * 1e6, 3),
+                    'pid': pid, 'tid': tid, 'args': args or {}}
+
+        events = [
+            {'name': 'process_name', 'ph': 'M', 'pid': 0, 'args': {'name': f'driver {self._dag_id}'}},
+            {'name': 'process_name', 'ph': 'M', 'pid': 1, 'args': {'name': 'lithops workers'}},
+        ]
+        for task_id, (ready, start, end) in intervals.items():
+            args = {'operator': self._operators.get(task_id)}
+            events.append({'name': 'thread_name', 'ph': 'M', 'pid': 0, 'tid': lanes[task_id], 'args': {'name': task_id}})
+            events.append(complete('queued', 'task', ready, start, 0, lanes[task_id], args))
+            events.append(complete(task_id, 'task', start, end, 0, lanes[task_id], args))
+        for task_id, name, start, end, _ in spans:
+            events.append(complete(name, 'phase', start, end, 0, lanes.get(task_id, -1), {'task_id': task_id}))
+        for lane, (task_id, call_id, stats) in enumerate(calls):
+            for phase, start_key, end_key in CALL_PHASES:
+                if start_key in stats and end_key in stats:
+                    events.append(complete(phase, 'call', stats[start_key], stats[end_key], 1, lane,
+                                           {'task_id': task_id, 'call_id': call_id}))
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def to_spans(self) -> List[Dict[str, Any]]:
+        """
+        Export the timeline as OpenTelemetry-style spans
+
+        The DAG execution is the root span, every task is a child of it and the phases and Lithops
+        calls of a task are children of the task span.
+
+        :return: List of spans as dictionaries
+        """
+        with self._lock:
+            intervals = self._intervals()
+            spans = list(self._spans)
+            calls = list(self._calls)
+
+        trace_id = os.urandom(16).hex()
+
+        def span(name, start, end, parent=None, attributes=None):
+            return {
+                'trace_id': trace_id,
+                'span_id': os.urandom(8).hex(),
+                'parent_span_id': parent,
+                'name': name,
+                'start_time_unix_nano': int(start * 1e9),
+                'end_time_unix_nano': int(end * 1e9),
+                'attributes': attributes or {},
+            }
+
+        if not intervals:
+            return []
+        root = span(f'dag {self._dag_id}',
+                    min(ready for ready, _, _ in intervals.values()),
+                    max(end for _, _, end in intervals.values()),
+                    attributes={'dagium.dag_id': self._dag_id})
+        result = [root]
+        task_spans = {}
+        for task_id, (ready, start, end) in intervals.items():
+            task_span = span(task_id, start, end, root['span_id'], {
+                'dagium.task_id': task_id,
+                'dagium.operator': self._operators.get(task_id),
+                'dagium.queued_ms': (start - ready) * 1e3,
+            })
+            task_spans[task_id] = task_span['span_id']
+            result.append(task_span)
+        for task_id, name, start, end, _ in spans:
+            result.append(span(name, start, end, task_spans.get(task_id, root['span_id']), {'dagium.task_id': task_id}))
+        for task_id, call_id, stats in calls:
+            if 'host_submit_tstamp' in stats and 'worker_end_tstamp' in stats:
+                attributes = {'dagium.task_id': task_id, 'lithops.call_id': call_id}
+                attributes.update({f'lithops.{k}': v for k, v in stats.items() if isinstance(v, (int, float, str, bool))})
+                result.append(span(f'call {call_id}',
+                                   stats['host_submit_tstamp'],
+                                   stats.get('host_result_done_tstamp', stats['worker_end_tstamp']),
+                                   task_spans.get(task_id, root['span_id']),
+                                   attributes))
+        return result
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the timeline
+
+        The summary contains the makespan, the critical path through the finished tasks, the latency and
+        queueing delay percentiles of every operator type, and the utilization of the Lithops workers, which
+        is the time workers spent executing divided by the makespan times the peak number of concurrent calls.
+
+        :return: Summary as a dictionary
+        """
+        with self._lock:
+            intervals = self._intervals()
+            calls = list(self._calls)
+
+        if not intervals:
+            return {'dag_id': self._dag_id, 'tasks': 0}
+
+        begin = min(ready for ready, _, _ in intervals.values())
+        finish = max(end for _, _, end in intervals.values())
+
+        # Walk back from the last task through the parent that finished last
+        path = []
+        task_id = max(intervals, key=lambda t: intervals[t][2])
+        while task_id is not None:
+            path.append(task_id)
+            parents = [p for p in self._parents.get(task_id, []) if p in intervals]
+            task_id = max(parents, key=lambda p: intervals[p][2]) if parents else None
+        path.reverse()
+
+        latencies = defaultdict(list)
+        queueing = defaultdict(list)
+        for task_id, (ready, start, end) in intervals.items():
+            latencies[self._operators.get(task_id)].append(end - start)
+            queueing[self._operators.get(task_id)].append(start - ready)
+
+        operators = {
+            operator: {
+                'count': len(values),
+                'latency': _percentiles(values),
+                'queued': _percentiles(queueing[operator]),
+            }
+            for operator, values in latencies.items()
+        }
+
+        call_intervals = [
+            (stats['worker_start_tstamp'], stats['worker_end_tstamp'])
+            for _, _, stats in calls if 'worker_start_tstamp' in stats and 'worker_end_tstamp' in stats
+        ]
+        busy = sum(end - start for start, end in call_intervals)
+        peak = _peak_concurrency(call_intervals)
+        makespan = finish - begin
+
+        return {
+            'dag_id': self._dag_id,
+            'tasks': len(intervals),
+            'makespan': makespan,
+            'critical_path': {
+                'tasks': path,
+                'duration': intervals[path[-1]][2] - intervals[path[0]][0],
+            },
+            'operators': operators,
+            'workers': {
+                'calls': len(calls),
+                'busy_seconds': busy,
+                'peak_concurrency': peak,
+                'utilization': busy / (makespan * peak) if makespan > 0 and peak else 0.0,
+            },
+        }
+
+    def export(self, path: str, fmt: str = 'chrome'):
+        """
+        Write the timeline to a JSON file
+
+        :param path: Path of the file
+        :param fmt: ``chrome`` for Chrome trace events, ``otel`` for OpenTelemetry-style spans
+        :raises ValueError: If the format is not supported
+        """
+        if fmt == 'chrome':
+            data = self.to_chrome_trace()
+        elif fmt == 'otel':
+            data = {'spans': self.to_spans()}
+        else:
+            raise ValueError(f'Trace format {fmt} not supported')
+        with open(path, 'w') as f:
+            json.dump(data, f)
+
+
+def trace_span(task: Operator, name: str):
+    """
+    Return a context manager that records a phase of a task in its tracer, if it has one
+
+    :param task: Task
+    :param name: Phase name
+    """
+    return task.tracer.span(task, name) if task.tracer is not None else nullcontext()
+
+
+def _percentiles(values: List[float]) -> Dict[str, float]:
+    """Return the nearest-rank p50, p90, p99 and max of a list of values."""
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[max(0, math.ceil(p / 100 * len(ordered)) - 1)]
+
+    return {'p50': rank(50), 'p90': rank(90), 'p99': rank(99), 'max': ordered[-1]}
+
+
+def _peak_concurrency(intervals: List[Tuple[float, float]]) -> int:
+    """Return the maximum number of overlapping intervals."""
+    points = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    peak = current = 0
+    for _, delta in points:
+        current += delta
+        peak = max(peak, current)
+    return peak
@@ -7,8 +7,7 @@ from dagium import Future, InputData
 from lithops import Storage, LocalhostExecutor
 
 from dagium.dag import DAG, DagExecutor
-from dagium.operators import CallAsync
-from operators import Map
+from dagium.operators import CallAsync, Map
 
 config = {'lithops': {'backend': 'localhost', 'storage': 'localhost'}}
 
@@ -0,0 +1,14 @@
+import pytest
+
+from benchmarks.fake_executor import FakeFunctionExecutor
+from dagium import InputData
+from dagium.dag import DAG, DagExecutor, FileCheckpointLog
+from dagium.operators import CallAsync
+
+
+def test_checkpoint_requires_result_store(tmp_path):
+    with FakeFunctionExecutor() as executor:
+        dag = DAG('checkpoint')
+        dag.add_tasks([CallAsync('a', executor, lambda input_data, *args, **kwargs: 1, input_data=InputData(1))])
+        with pytest.raises(ValueError):
+            DagExecutor(dag, checkpoint=FileCheckpointLog(str(tmp_path / 'log.jsonl')))
@@ -0,0 +1,55 @@
+from dagium.dag import DAG, TaskTable
+from dagium.operators import CallAsync
+
+
+def task(task_id):
+    return CallAsync(task_id, executor=None, func=None)
+
+
+def test_roots_and_leaves_follow_relation_changes():
+    a, b, c = task('a'), task('b'), task('c')
+    dag = DAG('relations')
+    dag.add_tasks([a, b, c])
+    assert dag.root_tasks == dag.leaf_tasks == {a, b, c}
+
+    a >> b
+    assert dag.root_tasks == {a, c} and dag.leaf_tasks == {b, c}
+    b >> c
+    assert dag.root_tasks == {a} and dag.leaf_tasks == {c}
+    a.remove_child(b)
+    assert dag.root_tasks == {a, b} and dag.leaf_tasks == {a, c}
+
+    dag.remove_task(c)
+    assert dag.root_tasks == dag.leaf_tasks == {a, b}
+
+
+def test_roots_and_leaves_after_insert_and_collapse():
+    a, b = task('a'), task('b')
+    a >> b
+    dag = DAG('insert')
+    dag.add_tasks([a, b])
+
+    inserted = [task('i0'), task('i1')]
+    dag.insert_tasks(a, inserted)
+    assert dag.root_tasks == {a} and dag.leaf_tasks == {b}
+    assert a.children == set(inserted) and b.parents == set(inserted)
+
+    dag.collapse()
+    assert dag.root_tasks == {a} and dag.leaf_tasks == {b}
+    assert a.children == {b}
+
+
+def test_roots_and_leaves_of_table_tasks():
+    table = TaskTable(None)
+    a, b, c = (table.add(task_id, func=None) for task_id in 'abc')
+    dag = DAG('table')
+    dag.add_tasks([a, b])
+    other = DAG('other')
+    other.add_task(c)
+
+    a >> b
+    b >> c
+    assert dag.root_tasks == {a} and dag.leaf_tasks == set()
+    assert other.root_tasks == set() and other.leaf_tasks == {c}
+    b.remove_child(c)
+    assert dag.leaf_tasks == {b} and other.root_tasks == {c}
@@ -0,0 +1,87 @@
+import asyncio
+
+import pytest
+
+from benchmarks.fake_executor import FakeFunctionExecutor
+from dagium import InputData
+from dagium.dag import DAG, AsyncDagExecutor, DagExecutor, DagService
+from dagium.execution import AdaptiveConcurrencySelector, TokenBucket
+from dagium.operators import CallAsync, Expand, Map, TaskState
+
+MODES = ['waves', 'event_driven', 'async', 'service']
+
+
+def total(input_data, *args, **kwargs):
+    values = [input_data[key].result() for key in sorted(input_data)]
+    return sum(sum(v) if isinstance(v, list) else v for v in values) + 1
+
+
+def double(input_data, parent_id, *args, **kwargs):
+    return input_data.result() * 2
+
+
+def partition(input_data, *args, **kwargs):
+    return list(range(input_data[next(iter(input_data))].result() % 7))
+
+
+def build_dag(executor):
+    dag = DAG('modes')
+    roots = [CallAsync(f'r{i}', executor, total, input_data=InputData(i)) for i in range(8)]
+    join = CallAsync('join', executor, total)
+    doubled = Map('doubled', executor, double)
+    expand = Expand('expand', executor, partition, lambda x: x + 1)
+    sink = CallAsync('sink', executor, total)
+    roots[:4] >> join
+    join >> doubled
+    roots[4:] >> doubled
+    join >> expand >> sink
+    doubled >> sink
+    dag.add_tasks(roots + [join, doubled, expand, sink])
+    return dag
+
+
+def execute(mode, dag, **options):
+    if mode == 'async':
+        return asyncio.run(AsyncDagExecutor(dag, **options).execute())
+    if mode == 'service':
+        service = DagService()
+        try:
+            return service.submit(dag, **options).result(timeout=30)
+        finally:
+            service.shutdown()
+    dag_executor = DagExecutor(dag, event_driven=mode == 'event_driven', **options)
+    try:
+        return dag_executor.execute()
+    finally:
+        dag_executor.shutdown()
+
+
+def results(futures):
+    # The calls of a map follow the order of its parents, which is not stable across DAG instances
+    return {
+        task_id: sorted(value) if isinstance(value, list) else value
+        for task_id, value in ((task_id, future.result()) for task_id, future in futures.items())
+        if '/' not in task_id
+    }
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_modes_produce_the_same_results(mode):
+    with FakeFunctionExecutor(duration='uniform:0:0.02', seed=1) as executor:
+        expected = results(execute('waves', build_dag(executor)))
+        dag = build_dag(executor)
+        futures = execute(mode, dag)
+
+    assert results(futures) == expected
+    assert all(task.state == TaskState.SUCCESS for task in dag.tasks)
+
+
+@pytest.mark.parametrize('mode', MODES)
+def test_rate_limited_modes_finish(mode):
+    with FakeFunctionExecutor() as executor:
+        dag = DAG('limited')
+        dag.add_tasks([CallAsync(f't{i}', executor, total, input_data=InputData(i)) for i in range(6)])
+        selector = AdaptiveConcurrencySelector(rate_limits={executor: TokenBucket(50, 1)})
+        futures = execute(mode, dag, selector=selector)
+
+    assert results(futures) == {f't{i}': i + 1 for i in range(6)}
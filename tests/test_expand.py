@@ -0,0 +1,45 @@
+from benchmarks.fake_executor import FakeFunctionExecutor
+from dagium import InputData
+from dagium.cache import MemoryCache
+from dagium.dag import DAG, DagExecutor
+from dagium.execution import CachingExecutor
+from dagium.operators import CallAsync, Expand
+
+
+def partition(input_data, *args, **kwargs):
+    return list(range(input_data['root'].result()))
+
+
+def collect(input_data, *args, **kwargs):
+    return [value for chunk_id in sorted(input_data, key=lambda i: int(i.split('/')[1]))
+            for value in input_data[chunk_id].result()]
+
+
+def build_dag(executor, size=6):
+    dag = DAG('expand')
+    expand = Expand('e', executor, partition, lambda x: x * 10, input_data=InputData(size))
+    sink = CallAsync('sink', executor, collect)
+    expand >> sink
+    dag.add_tasks([expand, sink])
+    return dag
+
+
+def test_expand_results():
+    with FakeFunctionExecutor() as executor:
+        futures = DagExecutor(build_dag(executor)).execute()
+        assert futures['sink'].result() == [0, 10, 20, 30, 40, 50]
+
+
+def test_cached_expand_results():
+    with FakeFunctionExecutor() as executor:
+        caching = CachingExecutor(MemoryCache())
+        for _ in range(2):
+            futures = DagExecutor(build_dag(executor), executor=caching).execute()
+            assert futures['sink'].result() == [0, 10, 20, 30, 40, 50]
+        assert caching.cache.stats['hits'] > 0
+
+
+def test_empty_expand():
+    with FakeFunctionExecutor() as executor:
+        futures = DagExecutor(build_dag(executor, size=0)).execute()
+        assert futures['sink'].result() == []
@@ -0,0 +1,86 @@
+import time
+
+from benchmarks.fake_executor import FakeFunctionExecutor
+from dagium import InputData, ObjectRefList
+from dagium.dag import DAG, DagExecutor, find_pipelines
+from dagium.operators import Map, PipelinedMap
+
+FINISHED = {}
+
+
+def source(input_data, parent_id, *args, **kwargs):
+    return input_data.result()
+
+
+def times_ten(input_data, parent_id, *args, **kwargs):
+    return input_data.result() * 10
+
+
+def add_one(element, *args, **kwargs):
+    return element + 1
+
+
+def record(task_id):
+    def func(element, *args, **kwargs):
+        FINISHED.setdefault(task_id, []).append(time.monotonic())
+        return element + 1
+    return func
+
+
+def test_partitioned_pipeline_results():
+    with FakeFunctionExecutor(duration='uniform:0:0.02') as executor:
+        dag = DAG('partitioned')
+        a = Map('a', executor, source, input_data={f'k{i}': InputData(i) for i in range(5)})
+        b = Map('b', executor, times_ten, partitioned=True)
+        c = Map('c', executor, times_ten, partitioned=True)
+        a >> b >> c
+        dag.add_tasks([a, b, c])
+        assert find_pipelines(dag) == [[a, b, c]]
+
+        futures = DagExecutor(dag).execute()
+        assert futures['a'].result() == [0, 1, 2, 3, 4]
+        assert futures['b'].result() == [0, 10, 20, 30, 40]
+        assert futures['c'].result() == [0, 100, 200, 300, 400]
+
+
+def test_streaming_pipeline_results():
+    with FakeFunctionExecutor(duration='uniform:0:0.02') as executor:
+        dag = DAG('streaming')
+        a = Map('a', executor, add_one, input_data=InputData(list(range(20))), batch_size=2, window=2)
+        b = Map('b', executor, add_one, batch_size=3)
+        a >> b
+        dag.add_tasks([a, b])
+        assert find_pipelines(dag) == [[a, b]]
+
+        futures = DagExecutor(dag).execute()
+        assert futures['a'].result() == list(range(1, 21))
+        assert futures['b'].result() == list(range(2, 22))
+
+
+def test_streaming_pipeline_overlaps_maps():
+    FINISHED.clear()
+    with FakeFunctionExecutor(duration='const:0.05') as executor:
+        dag = DAG('overlap')
+        a = Map('a', executor, record('a'), input_data=InputData(list(range(20))), batch_size=2, window=2)
+        b = Map('b', executor, record('b'), batch_size=3)
+        a >> b
+        dag.add_tasks([a, b])
+
+        futures = DagExecutor(dag).execute()
+        assert futures['b'].result() == list(range(2, 22))
+        # The second map started before the last chunk of the first one finished
+        assert min(FINISHED['b']) < max(FINISHED['a'])
+
+
+def test_split_cached_streaming_results():
+    a = Map('a', None, add_one, batch_size=2)
+    b = Map('b', None, add_one, batch_size=3)
+    a >> b
+    pipeline = PipelinedMap([a, b])
+    # 5 elements are 3 chunks of the first map and 2 chunks of the second one
+    values = [[1, 2], [3, 4], [5], [2, 3, 4], [5, 6]]
+    split = dict((task.task_id, future.result()) for task, future in pipeline.split_future(InputData(values)))
+    assert split == {'a': [1, 2, 3, 4, 5], 'b': [2, 3, 4, 5, 6]}
+
+    refs = pipeline.split_future(ObjectRefList(list(range(5))))
+    assert [len(future.refs) for _, future in refs] == [3, 2]
@@ -0,0 +1,37 @@
+from benchmarks.fake_executor import FakeFunctionExecutor
+from dagium import InputData, Tracer
+from dagium.dag import DAG, DagExecutor
+from dagium.operators import CallAsync
+
+
+def double(input_data, *args, **kwargs):
+    return input_data['root'].result() * 2
+
+
+def increment(input_data, *args, **kwargs):
+    return input_data['a'].result() + 1
+
+
+def build_dag(executor, dag_id):
+    dag = DAG(dag_id)
+    a = CallAsync('a', executor, double, input_data=InputData(1))
+    b = CallAsync('b', executor, increment)
+    a >> b
+    dag.add_tasks([a, b])
+    return dag
+
+
+def test_tracer_records_one_run():
+    tracer = Tracer()
+    with FakeFunctionExecutor(duration='const:0.05') as executor:
+        DagExecutor(build_dag(executor, 'first'), tracer=tracer).execute()
+        first = tracer.summary()
+        DagExecutor(build_dag(executor, 'second'), tracer=tracer).execute()
+        second = tracer.summary()
+
+    assert first['tasks'] == second['tasks'] == 2
+    assert second['dag_id'] == 'second'
+    assert second['critical_path']['tasks'] == ['a', 'b']
+    # The second run must not span back to the first one
+    assert second['makespan'] < first['makespan'] * 3
+    assert second['workers']['calls'] == first['workers']['calls']